@@ -20,7 +20,7 @@ from rich.text import Text
 from rich.progress import Progress, SpinnerColumn, TextColumn
 import questionary
 
-from src.blockchain import Node, Transaction
+from src.blockchain import Node, AsyncNode, Transaction
 
 hostname = socket.gethostname()
 ip_address = socket.gethostbyname(hostname)
@@ -49,6 +49,89 @@ def parse_args():
         default=[],
         help="Endereços de nós bootstrap (ex: localhost:5001)"
     )
+    parser.add_argument(
+        "--mining-workers",
+        type=int,
+        default=1,
+        help="Processos usados na mineração (default: 1, sequencial)"
+    )
+    parser.add_argument(
+        "--auto-mine",
+        action="store_true",
+        help="Inicia a mineração contínua em segundo plano"
+    )
+    parser.add_argument(
+        "--validation-workers",
+        type=int,
+        default=1,
+        help="Processos usados na verificação de hashes de cadeias recebidas (default: 1)"
+    )
+    parser.add_argument(
+        "--mempool-size",
+        type=int,
+        default=5000,
+        help="Máximo de transações pendentes; as de menor valor são despejadas (default: 5000)"
+    )
+    parser.add_argument(
+        "--persistent",
+        action="store_true",
+        help="Mantém conexões persistentes com os peers (sessões reutilizáveis)"
+    )
+    parser.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="Usa o núcleo de rede asyncio em vez de uma thread por conexão"
+    )
+    parser.add_argument(
+        "--json-only",
+        action="store_true",
+        help="Não negocia codificação compacta (usa sempre JSON puro)"
+    )
+    parser.add_argument(
+        "--inbound-workers",
+        type=int,
+        default=16,
+        help="Threads que tratam as mensagens recebidas (default: 16)"
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=128,
+        help="Conexões de entrada simultâneas; acima disso responde BUSY (default: 128)"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=500.0,
+        help="Mensagens/s aceitas por nó remoto (IP + porta anunciada); 0 desliga o limite (default: 500)"
+    )
+    parser.add_argument(
+        "--tx-batch-window",
+        type=float,
+        default=0.05,
+        help="Segundos para agrupar transações antes de propagá-las; 0 propaga cada uma na hora (default: 0.05)"
+    )
+    parser.add_argument(
+        "--merkle-blocks",
+        action="store_true",
+        help="Minera blocos com raiz de Merkle e os propaga como blocos compactos"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Registra métricas do nó (consultáveis via GET_METRICS)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Expõe as métricas em http://127.0.0.1:PORTA/metrics (formato Prometheus)"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=None,
+        help="Diretório para persistir os blocos em disco (default: só memória)"
+    )
     return parser.parse_args()
 
 
@@ -114,6 +197,10 @@ def show_pending(node: Node):
 
 
 def mine_block(node: Node):
+    if node.mining_service.running:
+        console.print("[yellow]Mineração contínua ativa: desligue-a para minerar manualmente[/yellow]")
+        return
+    
     num_txs = len(node.blockchain.pending_transactions)
     
     with Progress(
@@ -138,8 +225,38 @@ def mine_block(node: Node):
         console.print("[bold red]✗ Mineração interrompida[/bold red]")
 
 
+def toggle_auto_mining(node: Node):
+    service = node.mining_service
+    if service.running:
+        hashrate = service.hashrate()
+        node.stop_auto_mining()
+        console.print(Panel(
+            f"[bold yellow]Mineração contínua desligada[/bold yellow]\n"
+            f"Blocos encontrados: [green]{service.blocks_found}[/green]\n"
+            f"Candidatos montados: {service.templates}\n"
+            f"Hashrate recente: [cyan]{hashrate:,.0f} H/s[/cyan]",
+            expand=False
+        ))
+    else:
+        node.start_auto_mining()
+        console.print("[bold green]✓ Mineração contínua ligada[/bold green] (acompanhe em Ver status da mineração)")
+
+
+def show_mining_status(node: Node):
+    service = node.mining_service
+    status = "[green]ligada[/green]" if service.running else "[yellow]desligada[/yellow]"
+    console.print(Panel(
+        f"Mineração contínua: {status}\n"
+        f"Blocos encontrados: [green]{service.blocks_found}[/green]\n"
+        f"Candidatos montados: {service.templates}\n"
+        f"Hashrate: [cyan]{service.hashrate():,.0f} H/s[/cyan]",
+        title="Mineração",
+        expand=False
+    ))
+
+
 def show_blockchain(node: Node):
-    for block in node.blockchain.chain:
+    for block in node.blockchain.iter_blocks():
         table = Table(show_header=True, header_style="bold blue", expand=True)
         table.add_column("Origem")
         table.add_column("Destino")
@@ -190,6 +307,35 @@ def show_balance(node: Node):
     console.print(Panel(f"Saldo de [bold cyan]{address}[/bold cyan]: [bold green]{balance}[/bold green]", expand=False))
 
 
+def query_transaction(node: Node):
+    if not node.peers:
+        console.print("[yellow]Nenhum peer conectado para consultar.[/yellow]")
+        return
+    peer = questionary.select("Peer a consultar:", choices=list(node.peers)).ask()
+    if not peer: return
+    tx_id = questionary.text("ID da transação:").ask()
+    if not tx_id: return
+    
+    result = node.query_transaction(peer, tx_id.strip())
+    if result is None:
+        console.print(f"[bold red]✗ Sem resposta válida de {peer} (peer inacessível ou prova inválida)[/bold red]")
+        return
+    match result["status"]:
+        case "confirmed":
+            tx = result["transaction"]
+            console.print(Panel(
+                f"[bold green]✓ Confirmada no bloco #{result['block_index']}[/bold green] "
+                f"({result['confirmations']} confirmação(ões), prova verificada)\n"
+                f"{tx['origem']} → {tx['destino']}: [bold]{tx['valor']}[/bold]",
+                title=tx_id,
+                expand=False,
+            ))
+        case "pending":
+            console.print(f"[yellow]Transação pendente na mempool de {peer}[/yellow]")
+        case _:
+            console.print(f"[yellow]Transação desconhecida por {peer}[/yellow]")
+
+
 def show_peers(node: Node):
     if not node.peers:
         console.print(Panel("[yellow]Nenhum peer conectado.[/yellow]", title="Peers Conectados", expand=False))
@@ -229,14 +375,28 @@ def sync_chain(node: Node):
         transient=True,
     ) as progress:
         progress.add_task(description="Sincronizando blockchain e mempool...", total=None)
-        node.sync_blockchain()
+        chain_result = node.sync_blockchain()
         result = node.sync_mempool()
     
     added = result["added"]
     unreachable = result["unreachable"]
+    best_peer = chain_result["best_peer"]
+    
+    if chain_result["peers"]:
+        table = Table(title="Peers Consultados", show_header=True, header_style="bold green")
+        table.add_column("Endereço")
+        table.add_column("Status")
+        table.add_column("Altura", justify="right")
+        table.add_column("Latência (ms)", justify="right")
+        for peer, info in chain_result["peers"].items():
+            height = "-" if info["height"] is None else str(info["height"])
+            table.add_row(peer, info["status"], height, f"{info['latency_ms']:.1f}")
+        console.print(table)
     
     console.print(
-        f"[bold green]✓ Blockchain sincronizada com {len(node.blockchain.chain)} blocos[/bold green]\n"
+        f"[bold green]✓ Blockchain sincronizada com {len(node.blockchain.chain)} blocos"
+        + (f" (de [cyan]{best_peer}[/cyan])" if best_peer else "") +
+        f" em {chain_result['duration_ms']:.0f} ms[/bold green]\n"
         f"[bold green]✓ Mempool: {len(node.blockchain.pending_transactions)} transação(ões) pendente(s)"
         + (f" ([cyan]+{added} nova(s)[/cyan])" if added else "") +
         "[/bold green]"
@@ -297,7 +457,41 @@ def main():
     console.print()
     
     # Cria e inicia o nó
-    node = Node(host=args.host, port=args.port)
+    if args.asyncio:
+        node = AsyncNode(
+            host=args.host,
+            port=args.port,
+            mining_workers=args.mining_workers,
+            compact=not args.json_only,
+            data_dir=args.data_dir,
+            validation_workers=args.validation_workers,
+            mempool_size=args.mempool_size,
+            metrics=args.metrics,
+            metrics_port=args.metrics_port,
+            inbound_workers=args.inbound_workers,
+            max_connections=args.max_connections,
+            rate_limit=args.rate_limit,
+            tx_batch_window=args.tx_batch_window,
+            merkle_blocks=args.merkle_blocks,
+        )
+    else:
+        node = Node(
+            host=args.host,
+            port=args.port,
+            mining_workers=args.mining_workers,
+            persistent=args.persistent,
+            compact=not args.json_only,
+            data_dir=args.data_dir,
+            validation_workers=args.validation_workers,
+            mempool_size=args.mempool_size,
+            metrics=args.metrics,
+            metrics_port=args.metrics_port,
+            inbound_workers=args.inbound_workers,
+            max_connections=args.max_connections,
+            rate_limit=args.rate_limit,
+            tx_batch_window=args.tx_batch_window,
+            merkle_blocks=args.merkle_blocks,
+        )
     node.start()
     
     # Conecta aos nós bootstrap
@@ -309,6 +503,9 @@ def main():
     if node.peers:
         node.sync_blockchain()
     
+    if args.auto_mine:
+        node.start_auto_mining()
+    
     choices = [
         questionary.Choice("1. Criar transação", "1"),
         questionary.Choice("2. Ver transações pendentes", "2"),
@@ -318,6 +515,9 @@ def main():
         questionary.Choice("6. Ver peers conectados", "6"),
         questionary.Choice("7. Conectar a peer", "7"),
         questionary.Choice("8. Sincronizar blockchain", "8"),
+        questionary.Choice("9. Ligar/desligar mineração contínua", "9"),
+        questionary.Choice("10. Ver status da mineração", "10"),
+        questionary.Choice("11. Consultar transação em um peer", "11"),
         questionary.Separator(),
         questionary.Choice("0. Sair", "0")
     ]
@@ -364,6 +564,12 @@ def main():
                     connect_peer(node)
                 case "8":
                     sync_chain(node)
+                case "9":
+                    toggle_auto_mining(node)
+                case "10":
+                    show_mining_status(node)
+                case "11":
+                    query_transaction(node)
     
     except KeyboardInterrupt:
         console.print("\n[yellow]Interrompido pelo usuário[/yellow]")
@@ -7,6 +7,7 @@ from .block import Block
 from .blockchain import Blockchain
 from .transaction import Transaction
 from .node import Node
+from .async_node import AsyncNode
 from .miner import Miner
 from .protocol import Protocol, MessageType
 
@@ -16,6 +17,7 @@ __all__ = [
     "Blockchain",
     "Transaction",
     "Node",
+    "AsyncNode",
     "Miner",
     "Protocol",
     "MessageType",
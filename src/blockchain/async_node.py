@@ -0,0 +1,283 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from .block import Block
+from .mempool import Mempool
+from .node import Node, ip_address
+from .protocol import Protocol, Message, MessageType, MAX_FRAME_SIZE
+
+
+async def read_frame(reader: asyncio.StreamReader, max_size: int = MAX_FRAME_SIZE) -> bytes | None:
+    """
+    Lê um frame (4 bytes big-endian com o tamanho + corpo JSON) do stream.
+    
+    Retorna None se a conexão foi fechada antes de um frame completo;
+    lança ValueError se o frame anunciado excede max_size.
+    """
+    try:
+        length_data = await reader.readexactly(4)
+        length = int.from_bytes(length_data, 'big')
+        if length > max_size:
+            raise ValueError(f"Frame de {length} bytes excede o máximo de {max_size}")
+        return await reader.readexactly(length) or None
+    except asyncio.IncompleteReadError:
+        return None
+
+
+class AsyncNode(Node):
+    """
+    Nó com núcleo de rede asyncio (alternativa ao modelo thread-por-conexão).
+    
+    Um único event loop, em uma thread dedicada, atende todas as conexões
+    de entrada e os envios de saída, usando o mesmo framing do protocolo
+    (4 bytes de tamanho + JSON). O processamento das mensagens, que pode
+    fazer requisições bloqueantes a outros peers, roda no pool limitado com
+    prioridades de Node (InboundPool); a mineração nunca roda no event loop.
+    
+    A API pública é a mesma de Node (start, stop, connect_to_peer,
+    sync_blockchain, broadcast_*). Sessões persistentes não se aplicam:
+    o custo de conexão por mensagem no asyncio não envolve threads.
+    """
+    
+    def __init__(
+        self,
+        host: ip_address,
+        port: int = 5000,
+        mining_workers: int = 1,
+        compact: bool = True,
+        max_frame_size: int = MAX_FRAME_SIZE,
+        data_dir: str | None = None,
+        validation_workers: int = 1,
+        mempool_size: int = Mempool.MAX_COUNT,
+        metrics: bool = False,
+        metrics_port: int | None = None,
+        inbound_workers: int = Node.INBOUND_WORKERS,
+        max_connections: int = Node.MAX_CONNECTIONS,
+        rate_limit: float | None = Node.RATE_LIMIT,
+        tx_batch_window: float = Node.TX_BATCH_WINDOW,
+        merkle_blocks: bool = False,
+    ):
+        super().__init__(
+            host,
+            port,
+            mining_workers=mining_workers,
+            compact=compact,
+            max_frame_size=max_frame_size,
+            data_dir=data_dir,
+            validation_workers=validation_workers,
+            mempool_size=mempool_size,
+            metrics=metrics,
+            metrics_port=metrics_port,
+            inbound_workers=inbound_workers,
+            max_connections=max_connections,
+            rate_limit=rate_limit,
+            tx_batch_window=tx_batch_window,
+            merkle_blocks=merkle_blocks,
+        )
+        
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.Task] = set()
+    
+    def start(self):
+        """Inicia o event loop e o servidor asyncio."""
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
+        
+        # Aguarda o bind para que erros (ex: porta em uso) cheguem ao chamador
+        future = asyncio.run_coroutine_threadsafe(self._start_server(), self._loop)
+        future.result()
+        
+        self.running = True
+        self.logger.info(f"Nó (asyncio) iniciado em {self.address}")
+        
+        self._start_metrics_server()
+    
+    async def _start_server(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            "0.0.0.0",
+            self.port,
+            reuse_address=True,
+        )
+    
+    def stop(self):
+        """Para o servidor e o event loop."""
+        self.running = False
+        self._stop_metrics_server()
+        self.mining_service.stop()
+        self.miner.shutdown()
+        # Antes de parar o loop: um timer pendente agendaria envios nele
+        self._tx_batcher.close()
+        if self._loop and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close_server(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+        self.inbound.shutdown()
+        self.blockchain.close()
+        self.logger.info("Nó encerrado")
+    
+    async def _close_server(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        # Encerra conexões ainda abertas (ex: sessões persistentes ociosas)
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Atende uma conexão de entrada (equivalente a Node._handle_client).
+        
+        Também aceita o handshake de sessão persistente de nós em modo
+        persistent: após PING {"keep_alive": true} cada frame recebe uma
+        resposta (ACK quando não há) até o cliente fechar ou ficar ocioso.
+        """
+        address = writer.get_extra_info("peername")
+        if len(self._connections) >= self.max_connections:
+            self.metrics.inc("inbound_shed_total", labels={"reason": "connections"})
+            try:
+                writer.write(self._busy("connections").to_bytes())
+                await writer.drain()
+                # Descarta o pedido já enviado para o close não virar RST
+                await asyncio.wait_for(reader.read(self.BUFFER_SIZE), 0.1)
+            except (OSError, asyncio.TimeoutError):
+                pass
+            finally:
+                writer.close()
+            return
+        task = asyncio.current_task()
+        self._connections.add(task)
+        keep_alive = False
+        try:
+            while True:
+                if keep_alive:
+                    data = await asyncio.wait_for(read_frame(reader, self.max_frame_size), self.SESSION_IDLE_TIMEOUT)
+                else:
+                    data = await read_frame(reader, self.max_frame_size)
+                if not data:
+                    return
+                
+                message = Message.from_bytes(data, self.max_frame_size)
+                response = self._admit(message, address[0])
+                if isinstance(response, Future):
+                    response = await asyncio.wrap_future(response)
+                handshake = (
+                    not keep_alive
+                    and message.type == MessageType.PING
+                    and message.payload.get("keep_alive")
+                    and not (response and response.type == MessageType.BUSY)
+                )
+                
+                if handshake:
+                    keep_alive = True
+                    response = response or Protocol.pong()
+                    response.payload["keep_alive"] = True
+                elif keep_alive and response is None:
+                    response = Protocol.ack()
+                
+                if response:
+                    writer.write(response.to_bytes(self._reply_encoding(message, data)))
+                    await writer.drain()
+                
+                if not keep_alive:
+                    return
+        
+        except asyncio.TimeoutError:
+            self.logger.debug(f"Sessão ociosa encerrada: {address}")
+        except asyncio.CancelledError:
+            # Nó encerrando: termina a conexão sem propagar o cancelamento
+            pass
+        except Exception as e:
+            self.logger.error(f"Erro ao processar cliente {address}: {e}")
+        finally:
+            self._connections.discard(task)
+            writer.close()
+    
+    def _deliver(self, peer_address: str, message: Message) -> Message | None:
+        """Envia mensagem pelo event loop e aguarda a resposta (chamada bloqueante)."""
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("_send_message bloqueante chamado dentro do event loop")
+        future = asyncio.run_coroutine_threadsafe(
+            self._send_message_async(peer_address, message), self._loop
+        )
+        return future.result()
+    
+    async def _send_relay_async(self, peer_address: str, message: Message) -> Message | None:
+        """Envia uma mensagem de relay; se o peer responder BUSY, reenvia uma vez (ver Node._send_message)."""
+        response = await self._send_message_async(peer_address, message)
+        if response and response.type == MessageType.BUSY:
+            delay = self._busy_retry_delay(message, response)
+            if delay is not None:
+                self.metrics.inc("peer_busy_retries_total", labels={"type": message.type.value})
+                await asyncio.sleep(delay)
+                response = await self._send_message_async(peer_address, message)
+            if response and response.type == MessageType.BUSY:
+                self._log_busy(peer_address, message, response)
+                return None
+        return response
+    
+    async def _send_message_async(self, peer_address: str, message: Message) -> Message | None:
+        """Envia mensagem para um peer e retorna resposta (coroutine)."""
+        writer = None
+        try:
+            host, port = peer_address.split(":")
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, int(port)), self.SEND_TIMEOUT
+            )
+            
+            message.sender = self.address
+            writer.write(message.to_bytes(self._encoding_for(peer_address)))
+            await writer.drain()
+            
+            # Aguarda resposta (o peer fecha sem responder se não houver)
+            data = await asyncio.wait_for(read_frame(reader, self.max_frame_size), self.SEND_TIMEOUT)
+            if data:
+                return Message.from_bytes(data, self.max_frame_size)
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao enviar para {peer_address}: {e}")
+        finally:
+            if writer:
+                writer.close()
+        
+        return None
+    
+    def _fan_out(self, message: Message, peers: list[str]):
+        """Despacha a mensagem para cada peer (tarefas no event loop, sem threads)."""
+        for peer in peers:
+            asyncio.run_coroutine_threadsafe(
+                self._send_relay_async(peer, message), self._loop
+            )
+    
+    def _announce_inventory(self, inv: Message, peers: list[str]):
+        """Envia o INV a cada peer por tarefas no event loop."""
+        inv.sender = self.address
+        for peer in peers:
+            asyncio.run_coroutine_threadsafe(self._announce_async(peer, inv), self._loop)
+    
+    def _push_inventory(self, peer_address: str, items: list[dict]):
+        asyncio.run_coroutine_threadsafe(self._send_inventory_async(peer_address, items), self._loop)
+    
+    async def _announce_async(self, peer_address: str, inv: Message):
+        """Equivalente a Node._announce (coroutine)."""
+        response = await self._send_relay_async(peer_address, inv)
+        if response and response.type == MessageType.GETDATA:
+            await self._send_inventory_async(peer_address, response.payload["items"][:self.MAX_INV])
+    
+    async def _send_inventory_async(self, peer_address: str, items: list[dict]):
+        # A busca na Blockchain usa o lock de leitura: roda fora do event loop
+        messages = await self._loop.run_in_executor(
+            None, self._inventory_messages, items, peer_address in self._batch_peers
+        )
+        for message in messages:
+            await self._send_relay_async(peer_address, message)
+    
+    async def mine_async(self) -> Block | None:
+        """Minera um bloco em um executor, sem bloquear o event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.mine)
@@ -0,0 +1,361 @@
+"""
+Benchmarks da blockchain: hashing, saldos, mempool, validação, protocolo e rede.
+
+Uso:
+    python -m src.blockchain.bench --blocks 200 --mempool 5000 --output bench.json
+
+Gera uma cadeia e uma mempool sintéticas do tamanho pedido, mede cada
+operação e, na parte de rede, sobe nós locais (loopback) para medir a
+latência de propagação de blocos e de sincronização. O resultado é um JSON
+com os parâmetros, o commit atual e as medidas, comparável entre commits.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Callable
+
+from .block import Block
+from .blockchain import Blockchain
+from .mempool import Mempool
+from .miner import Miner
+from .node import Node
+from .protocol import Message, Protocol, RawJSON, ENCODING_JSON, ENCODING_ZLIB
+from .relay import compact_block_message
+from .transaction import Transaction
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Executa fn repeat vezes e retorna o tempo total, médio e a taxa."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "ops": repeat,
+        "seconds": elapsed,
+        "mean_us": elapsed / repeat * 1e6,
+        "ops_per_sec": repeat / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def make_addresses(count: int) -> list[str]:
+    return [f"addr-{i}" for i in range(count)]
+
+
+def make_transactions(count: int, addresses: list[str], rng: random.Random) -> list[Transaction]:
+    """Transações sintéticas entre os endereços dados (origem "genesis" dispensa saldo)."""
+    return [
+        Transaction(
+            origem="genesis",
+            destino=rng.choice(addresses),
+            valor=round(rng.uniform(0.1, 100.0), 2),
+        )
+        for _ in range(count)
+    ]
+
+
+def make_spends(count: int, senders: list[str], addresses: list[str], rng: random.Random) -> list[Transaction]:
+    """
+    Transações sintéticas gastando saldo dos senders (passam pela checagem de saldo).
+    
+    Os valores são pequenos para que o saldo de cada origem cubra a sua
+    parte da mempool inteira, inclusive os débitos pendentes.
+    """
+    return [
+        Transaction(
+            origem=rng.choice(senders),
+            destino=rng.choice(addresses),
+            valor=round(rng.uniform(0.01, 1.0), 2),
+        )
+        for _ in range(count)
+    ]
+
+
+def make_chain(blocks: int, txs_per_block: int, addresses: list[str], rng: random.Random) -> list[Block]:
+    """
+    Minera uma cadeia sintética (gênesis incluído) com txs_per_block transações por bloco.
+    
+    A recompensa de cada bloco vai para um endereço diferente (em rodízio),
+    que passa a ter saldo para gastar (ver funded_addresses).
+    """
+    blockchain = Blockchain()
+    miner = Miner(blockchain, addresses[0])
+    for index in range(blocks):
+        miner.miner_address = addresses[index % len(addresses)]
+        transactions = make_transactions(txs_per_block, addresses, rng)
+        block = miner.mine_block(transactions)
+        blockchain.add_block(block)
+    return list(blockchain.chain)
+
+
+def funded_addresses(chain: list[Block]) -> list[str]:
+    """Endereços que receberam recompensas (coinbase) na cadeia, sem repetição."""
+    return list(dict.fromkeys(
+        tx.destino
+        for block in chain
+        for tx in block.transactions
+        if tx.origem == "coinbase"
+    ))
+
+
+def load_chain(chain: list[Block], **kwargs) -> Blockchain:
+    """Cria uma Blockchain com os blocos dados (sem revalidar o gênesis)."""
+    blockchain = Blockchain(**kwargs)
+    for block in chain[1:]:
+        blockchain.add_block(block)
+    return blockchain
+
+
+def merkle_copy(block: Block) -> Block:
+    """Mesmo bloco no formato Merkle (raiz e hash recalculados)."""
+    copy = Block.from_dict(block.to_dict())
+    copy.merkle_root = copy.compute_merkle_root()
+    copy.hash = copy.calculate_hash()
+    return copy
+
+
+def bench_hashing(chain: list[Block], repeat: int) -> dict[str, Any]:
+    block = chain[-1]
+    template = block.mining_template()
+    merkle_block = merkle_copy(block)
+    merkle_template = merkle_block.mining_template()
+    nonces = iter(range(10**12))
+    return {
+        "calculate_hash": measure(block.calculate_hash, repeat),
+        "template_hash_nonce": measure(lambda: template.hash_nonce(next(nonces)), repeat),
+        "merkle_template_hash_nonce": measure(lambda: merkle_template.hash_nonce(next(nonces)), repeat),
+        "compute_merkle_root": measure(merkle_block.compute_merkle_root, repeat),
+        "transactions_per_block": len(block.transactions),
+    }
+
+
+def bench_balances(chain: list[Block], addresses: list[str], repeat: int) -> dict[str, Any]:
+    blockchain = load_chain(chain)
+    lookups = iter(addresses * (repeat // len(addresses) + 1))
+    return {
+        "get_balance": measure(lambda: blockchain.get_balance(next(lookups)), repeat),
+    }
+
+
+def bench_mempool(chain: list[Block], size: int, addresses: list[str], rng: random.Random) -> dict[str, Any]:
+    """
+    Enche uma mempool com capacidade size e depois força despejos.
+    
+    As transações gastam o saldo das recompensas da cadeia sintética, então
+    cada inserção inclui a checagem de saldo de uma transação comum.
+    """
+    senders = funded_addresses(chain)
+    blockchain = load_chain(chain, mempool=Mempool(max_count=size))
+    fill = iter(make_spends(size, senders, addresses, rng))
+    overflow = iter(make_spends(size, senders, addresses, rng))
+    batched = load_chain(chain, mempool=Mempool(max_count=size))
+    batch_size = Node.TX_BATCH_SIZE
+    batches = iter([
+        make_spends(batch_size, senders, addresses, rng)
+        for _ in range(max(1, size // batch_size))
+    ])
+    return {
+        "add_transaction": measure(lambda: blockchain.add_transaction(next(fill)), size),
+        f"add_transactions_batch_{batch_size}": measure(
+            lambda: batched.add_transactions(next(batches)), max(1, size // batch_size)
+        ),
+        "add_transaction_full": measure(lambda: blockchain.add_transaction(next(overflow)), size),
+        "select_for_block": measure(lambda: blockchain.select_for_block(Miner.MAX_BLOCK_TXS), 20),
+        "to_json_uncached": measure(lambda: (blockchain.invalidate_mempool_cache(), blockchain.to_json()), 5),
+        "size": len(blockchain.pending_transactions),
+        "senders": len(senders),
+    }
+
+
+def bench_validation(chain: list[Block], repeat: int, workers: int) -> dict[str, Any]:
+    results = {}
+    for count in sorted({1, workers}):
+        blockchain = Blockchain(validation_workers=count)
+        results[f"is_valid_chain_workers_{count}"] = measure(lambda: blockchain.is_valid_chain(chain), repeat)
+        # Cadeia mais longa que compartilha metade do nosso histórico
+        half = load_chain(chain[:len(chain) // 2], validation_workers=count)
+        results[f"replace_chain_half_shared_workers_{count}"] = measure(lambda: half.replace_chain(chain), 1)
+        blockchain.close()
+        half.close()
+    results["blocks"] = len(chain)
+    return results
+
+
+def bench_protocol(chain: list[Block], repeat: int) -> dict[str, Any]:
+    blockchain = load_chain(chain)
+    messages = {
+        "new_block": Protocol.new_block(chain[-1].to_dict()),
+        "compact_block": compact_block_message(merkle_copy(chain[-1])),
+        "response_chain": Protocol.response_chain(RawJSON(blockchain.to_json())),
+    }
+    results = {}
+    for name, message in messages.items():
+        for encoding in (ENCODING_JSON, ENCODING_ZLIB):
+            data = message.to_bytes(encoding)
+            key = f"{name}_{encoding}"
+            count = repeat if name != "response_chain" else max(1, repeat // 100)
+            results[key] = {
+                "bytes": len(data),
+                "encode": measure(lambda: message.to_bytes(encoding), count),
+                "decode": measure(lambda: Message.from_bytes(data[4:]), count),
+            }
+    return results
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until(condition: Callable[[], bool], timeout: float) -> float | None:
+    """Segundos até condition() ser verdadeira, ou None se o prazo esgotar."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if condition():
+            return time.perf_counter() - start
+        time.sleep(0.001)
+    return None
+
+
+def bench_network(chain: list[Block], nodes: int, rounds: int, timeout: float) -> dict[str, Any]:
+    """
+    Sobe nós em loopback: mede a sincronização de um nó vazio com um nó que
+    tem a cadeia inteira e a propagação de blocos minerados para os demais.
+    """
+    cluster = [Node("127.0.0.1", free_port()) for _ in range(nodes)]
+    for node in cluster:
+        node.start()
+    try:
+        source = cluster[0]
+        for block in chain[1:]:
+            source.blockchain.add_block(block)
+        
+        # Sincronização: cada nó entra na rede pelo nó com a cadeia
+        sync = []
+        for node in cluster[1:]:
+            start = time.perf_counter()
+            node.connect_to_peer(source.address)
+            synced = wait_until(lambda: len(node.blockchain.chain) == len(chain), timeout)
+            sync.append(time.perf_counter() - start if synced is not None else None)
+        for node in cluster:
+            for peer in cluster:
+                if peer is not node:
+                    node.peers.add(peer.address)
+                    # Negocia codificação e relay por inventário, como connect_to_peer
+                    node._ping_peer(peer.address)
+        
+        # Propagação: do envio do bloco minerado até todos os nós o terem
+        propagation = []
+        for round_index in range(rounds):
+            miner = cluster[round_index % nodes]
+            block = miner.miner.mine_block()
+            start = time.perf_counter()
+            miner.broadcast_block(block)
+            reached = wait_until(
+                lambda: all(node.blockchain.last_block.hash == block.hash for node in cluster),
+                timeout,
+            )
+            propagation.append(time.perf_counter() - start if reached is not None else None)
+        
+        return {
+            "nodes": nodes,
+            "chain_length": len(chain),
+            "sync_seconds": sync,
+            "propagation_seconds": propagation,
+            "propagation_mean": _mean(propagation),
+            "sync_mean": _mean(sync),
+        }
+    finally:
+        for node in cluster:
+            node.stop()
+
+
+def _mean(values: list[float | None]) -> float | None:
+    measured = [value for value in values if value is not None]
+    return sum(measured) / len(measured) if measured else None
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def parse_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmarks da blockchain")
+    parser.add_argument("--blocks", type=int, default=200, help="Blocos da cadeia sintética (default: 200)")
+    parser.add_argument("--txs-per-block", type=int, default=20, help="Transações por bloco (default: 20)")
+    parser.add_argument("--mempool", type=int, default=5000, help="Transações na mempool sintética (default: 5000)")
+    parser.add_argument("--addresses", type=int, default=100, help="Endereços distintos (default: 100)")
+    parser.add_argument("--repeat", type=int, default=2000, help="Repetições das medidas rápidas (default: 2000)")
+    parser.add_argument("--validation-workers", type=int, default=2, help="Processos na validação paralela (default: 2)")
+    parser.add_argument("--nodes", type=int, default=3, help="Nós locais na parte de rede (default: 3)")
+    parser.add_argument("--rounds", type=int, default=5, help="Blocos propagados na parte de rede (default: 5)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Prazo (s) de cada medida de rede (default: 10)")
+    parser.add_argument("--no-network", action="store_true", help="Pula os benchmarks de rede")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos dados sintéticos (default: 0)")
+    parser.add_argument("--output", default=None, help="Arquivo JSON de saída (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def run(args) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    addresses = make_addresses(args.addresses)
+    
+    start = time.perf_counter()
+    chain = make_chain(args.blocks, args.txs_per_block, addresses, rng)
+    setup = time.perf_counter() - start
+    
+    results = {
+        "hashing": bench_hashing(chain, args.repeat),
+        "balances": bench_balances(chain, addresses, args.repeat),
+        "mempool": bench_mempool(chain, args.mempool, addresses, rng),
+        "validation": bench_validation(chain, 3, args.validation_workers),
+        "protocol": bench_protocol(chain, args.repeat),
+    }
+    if not args.no_network:
+        results["network"] = bench_network(chain, args.nodes, args.rounds, args.timeout)
+    
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "setup_seconds": setup,
+            "params": vars(args),
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    # Os nós registram warnings (ex: blocos rejeitados) que poluiriam a saída
+    logging.basicConfig(level=logging.ERROR)
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,100 @@ import time
 from dataclasses import dataclass, field
 from typing import Any
 
+from .merkle import hash_transaction, merkle_proof, merkle_root, verify_proof
 from .transaction import Transaction
 
 
+def _hashed_fields(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Campos cobertos pelo hash do bloco.
+    
+    No formato legado são as transações completas; no formato Merkle
+    (merkle_root preenchido) só o cabeçalho, com a raiz das transações.
+    """
+    fields = {
+        "index": data["index"],
+        "previous_hash": data["previous_hash"],
+        "nonce": data["nonce"],
+        "timestamp": data["timestamp"],
+    }
+    if data.get("merkle_root"):
+        fields["merkle_root"] = data["merkle_root"]
+    else:
+        fields["transactions"] = data["transactions"]
+    return fields
+
+
+def hash_block_data(data: dict[str, Any]) -> str:
+    """
+    Hash SHA-256 dos campos de um bloco em forma de dicionário (to_dict()).
+    
+    Mesmo resultado de Block.calculate_hash(), sem precisar montar o Block
+    (usado na verificação em paralelo, que recebe dicionários). Também
+    serve para o cabeçalho de um bloco compacto, que não traz transações.
+    """
+    block_string = json.dumps(_hashed_fields(data), sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+
+def verify_block_data(data: dict[str, Any]) -> bool:
+    """Confere o hash e, no formato Merkle, a raiz das transações (ver Block.verify_hash)."""
+    if data["hash"] != hash_block_data(data):
+        return False
+    if data.get("merkle_root"):
+        return data["merkle_root"] == merkle_root([hash_transaction(tx) for tx in data["transactions"]])
+    return True
+
+
+def verify_inclusion(
+    transaction: dict[str, Any],
+    header: dict[str, Any],
+    proof: list[dict[str, str]] | None = None,
+    transactions: list[dict[str, Any]] | None = None,
+) -> bool:
+    """
+    Confere se a transação (to_dict()) está no bloco do cabeçalho dado
+    (Block.compact_header()), como na resposta TX a um GET_TX.
+    
+    Blocos Merkle são conferidos pela prova de inclusão (Block.merkle_proof);
+    blocos legados, que não têm raiz, pela lista completa das transações.
+    Não confere o Proof of Work nem se o bloco está na cadeia: isso fica
+    com quem chama (ex: contra os cabeçalhos obtidos por REQUEST_HEADERS).
+    """
+    if header.get("merkle_root"):
+        if proof is None or header["hash"] != hash_block_data(header):
+            return False
+        return verify_proof(hash_transaction(transaction), proof, header["merkle_root"])
+    if transactions is None:
+        return False
+    data = dict(header, transactions=transactions)
+    return header["hash"] == hash_block_data(data) and transaction in transactions
+
+
+class MiningTemplate:
+    """
+    Serialização canônica do bloco pré-computada para a mineração.
+    
+    O JSON usado em calculate_hash() tem as chaves ordenadas, então o nonce
+    é sempre o segundo campo ("index" < "nonce" < "previous_hash" < ...).
+    O template guarda os bytes antes (prefix) e depois (suffix) do nonce e
+    um estado SHA-256 já alimentado com o prefixo, reaproveitado via copy().
+    Cada tentativa só serializa o nonce e processa o sufixo.
+    """
+    
+    def __init__(self, prefix: bytes, suffix: bytes):
+        self.prefix = prefix
+        self.suffix = suffix
+        self._midstate = hashlib.sha256(prefix)
+    
+    def hash_nonce(self, nonce: int) -> str:
+        """Calcula o hash do bloco para o nonce dado (igual a calculate_hash())."""
+        h = self._midstate.copy()
+        h.update(str(nonce).encode())
+        h.update(self.suffix)
+        return h.hexdigest()
+
+
 @dataclass
 class Block:
     """
@@ -19,6 +110,16 @@ class Block:
     - nonce: valor para Proof of Work
     - timestamp: momento da criação
     - hash: hash do bloco atual (SHA-256)
+    
+    Campo opcional:
+    - merkle_root: raiz de Merkle das transações (ver merkle.py). Quando
+      preenchido, o hash cobre só o cabeçalho (com a raiz) em vez do JSON
+      de todas as transações, o que permite verificar o Proof of Work sem
+      as transações e propagar blocos compactos. Vazio é o formato legado,
+      o único que nós de outras equipes conhecem.
+    
+    Depois de seal() (bloco aceito na cadeia, portanto imutável) o JSON do
+    bloco fica em cache e to_json() não o serializa de novo.
     """
     index: int
     previous_hash: str
@@ -26,6 +127,8 @@ class Block:
     nonce: int = 0
     timestamp: float = field(default_factory=time.time)
     hash: str = ""
+    merkle_root: str = ""
+    _json: str | None = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Calcula hash se não fornecido."""
@@ -36,21 +139,61 @@ class Block:
         """
         Calcula o hash SHA-256 do bloco.
         
-        O hash é baseado em todos os campos do bloco exceto o próprio hash.
+        O hash é baseado em todos os campos do bloco exceto o próprio hash
+        (no formato Merkle, a raiz substitui as transações).
         """
         block_data = {
             "index": self.index,
             "previous_hash": self.previous_hash,
-            "transactions": [tx.to_dict() for tx in self.transactions],
             "nonce": self.nonce,
             "timestamp": self.timestamp,
         }
+        if self.merkle_root:
+            block_data["merkle_root"] = self.merkle_root
+        else:
+            block_data["transactions"] = [tx.to_dict() for tx in self.transactions]
         block_string = json.dumps(block_data, sort_keys=True)
         return hashlib.sha256(block_string.encode()).hexdigest()
     
+    def compute_merkle_root(self) -> str:
+        """Raiz de Merkle das transações atuais do bloco."""
+        return merkle_root([hash_transaction(tx.to_dict()) for tx in self.transactions])
+    
+    def verify_hash(self) -> bool:
+        """
+        Confere o hash do bloco e, no formato Merkle, se a raiz declarada
+        corresponde às transações.
+        """
+        if self.hash != self.calculate_hash():
+            return False
+        return not self.merkle_root or self.merkle_root == self.compute_merkle_root()
+    
+    def merkle_proof(self, position: int) -> list[dict[str, str]]:
+        """Prova de inclusão da transação na posição dada (ver merkle.merkle_proof)."""
+        return merkle_proof([hash_transaction(tx.to_dict()) for tx in self.transactions], position)
+    
+    def mining_template(self) -> MiningTemplate:
+        """
+        Gera o template de mineração do bloco (tudo exceto o nonce).
+        
+        Produz exatamente os mesmos bytes de calculate_hash(), separados
+        em torno do valor do nonce. No formato Merkle o sufixo não tem as
+        transações, então cada tentativa processa só o cabeçalho.
+        """
+        # Chaves ordenadas: "index" e "merkle_root" vêm antes de "nonce"
+        head = {"index": self.index}
+        rest = {"previous_hash": self.previous_hash, "timestamp": self.timestamp}
+        if self.merkle_root:
+            head["merkle_root"] = self.merkle_root
+        else:
+            rest["transactions"] = [tx.to_dict() for tx in self.transactions]
+        prefix = json.dumps(head, sort_keys=True)[:-1] + ', "nonce": '
+        suffix = ", " + json.dumps(rest, sort_keys=True)[1:]
+        return MiningTemplate(prefix.encode(), suffix.encode())
+    
     def to_dict(self) -> dict[str, Any]:
         """Converte bloco para dicionário (serialização JSON)."""
-        return {
+        data = {
             "index": self.index,
             "previous_hash": self.previous_hash,
             "transactions": [tx.to_dict() for tx in self.transactions],
@@ -58,6 +201,39 @@ class Block:
             "timestamp": self.timestamp,
             "hash": self.hash,
         }
+        if self.merkle_root:
+            data["merkle_root"] = self.merkle_root
+        return data
+    
+    def to_json(self) -> str:
+        """JSON de to_dict() (do cache, se o bloco já foi selado)."""
+        if self._json is not None:
+            return self._json
+        return json.dumps(self.to_dict())
+    
+    def seal(self):
+        """Guarda a serialização do bloco; ele não deve mais ser alterado."""
+        if self._json is None:
+            self._json = json.dumps(self.to_dict())
+    
+    def header(self) -> dict[str, Any]:
+        """Cabeçalho resumido do bloco (usado na sincronização incremental)."""
+        return {
+            "index": self.index,
+            "previous_hash": self.previous_hash,
+            "hash": self.hash,
+        }
+    
+    def compact_header(self) -> dict[str, Any]:
+        """Campos cobertos pelo hash de um bloco Merkle, mais o hash (bloco compacto)."""
+        return {
+            "index": self.index,
+            "previous_hash": self.previous_hash,
+            "merkle_root": self.merkle_root,
+            "nonce": self.nonce,
+            "timestamp": self.timestamp,
+            "hash": self.hash,
+        }
     
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "Block":
@@ -70,6 +246,7 @@ class Block:
             nonce=data["nonce"],
             timestamp=data["timestamp"],
             hash=data["hash"],
+            merkle_root=data.get("merkle_root", ""),
         )
     
     @classmethod
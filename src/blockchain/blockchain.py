@@ -1,8 +1,123 @@
-from typing import Any
+import contextlib
+import functools
+import json
+from enum import Enum
+from typing import Any, Callable, Iterator
 from collections import defaultdict
 
 from .block import Block
+from .concurrency import RWLock
+from .mempool import Mempool
+from .metrics import Metrics, NULL_METRICS
+from .store import BlockStore, LazyChain
 from .transaction import Transaction
+from .validation import ChainValidator
+
+
+# Buckets do histograma de profundidade das reorganizações (em blocos)
+REORG_DEPTH_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _reader(method):
+    """Executa o método com o lock de leitura da Blockchain."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _writer(method):
+    """Executa o método com o lock de escrita da Blockchain."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ChainSuffixBuilder:
+    """
+    Recebe uma cadeia remota bloco a bloco (ex: RESPONSE_CHAIN em streaming).
+    
+    Verifica o encadeamento e o Proof of Work à medida que os blocos chegam,
+    permitindo abortar cedo, e guarda apenas o sufixo que diverge da cadeia
+    local — o prefixo comum já foi validado por nós e é descartado. O hash
+    completo dos blocos do sufixo é verificado em Blockchain.apply_suffix.
+    
+    Com extend (ex: Blockchain.add_block), blocos que só estendem a ponta
+    local são aplicados assim que chegam (contados em appended), e só um
+    fork de verdade é guardado em suffix: num sync a frio a memória fica
+    em um bloco, não na cadeia inteira. A decisão de cada bloco (comum,
+    ponta ou fork) e o extend são feitos sob lock (ver
+    Blockchain.suffix_builder), para que vários streams simultâneos não
+    leiam a cadeia no meio de uma troca nem estendam a mesma ponta. Com probe, esses blocos só são
+    contados em appended e descartados: mede a cadeia remota sem guardá-la
+    nem alterar a local.
+    """
+    
+    def __init__(
+        self,
+        chain: list[Block],
+        difficulty: str,
+        extend: Callable[[Block], bool] | None = None,
+        probe: bool = False,
+        lock: Callable[[], contextlib.AbstractContextManager] = contextlib.nullcontext,
+    ):
+        self.chain = chain
+        self.difficulty = difficulty
+        self.extend = extend
+        self.probe = probe
+        self.lock = lock
+        self.height = 0
+        self.appended = 0
+        self.suffix: list[Block] = []
+        self._previous_hash = ""
+    
+    def add(self, block: Block) -> bool:
+        """Processa o próximo bloco; retorna False se a cadeia é inválida."""
+        if block.index != self.height:
+            return False
+        
+        if self.height == 0:
+            # Gênesis precisa ser o mesmo
+            if block.hash != self.chain[0].hash:
+                return False
+        elif block.previous_hash != self._previous_hash:
+            return False
+        elif not block.hash.startswith(self.difficulty):
+            return False
+        
+        with self.lock():
+            shared = (
+                not self.suffix
+                and block.index < len(self.chain)
+                and self.chain[block.index].hash == block.hash
+            )
+            if not shared:
+                # Na sondagem os blocos contados não entram na cadeia local
+                tip = len(self.chain) + (self.appended if self.probe else 0)
+                extends_tip = not self.suffix and block.index == tip
+                if extends_tip and self.probe:
+                    self.appended += 1
+                elif extends_tip and self.extend is not None and self.extend(block):
+                    self.appended += 1
+                else:
+                    self.suffix.append(block)
+        
+        self._previous_hash = block.hash
+        self.height += 1
+        return True
+
+
+class BlockStatus(Enum):
+    """Resultado de Blockchain.receive_block."""
+    EXTENDED = "extended"  # cadeia principal cresceu sem reverter blocos
+    REORG = "reorg"  # um ramo lateral mais longo virou a cadeia principal
+    SIDE = "side"  # guardado em um ramo lateral (não mais longo que o nosso)
+    ORPHAN = "orphan"  # pai desconhecido: guardado até o pai chegar
+    DUPLICATE = "duplicate"  # bloco já conhecido
+    REJECTED = "rejected"  # inválido ou em fork mais antigo que MAX_FORK_DEPTH
 
 
 class Blockchain:
@@ -14,42 +129,249 @@ class Blockchain:
     - Gerenciar pool de transações pendentes
     - Validar blocos e transações
     - Calcular saldos
+    
+    Os saldos são mantidos em um índice incremental (endereço -> saldo
+    confirmado), atualizado a cada bloco aplicado ou revertido. Os débitos
+    das transações pendentes ficam em um índice separado.
+    
+    Transações confirmadas são indexadas por id (id -> índice do bloco) e a
+    mempool (Mempool) é indexada por id, de modo que detecção de duplicatas,
+    confirmação e remoção são O(1). A mempool tem capacidade limitada
+    (despeja as transações de menor prioridade), expira transações antigas
+    e fornece ao minerador as de maior prioridade (select_for_block).
+    
+    Blocos são selados (JSON em cache) ao entrar na cadeia e o JSON da
+    mempool é guardado até ela mudar, então to_json() monta a cadeia a
+    partir de fragmentos prontos.
+    
+    Cadeias recebidas são validadas em lote (ChainValidator) e só a partir
+    do ponto em que divergem da nossa; com validation_workers > 1 os hashes
+    são verificados em paralelo.
+    
+    Blocos recebidos que não estendem a ponta (receive_block) ficam em uma
+    árvore de ramos laterais recentes, indexada por hash, e os que chegam
+    antes do pai ficam em um pool de órfãos. Quando um ramo fica mais longo
+    que a cadeia principal há uma reorganização: só os blocos divergentes
+    são revertidos e reaplicados, e as transações revertidas voltam para a
+    mempool.
+    
+    O estado é protegido por um RWLock: consultas (saldo, cadeia, mempool,
+    serialização) rodam em paralelo entre si e devolvem cópias, então nunca
+    veem um bloco aplicado pela metade; alterações são exclusivas. A
+    validação de cadeias recebidas roda fora do lock e a troca só é aplicada
+    se a cadeia local não mudou nesse meio tempo.
+    
+    Com um BlockStore os blocos são gravados em disco à medida que entram
+    na cadeia, e a cadeia é recarregada dele na criação (ver _load_from_store).
+    Nesse caso self.chain é uma LazyChain: só os blocos da ponta ficam em
+    memória e o histórico é decodificado do disco quando acessado.
     """
     
     DIFFICULTY = "000"  # Hash deve começar com 000
+    CHECKPOINT_INTERVAL = 100  # blocos entre checkpoints do BlockStore
+    MAX_FORK_DEPTH = 100  # profundidade máxima (a partir da ponta) de um fork
+    MAX_SIDE_BLOCKS = 500  # blocos guardados em ramos laterais
+    MAX_ORPHANS = 100  # blocos guardados à espera do pai
+    ITER_PAGE = 100  # blocos lidos por vez (sob o lock) em iter_blocks()
+    
+    def __init__(
+        self,
+        store: BlockStore | None = None,
+        validation_workers: int = 1,
+        mempool: Mempool | None = None,
+        metrics: Metrics = NULL_METRICS,
+    ):
+        self.chain: list[Block] | LazyChain = [Block.create_genesis()]
+        self.chain[0].seal()
+        
+        self._lock = RWLock()
+        
+        # Mempool: id -> transação, com capacidade e prioridade
+        self._mempool = mempool if mempool is not None else Mempool()
+        self._mempool_json: str | None = None  # cache, invalidado a cada mudança
+        self.mempool_version = 0  # incrementado a cada mudança (ex: refresh do template de mineração)
+        # Transações confirmadas: id -> índice do bloco
+        self._tx_index: dict[str, int] = {}
+        
+        # Índice de saldos confirmados e débitos pendentes por endereço
+        self._balances: defaultdict[str, float] = defaultdict(float)
+        self._pending_debits: defaultdict[str, float] = defaultdict(float)
+        self._pending_counts: defaultdict[str, int] = defaultdict(int)
+        
+        self.validator = ChainValidator(self.DIFFICULTY, validation_workers)
+        self.metrics = metrics
+        
+        # Ramos laterais recentes e órfãos: hash -> bloco, em ordem de chegada
+        self._side_blocks: dict[str, Block] = {}
+        self._orphans: dict[str, Block] = {}
+        
+        self.store = store
+        if store is not None:
+            self._load_from_store()
+    
+    @property
+    @_reader
+    def pending_transactions(self) -> list[Transaction]:
+        """Transações pendentes em ordem de chegada (cópia da mempool)."""
+        return list(self._mempool)
     
-    def __init__(self):
-        self.chain: list[Block] = [Block.create_genesis()]
-        self.pending_transactions: list[Transaction] = []
+    @pending_transactions.setter
+    @_writer
+    def pending_transactions(self, transactions: list[Transaction]):
+        """Substitui a mempool inteira (ex: desserialização)."""
+        self._mempool.clear()
+        for tx in transactions:
+            self._mempool.add(tx)
+        self._mempool_changed()
+        self._pending_debits.clear()
+        self._pending_counts.clear()
+        for tx in self._mempool:
+            self._add_pending_debit(tx)
+    
+    def _mempool_changed(self):
+        """Invalida o JSON em cache da mempool e avança sua versão."""
+        self._mempool_json = None
+        self.mempool_version += 1
+    
+    @_writer
+    def invalidate_mempool_cache(self):
+        """Descarta o JSON em cache da mempool; o próximo to_json() o recalcula."""
+        self._mempool_json = None
     
     @property
+    @_reader
+    def mempool_bytes(self) -> int:
+        """Tamanho (bytes de JSON) das transações pendentes."""
+        return self._mempool.nbytes
+    
+    @property
+    @_reader
     def last_block(self) -> Block:
         """Retorna o último bloco da cadeia."""
         return self.chain[-1]
     
+    @_reader
+    def tip(self) -> tuple[int, str]:
+        """Altura da cadeia e hash do último bloco, lidos juntos."""
+        return len(self.chain), self.chain[-1].hash
+    
+    @_reader
     def get_balance(self, address: str) -> float:
         """
         Calcula o saldo de um endereço.
         
-        Soma todas as transações recebidas e subtrai as enviadas.
+        Soma todas as transações recebidas e subtrai as enviadas, consultando
+        o índice de saldos (O(1), sem percorrer a cadeia).
         """
-        balance = 0.0
-        
-        for block in self.chain:
-            for tx in block.transactions:
-                if tx.destino == address:
-                    balance += tx.valor
-                if tx.origem == address:
-                    balance -= tx.valor
+        balance = self._balances.get(address, 0.0)
         
         # Considera também transações pendentes apenas para subtrair o saldo
         # (o dinheiro já saiu da conta, mas ainda não chegou no destino)
-        for tx in self.pending_transactions:
-            if tx.origem == address:
-                balance -= tx.valor
+        balance -= self._pending_debits.get(address, 0.0)
         
         return balance
     
+    @_reader
+    def get_transaction_block(self, tx_id: str) -> int | None:
+        """Retorna o índice do bloco que confirmou a transação, se houver."""
+        return self._tx_index.get(tx_id)
+    
+    @_reader
+    def locate_transaction(self, tx_id: str) -> tuple[Block, int] | None:
+        """Bloco que confirmou a transação e a posição dela no bloco, se houver."""
+        index = self._tx_index.get(tx_id)
+        if index is None:
+            return None
+        block = self.chain[index]
+        for position, tx in enumerate(block.transactions):
+            if tx.id == tx_id:
+                return block, position
+        return None
+    
+    @_reader
+    def get_account(self, address: str) -> dict[str, Any]:
+        """
+        Saldo confirmado e disponível (descontados os débitos pendentes) do
+        endereço, com a altura e o hash da ponta em que foram lidos.
+        """
+        confirmed = self._balances.get(address, 0.0)
+        return {
+            "address": address,
+            "confirmed": confirmed,
+            "balance": confirmed - self._pending_debits.get(address, 0.0),
+            "height": len(self.chain),
+            "tip": self.chain[-1].hash,
+        }
+    
+    @_reader
+    def has_transaction(self, tx_id: str) -> bool:
+        """Verifica se a transação está na mempool ou já foi confirmada."""
+        return tx_id in self._mempool or tx_id in self._tx_index
+    
+    @_reader
+    def get_pending_transaction(self, tx_id: str) -> Transaction | None:
+        """Transação pendente com o id dado, se estiver na mempool."""
+        return self._mempool.get(tx_id)
+    
+    @_reader
+    def match_pending_transactions(self, prefixes: set[str], length: int) -> dict[str, Transaction]:
+        """Transações pendentes cujo id começa com um dos prefixos (de tamanho length), por prefixo."""
+        return {tx.id[:length]: tx for tx in self._mempool if tx.id[:length] in prefixes}
+    
+    @_reader
+    def find_block(self, block_hash: str) -> Block | None:
+        """
+        Procura um bloco pelo hash entre os recentes da cadeia (até
+        MAX_FORK_DEPTH da ponta), os ramos laterais e os órfãos.
+        """
+        block = self._side_blocks.get(block_hash) or self._orphans.get(block_hash)
+        if block is not None:
+            return block
+        for index in range(len(self.chain) - 1, max(-1, len(self.chain) - 2 - self.MAX_FORK_DEPTH), -1):
+            if self.chain[index].hash == block_hash:
+                return self.chain[index]
+        return None
+    
+    def _apply_block(self, block: Block, sign: int = 1):
+        """
+        Aplica (sign=1) ou reverte (sign=-1) o efeito de um bloco
+        nos índices de saldo e de transações confirmadas.
+        """
+        for tx in block.transactions:
+            self._balances[tx.destino] += sign * tx.valor
+            self._balances[tx.origem] -= sign * tx.valor
+            if sign > 0:
+                self._tx_index[tx.id] = block.index
+            else:
+                self._tx_index.pop(tx.id, None)
+    
+    def _add_pending_debit(self, tx: Transaction):
+        """Registra o débito de uma transação que entrou na mempool."""
+        self._pending_debits[tx.origem] += tx.valor
+        self._pending_counts[tx.origem] += 1
+    
+    def _remove_pending_debit(self, tx: Transaction):
+        """Remove o débito de uma transação que saiu da mempool."""
+        self._pending_counts[tx.origem] -= 1
+        if self._pending_counts[tx.origem] <= 0:
+            # Sem pendentes: descarta a entrada (evita resíduo de ponto flutuante)
+            del self._pending_counts[tx.origem]
+            self._pending_debits.pop(tx.origem, None)
+        else:
+            self._pending_debits[tx.origem] -= tx.valor
+    
+    def _rebuild_indexes(self):
+        """Reconstrói os índices de saldo e de transações a partir da cadeia e da mempool."""
+        self._balances.clear()
+        self._tx_index.clear()
+        self._pending_debits.clear()
+        self._pending_counts.clear()
+        for block in self.chain:
+            self._apply_block(block)
+        for tx in self._mempool:
+            self._add_pending_debit(tx)
+    
+    @_writer
     def add_transaction(self, transaction: Transaction, trusted: bool = False) -> bool:
         """
         Adiciona uma transação ao pool de pendentes.
@@ -58,15 +380,40 @@ class Blockchain:
         - Valor positivo
         - Saldo suficiente na origem (pulado se trusted=True, ex: sync de peers)
         - Transação não duplicada
+        - Espaço na mempool (pode despejar transações de menor prioridade)
+        """
+        self.expire_transactions()
+        if not self._admit_transaction(transaction, trusted):
+            return False
+        self._mempool_changed()
+        return True
+    
+    @_writer
+    def add_transactions(self, transactions: list[Transaction], trusted: bool = False) -> list[Transaction]:
+        """
+        Adiciona um lote de transações ao pool de pendentes.
+        
+        Mesmas validações de add_transaction, feitas em uma passada sob um
+        único lock de escrita: cada transação aceita já conta nos débitos
+        pendentes das seguintes. A mempool é marcada como alterada uma vez
+        por lote. Retorna as transações aceitas, na ordem recebida.
         """
+        self.expire_transactions()
+        accepted = [tx for tx in transactions if self._admit_transaction(tx, trusted)]
+        if accepted:
+            self._mempool_changed()
+        # Uma transação do lote pode ter sido despejada por outra mais prioritária
+        return [tx for tx in accepted if tx.id in self._mempool]
+    
+    def _admit_transaction(self, transaction: Transaction, trusted: bool) -> bool:
+        """Valida a transação e a insere na mempool (sem invalidar o cache; ver add_transaction)."""
         # Verifica duplicata na mempool
-        if transaction in self.pending_transactions:
+        if transaction.id in self._mempool:
             return False
         
         # Verifica se já está confirmada em algum bloco
-        for block in self.chain:
-            if transaction in block.transactions:
-                return False
+        if transaction.id in self._tx_index:
+            return False
         
         # Verifica saldo (exceto para origem "genesis", "coinbase", ou sync de peer)
         if not trusted and transaction.origem not in ("genesis", "coinbase"):
@@ -74,9 +421,36 @@ class Blockchain:
             if balance < transaction.valor:
                 return False
         
-        self.pending_transactions.append(transaction)
+        accepted, evicted = self._mempool.add(transaction)
+        if not accepted:
+            self.metrics.inc("mempool_rejected_total")
+            return False
+        for tx in evicted:
+            self._remove_pending_debit(tx)
+        if evicted:
+            self.metrics.inc("mempool_evicted_total", len(evicted))
+        self.metrics.inc("transactions_accepted_total")
+        self._add_pending_debit(transaction)
         return True
     
+    @_writer
+    def expire_transactions(self) -> list[Transaction]:
+        """Remove da mempool as transações expiradas (ver Mempool.ttl)."""
+        expired = self._mempool.expire()
+        for tx in expired:
+            self._remove_pending_debit(tx)
+        if expired:
+            self._mempool_changed()
+            self.metrics.inc("mempool_expired_total", len(expired))
+        return expired
+    
+    @_writer
+    def select_for_block(self, max_txs: int) -> list[Transaction]:
+        """Transações pendentes de maior prioridade para um bloco (no máximo max_txs)."""
+        self.expire_transactions()
+        return self._mempool.select_for_block(max_txs)
+    
+    @_writer
     def add_block(self, block: Block) -> bool:
         """
         Adiciona um bloco à cadeia após validação.
@@ -92,12 +466,17 @@ class Blockchain:
         
         # Remove transações do bloco do pool de pendentes
         for tx in block.transactions:
-            if tx in self.pending_transactions:
-                self.pending_transactions.remove(tx)
+            if self._mempool.remove(tx.id) is not None:
+                self._remove_pending_debit(tx)
+                self._mempool_changed()
         
+        block.seal()
         self.chain.append(block)
+        self._apply_block(block)
+        self._persist_from(block.index)
         return True
     
+    @_reader
     def is_valid_block(self, block: Block) -> bool:
         """Valida um bloco antes de adicionar à cadeia."""
         # Verifica índice
@@ -112,12 +491,125 @@ class Blockchain:
         if not block.hash.startswith(self.DIFFICULTY):
             return False
         
-        # Verifica se hash está correto
-        if block.hash != block.calculate_hash():
+        # Verifica se hash (e a raiz de Merkle, se houver) está correto
+        if not block.verify_hash():
             return False
         
         return True
     
+    @_writer
+    def receive_block(self, block: Block) -> BlockStatus:
+        """
+        Processa um bloco recebido de um peer.
+        
+        Blocos que estendem a ponta entram na cadeia; os que apontam para
+        um bloco recente da cadeia ou de um ramo lateral entram na árvore de
+        ramos, e os de pai desconhecido vão para o pool de órfãos. Se o ramo
+        do bloco (incluindo órfãos que ele conectou) ficar mais longo que a
+        cadeia principal, ocorre a reorganização.
+        """
+        if block.index < len(self.chain) - self.MAX_FORK_DEPTH:
+            return BlockStatus.REJECTED
+        if self._is_known(block):
+            return BlockStatus.DUPLICATE
+        
+        # Verificações do próprio bloco (o encadeamento vem da árvore)
+        if not block.hash.startswith(self.DIFFICULTY):
+            return BlockStatus.REJECTED
+        if not block.verify_hash():
+            return BlockStatus.REJECTED
+        
+        parent_index = self._parent_index(block)
+        if parent_index is None:
+            self._orphans[block.hash] = block
+            if len(self._orphans) > self.MAX_ORPHANS:
+                del self._orphans[next(iter(self._orphans))]
+            return BlockStatus.ORPHAN
+        if block.index != parent_index + 1:
+            return BlockStatus.REJECTED
+        
+        self._side_blocks[block.hash] = block
+        tip = max(self._connect_orphans(block), key=lambda b: b.index)
+        
+        status = BlockStatus.SIDE
+        if tip.index >= len(self.chain):
+            status = self._reorganize(tip)
+        self._prune_side_blocks()
+        return status
+    
+    def _is_known(self, block: Block) -> bool:
+        """Verifica se o bloco já está na cadeia, em um ramo lateral ou nos órfãos."""
+        if block.hash in self._side_blocks or block.hash in self._orphans:
+            return True
+        return 0 <= block.index < len(self.chain) and self.chain[block.index].hash == block.hash
+    
+    def _parent_index(self, block: Block) -> int | None:
+        """Índice do pai do bloco na cadeia ou em um ramo lateral (None se desconhecido)."""
+        parent = self._side_blocks.get(block.previous_hash)
+        if parent is not None:
+            return parent.index
+        index = block.index - 1
+        if 0 <= index < len(self.chain) and self.chain[index].hash == block.previous_hash:
+            return index
+        return None
+    
+    def _connect_orphans(self, block: Block) -> list[Block]:
+        """Move para os ramos laterais os órfãos que descendem do bloco."""
+        connected = [block]
+        pending = [block]
+        while pending:
+            parent = pending.pop()
+            children = [
+                orphan for orphan in self._orphans.values()
+                if orphan.previous_hash == parent.hash
+            ]
+            for child in children:
+                del self._orphans[child.hash]
+                if child.index != parent.index + 1:
+                    continue
+                self._side_blocks[child.hash] = child
+                connected.append(child)
+                pending.append(child)
+        return connected
+    
+    def _reorganize(self, tip: Block) -> BlockStatus:
+        """
+        Torna principal o ramo lateral que termina em tip.
+        
+        Os blocos do ramo já foram verificados ao entrar na árvore; os
+        blocos principais revertidos passam a ser um ramo lateral.
+        """
+        branch = [tip]
+        while branch[-1].previous_hash in self._side_blocks:
+            branch.append(self._side_blocks[branch[-1].previous_hash])
+        branch.reverse()
+        
+        fork = branch[0].index
+        # O início do ramo pode ter sido descartado da árvore
+        if self._parent_index(branch[0]) != fork - 1:
+            return BlockStatus.SIDE
+        
+        for block in branch:
+            del self._side_blocks[block.hash]
+        rolled_back = self.chain[fork:]
+        for block in rolled_back:
+            self._side_blocks[block.hash] = block
+        
+        self._switch_branch(fork, branch)
+        if rolled_back:
+            self.metrics.inc("reorgs_total")
+            self.metrics.observe("reorg_depth", len(rolled_back), buckets=REORG_DEPTH_BUCKETS)
+        return BlockStatus.REORG if rolled_back else BlockStatus.EXTENDED
+    
+    def _prune_side_blocks(self):
+        """Descarta ramos e órfãos mais antigos que MAX_FORK_DEPTH e aplica os limites."""
+        horizon = len(self.chain) - self.MAX_FORK_DEPTH
+        for pool in (self._side_blocks, self._orphans):
+            for block_hash in [h for h, b in pool.items() if b.index < horizon]:
+                del pool[block_hash]
+        while len(self._side_blocks) > self.MAX_SIDE_BLOCKS:
+            del self._side_blocks[next(iter(self._side_blocks))]
+    
     def is_valid_chain(self, chain: list[Block] = None) -> bool:
         """
         Valida toda a cadeia de blocos.
@@ -128,7 +620,8 @@ class Blockchain:
         - Proof of Work de cada bloco
         """
         if chain is None:
-            chain = self.chain
+            with self._lock.read():
+                chain = self.chain[:]
         
         if not chain:
             return False
@@ -138,45 +631,245 @@ class Blockchain:
         if chain[0].hash != genesis.hash:
             return False
         
-        # Verifica cada bloco
-        for i in range(1, len(chain)):
-            current = chain[i]
-            previous = chain[i - 1]
-            
-            # Verifica encadeamento
-            if current.previous_hash != previous.hash:
+        # Encadeamento e PoW de todos os blocos, depois os hashes em lote
+        return self._validate(chain[0], chain[1:])
+    
+    def replace_chain(self, new_chain: list[Block]) -> bool:
+        """
+        Substitui a cadeia atual por uma nova (mais longa e válida).
+        
+        Usado para resolução de conflitos (cadeia mais longa vence).
+        """
+        with self._lock.read():
+            if len(new_chain) <= len(self.chain):
                 return False
             
-            # Verifica hash
-            if current.hash != current.calculate_hash():
-                return False
+            # Ponto de divergência: primeiro bloco que difere da cadeia atual
+            fork = 0
+            for ours, theirs in zip(self.chain, new_chain):
+                if ours.hash != theirs.hash:
+                    break
+                fork += 1
             
-            # Verifica Proof of Work
-            if not current.hash.startswith(self.DIFFICULTY):
+            # Gênesis diferente: cadeia incompatível
+            if fork == 0:
                 return False
+            previous = self.chain[fork - 1]
         
-        return True
+        # O prefixo comum já foi validado por nós: valida só os blocos novos
+        if not self._validate(previous, new_chain[fork:]):
+            return False
+        
+        return self._switch_if_unchanged(fork, previous, new_chain[fork:])
     
-    def replace_chain(self, new_chain: list[Block]) -> bool:
+    def apply_suffix(self, blocks: list[Block]) -> bool:
         """
-        Substitui a cadeia atual por uma nova (mais longa e válida).
+        Substitui a cadeia a partir de um ancestral comum (sync incremental).
         
-        Usado para resolução de conflitos (cadeia mais longa vence).
+        blocks[0] deve apontar para um bloco que já temos; apenas os blocos
+        novos são validados. A cadeia resultante precisa ser mais longa.
         """
-        if len(new_chain) <= len(self.chain):
+        if not blocks:
             return False
         
-        if not self.is_valid_chain(new_chain):
+        fork = blocks[0].index
+        with self._lock.read():
+            if fork < 1 or fork > len(self.chain):
+                return False
+            if fork + len(blocks) <= len(self.chain):
+                return False
+            previous = self.chain[fork - 1]
+        
+        if not self._validate(previous, blocks):
             return False
         
-        self.chain = new_chain
+        return self._switch_if_unchanged(fork, previous, blocks)
+    
+    @_writer
+    def _switch_if_unchanged(self, fork: int, previous: Block, blocks: list[Block]) -> bool:
+        """
+        Aplica a troca validada fora do lock, se ainda fizer sentido.
+        
+        A cadeia pode ter mudado durante a validação: o ancestral precisa
+        continuar no lugar e o resultado continuar mais longo.
+        """
+        if fork > len(self.chain) or self.chain[fork - 1].hash != previous.hash:
+            return False
+        if fork + len(blocks) <= len(self.chain):
+            return False
+        self._switch_branch(fork, blocks)
         return True
     
+    def _validate(self, previous: Block, blocks: list[Block]) -> bool:
+        """Valida blocks como continuação de previous (ChainValidator), medindo o tempo."""
+        with self.metrics.timer("chain_validation_seconds"):
+            return self.validator.validate(previous, blocks)
+    
+    def _switch_branch(self, fork: int, blocks: list[Block]):
+        """
+        Troca os blocos a partir do índice fork pelos blocos dados.
+        
+        Reverte apenas os blocos divergentes nos índices, aplica os novos
+        e remove da mempool as transações que passaram a estar confirmadas.
+        As transações dos blocos revertidos que não estão no novo ramo
+        voltam para a mempool (com a verificação de saldo de sempre).
+        """
+        rolled_back = self.chain[fork:]
+        for block in reversed(rolled_back):
+            self._apply_block(block, sign=-1)
+        for block in blocks:
+            self._apply_block(block)
+            for tx in block.transactions:
+                if self._mempool.remove(tx.id) is not None:
+                    self._remove_pending_debit(tx)
+                    self._mempool_changed()
+            block.seal()
+        
+        del self.chain[fork:]
+        self.chain.extend(blocks)
+        self._persist_from(fork)
+        
+        # Recompensas pertencem ao bloco revertido; duplicatas são recusadas
+        for block in rolled_back:
+            for tx in block.transactions:
+                if tx.origem != "coinbase":
+                    self.add_transaction(tx)
+    
+    def _load_from_store(self):
+        """
+        Recarrega a cadeia do BlockStore.
+        
+        Blocos até o checkpoint são aceitos sem decodificar nem recalcular
+        hashes e os índices de saldo/transações vêm do próprio checkpoint;
+        apenas os blocos gravados depois dele são validados e aplicados. O
+        primeiro bloco inválido trunca o armazenamento naquele ponto.
+        """
+        genesis = self.chain[0]
+        if len(self.store) == 0:
+            self.store.append(genesis)
+        if self.store.read(0).hash != genesis.hash:
+            raise ValueError(f"Gênesis em {self.store.directory} não confere")
+        
+        checkpoint = self.store.load_checkpoint()
+        trusted = 1
+        if checkpoint and self.store.read(checkpoint["height"] - 1).hash == checkpoint["tip"]:
+            trusted = checkpoint["height"]
+            self._balances.update(checkpoint["balances"])
+            self._tx_index.update(checkpoint["tx_index"])
+        
+        self.chain = LazyChain(self.store, trusted)
+        for index in range(trusted, len(self.store)):
+            block = self.store.read(index)
+            if not self.is_valid_block(block):
+                self.store.truncate(index)
+                break
+            block.seal()
+            self.chain.append(block)
+            self._apply_block(block)
+        self.chain.evict(len(self.store))
+    
+    def _persist_from(self, index: int):
+        """Grava no BlockStore os blocos a partir de index (trunca o que divergir)."""
+        if self.store is None:
+            return
+        self.store.truncate(index)
+        for block in self.chain[len(self.store):]:
+            self.store.append(block)
+        self.chain.evict(len(self.store))
+        if len(self.chain) - self.store.checkpoint_height >= self.CHECKPOINT_INTERVAL:
+            self.checkpoint()
+    
+    @_writer
+    def checkpoint(self):
+        """Grava um checkpoint da cadeia atual no BlockStore."""
+        if self.store is None:
+            return
+        self.store.save_checkpoint({
+            "height": len(self.chain),
+            "tip": self.last_block.hash,
+            "balances": dict(self._balances),
+            "tx_index": self._tx_index,
+        })
+    
+    @_writer
+    def close(self):
+        """Encerra o pool de validação, grava o checkpoint final e fecha o BlockStore."""
+        self.validator.shutdown()
+        if self.store is None:
+            return
+        self.checkpoint()
+        self.store.close()
+    
+    def suffix_builder(self, extend_tip: bool = False, probe: bool = False) -> ChainSuffixBuilder:
+        """
+        Cria um receptor incremental de cadeia remota (ver apply_suffix).
+        
+        Com extend_tip, blocos que estendem a ponta são adicionados na hora
+        (add_block) em vez de guardados no sufixo. Com probe, eles só são
+        contados (appended) e descartados: a cadeia local não muda.
+        """
+        extend = self.add_block if extend_tip and not probe else None
+        # Estender a ponta escreve: o bloco é decidido e aplicado sob o mesmo lock
+        lock = self._lock.write if extend else self._lock.read
+        return ChainSuffixBuilder(self.chain, self.DIFFICULTY, extend, probe, lock)
+    
+    @_reader
+    def get_headers(self, from_index: int, count: int) -> list[dict[str, Any]]:
+        """Retorna os cabeçalhos dos blocos [from_index, from_index + count)."""
+        return [block.header() for block in self.chain[max(0, from_index):from_index + count]]
+    
+    @_reader
+    def get_blocks(self, from_index: int, count: int) -> list[Block]:
+        """Retorna os blocos [from_index, from_index + count)."""
+        return self.chain[max(0, from_index):from_index + count]
+    
+    def iter_blocks(self, page_size: int = ITER_PAGE) -> Iterator[Block]:
+        """
+        Percorre a cadeia do gênesis até a altura do início da iteração.
+        
+        O lock de leitura é tomado só enquanto cada página de page_size
+        blocos é lida, e o histórico em disco não passa pelo cache, então
+        percorrer uma cadeia longa não bloqueia escritores nem ocupa memória
+        proporcional à cadeia. Se houver um reorg no meio, páginas
+        diferentes podem vir de ramos diferentes (uso: exibição).
+        """
+        height = self.tip()[0]
+        for start in range(0, height, page_size):
+            stop = min(start + page_size, height)
+            with self._lock.read():
+                if isinstance(self.chain, LazyChain):
+                    page = self.chain.uncached_slice(start, stop)
+                else:
+                    page = self.chain[start:stop]
+            yield from page
+    
+    @_reader
+    def get_blocks_json(self, from_index: int, count: int) -> list[str]:
+        """JSON (em cache) dos blocos [from_index, from_index + count)."""
+        from_index = max(0, from_index)
+        if isinstance(self.chain, LazyChain):
+            return self.chain.json_slice(from_index, from_index + count)
+        return [block.to_json() for block in self.chain[from_index:from_index + count]]
+    
+    @_reader
+    def to_json(self) -> str:
+        """
+        Mesmo conteúdo de to_dict() já serializado em JSON.
+        
+        Junta o JSON em cache de cada bloco (ou lido do disco) com o da
+        mempool, sem reconstruir dicionários.
+        """
+        if self._mempool_json is None:
+            self._mempool_json = json.dumps([tx.to_dict() for tx in self._mempool])
+        chain = ", ".join(self.get_blocks_json(0, len(self.chain)))
+        return '{"chain": [' + chain + '], "pending_transactions": ' + self._mempool_json + "}"
+    
+    @_reader
     def to_dict(self) -> dict[str, Any]:
         """Converte blockchain para dicionário (serialização JSON)."""
         return {
             "chain": [block.to_dict() for block in self.chain],
-            "pending_transactions": [tx.to_dict() for tx in self.pending_transactions],
+            "pending_transactions": [tx.to_dict() for tx in self._mempool],
         }
     
     @classmethod
@@ -184,7 +877,10 @@ class Blockchain:
         """Cria blockchain a partir de dicionário."""
         blockchain = cls()
         blockchain.chain = [Block.from_dict(b) for b in data["chain"]]
+        for block in blockchain.chain:
+            block.seal()
         blockchain.pending_transactions = [
             Transaction.from_dict(tx) for tx in data["pending_transactions"]
         ]
+        blockchain._rebuild_indexes()
         return blockchain
@@ -0,0 +1,135 @@
+import threading
+from collections.abc import Iterable, Iterator, Set
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Lock de leitores e escritor, com preferência para o escritor.
+
+    Vários leitores podem segurar o lock ao mesmo tempo; o escritor é
+    exclusivo. Assim que um escritor espera, novos leitores aguardam, para
+    que uma sequência de leituras não atrase a ingestão de blocos e
+    transações indefinidamente.
+
+    É reentrante: o escritor pode ler e escrever de novo, e um leitor pode
+    ler de novo (mesmo com um escritor esperando). Promover uma leitura a
+    escrita não é suportado e gera RuntimeError, em vez de travar.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: int | None = None  # ident da thread escritora
+        self._writer_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()  # profundidade de leitura por thread
+
+    def acquire_read(self):
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            # Leituras dentro de uma escrita não contam como leitores
+            self._local.counted = self._writer != threading.get_ident()
+            if self._local.counted:
+                with self._cond:
+                    while self._writer is not None or self._writers_waiting:
+                        self._cond.wait()
+                    self._readers += 1
+        self._local.depth = depth + 1
+
+    def release_read(self):
+        self._local.depth -= 1
+        if self._local.depth == 0 and self._local.counted:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if getattr(self._local, "depth", 0):
+            raise RuntimeError("Promoção de leitura para escrita não é suportada")
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        self._writer_depth -= 1
+        if self._writer_depth == 0:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class PeerSet(Set):
+    """
+    Conjunto de peers com cópia na escrita.
+
+    O conteúdo é um frozenset substituído a cada alteração (sob um lock só
+    de escritores); leitores iteram o frozenset da vez sem lock e nunca
+    veem "set changed size during iteration". As alterações são raras
+    (descoberta de peers), então copiar o conjunto é barato.
+    """
+
+    def __init__(self, peers: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._peers = frozenset(peers)
+
+    @classmethod
+    def _from_iterable(cls, iterable: Iterable[str]) -> frozenset:
+        return frozenset(iterable)
+
+    def __contains__(self, peer: object) -> bool:
+        return peer in self._peers
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._peers)
+
+    def __len__(self) -> int:
+        return len(self._peers)
+
+    def __repr__(self) -> str:
+        return f"PeerSet({set(self._peers)!r})"
+
+    def snapshot(self) -> frozenset[str]:
+        """Conteúdo atual (imutável)."""
+        return self._peers
+
+    def add(self, peer: str):
+        with self._lock:
+            if peer not in self._peers:
+                self._peers = self._peers | {peer}
+
+    def update(self, peers: Iterable[str]):
+        with self._lock:
+            self._peers = self._peers.union(peers)
+
+    def discard(self, peer: str):
+        with self._lock:
+            if peer in self._peers:
+                self._peers = self._peers - {peer}
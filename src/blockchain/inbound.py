@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable
+
+from .protocol import MessageType
+
+
+# Prioridades do tratamento de mensagens recebidas (menor = atendida antes)
+PRIORITY_CHAIN = 0  # blocos e pedidos de cadeia
+PRIORITY_CONTROL = 1  # handshake, descoberta, inventário, métricas
+PRIORITY_TX = 2  # transações
+PRIORITIES = (PRIORITY_CHAIN, PRIORITY_CONTROL, PRIORITY_TX)
+
+MESSAGE_PRIORITY = {
+    MessageType.NEW_BLOCK: PRIORITY_CHAIN,
+    MessageType.REQUEST_CHAIN: PRIORITY_CHAIN,
+    MessageType.RESPONSE_CHAIN: PRIORITY_CHAIN,
+    MessageType.REQUEST_HEADERS: PRIORITY_CHAIN,
+    MessageType.REQUEST_BLOCKS: PRIORITY_CHAIN,
+    MessageType.COMPACT_BLOCK: PRIORITY_CHAIN,
+    MessageType.GET_BLOCK_TXS: PRIORITY_CHAIN,
+    MessageType.NEW_TRANSACTION: PRIORITY_TX,
+    MessageType.NEW_TRANSACTIONS: PRIORITY_TX,
+    MessageType.REQUEST_MEMPOOL: PRIORITY_TX,
+}
+
+
+def message_priority(message_type: MessageType) -> int:
+    """Prioridade de tratamento do tipo de mensagem (PRIORITY_CONTROL se não listado)."""
+    return MESSAGE_PRIORITY.get(message_type, PRIORITY_CONTROL)
+
+
+class InboundPool:
+    """
+    Pool limitado de threads para o tratamento das mensagens recebidas.
+
+    Cada prioridade tem sua fila, limitada a queue_size tarefas; os workers
+    sempre atendem primeiro a fila de maior prioridade não vazia, então uma
+    enxurrada de transações não atrasa blocos e pedidos de cadeia. Com a
+    fila cheia submit() recusa a tarefa (retorna None) em vez de acumular:
+    quem chamou responde BUSY ao peer.
+
+    As threads são criadas na primeira tarefa, como no ThreadPoolExecutor.
+    """
+
+    def __init__(self, workers: int, queue_size: int, name: str = "inbound"):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queues: list[deque] = [deque() for _ in PRIORITIES]
+        self._cond = threading.Condition()
+        self._running = True
+        self._name = name
+        self._threads: list[threading.Thread] = []
+
+    def submit(self, priority: int, fn: Callable, *args) -> Future | None:
+        """Enfileira fn(*args); retorna o Future do resultado ou None se a fila está cheia."""
+        future = Future()
+        with self._cond:
+            queue = self._queues[priority]
+            if not self._running or len(queue) >= self.queue_size:
+                return None
+            queue.append((future, fn, args))
+            if not self._threads:
+                self._start_workers()
+            self._cond.notify()
+        return future
+
+    def _start_workers(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self._name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def pending(self) -> int:
+        """Tarefas na fila (ainda não iniciadas)."""
+        with self._cond:
+            return sum(len(queue) for queue in self._queues)
+
+    def _next_task(self):
+        with self._cond:
+            while self._running:
+                for queue in self._queues:
+                    if queue:
+                        return queue.popleft()
+                self._cond.wait()
+            return None
+
+    def _work(self):
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            future, fn, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self):
+        """Para os workers e cancela as tarefas que ainda estão na fila."""
+        with self._cond:
+            self._running = False
+            pending = [task for queue in self._queues for task in queue]
+            for queue in self._queues:
+                queue.clear()
+            self._cond.notify_all()
+        for future, _, _ in pending:
+            future.cancel()
+
+
+class RateLimiter:
+    """
+    Limite de mensagens por peer (token bucket).
+
+    Cada peer acumula até burst fichas, repostas a rate por segundo, e cada
+    mensagem consome uma. Guarda no máximo max_peers baldes; passando
+    disso, o mais antigo é descartado (o peer recomeça com o balde cheio).
+    """
+
+    MAX_PEERS = 10000
+
+    def __init__(self, rate: float, burst: float | None = None, max_peers: int = MAX_PEERS):
+        self.rate = rate
+        self.burst = burst if burst is not None else 2 * rate
+        self.max_peers = max_peers
+        self._buckets: dict[str, tuple[float, float]] = {}  # peer -> (fichas, instante)
+        self._lock = threading.Lock()
+
+    def allow(self, peer: str) -> bool:
+        """Consome uma ficha do peer; retorna False se ele passou do limite."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(peer, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[peer] = (tokens, now)
+            if len(self._buckets) > self.max_peers:
+                del self._buckets[next(iter(self._buckets))]
+            return allowed
@@ -0,0 +1,162 @@
+import heapq
+import json
+import time
+from dataclasses import dataclass
+from itertools import count
+
+from .transaction import Transaction
+
+
+@dataclass(slots=True)
+class _Entry:
+    """Transação na mempool com os metadados de capacidade e expiração."""
+    tx: Transaction
+    arrived: float  # time.monotonic() da chegada
+    size: int  # bytes do JSON da transação
+    seq: int  # identifica a entrada válida no heap
+
+
+class Mempool:
+    """
+    Pool de transações pendentes com capacidade limitada.
+    
+    As transações ficam em um dicionário id -> entrada, em ordem de chegada
+    (usada pela expiração e por pending_transactions), e em um heap de
+    mínimo por prioridade, usado para despejar a de menor prioridade em
+    O(log n) quando a mempool passa de max_count transações ou max_bytes
+    bytes. Uma transação de prioridade menor que todas as presentes é
+    recusada com a mempool cheia.
+    
+    A prioridade é o valor transferido e, em empate, a mais antiga. Entradas
+    removidas continuam no heap e são descartadas quando chegam ao topo
+    (remoção preguiçosa); o heap é reconstruído se acumular muitas.
+    
+    Transações com mais de ttl segundos na mempool expiram (expire()).
+    """
+    
+    MAX_COUNT = 5000  # transações
+    MAX_BYTES = 2_000_000  # bytes de JSON
+    TTL = 3600.0  # segundos
+    
+    def __init__(self, max_count: int = MAX_COUNT, max_bytes: int = MAX_BYTES, ttl: float = TTL):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.nbytes = 0
+        
+        self._entries: dict[str, _Entry] = {}
+        self._heap: list[tuple[tuple[float, float], int, str]] = []
+        self._seq = count()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, tx_id: str) -> bool:
+        return tx_id in self._entries
+    
+    def __iter__(self):
+        """Transações em ordem de chegada."""
+        return (entry.tx for entry in self._entries.values())
+    
+    @staticmethod
+    def priority(tx: Transaction) -> tuple[float, float]:
+        """Prioridade da transação (maior = minerada antes, despejada por último)."""
+        return tx.valor, -tx.timestamp
+    
+    def add(self, tx: Transaction) -> tuple[bool, list[Transaction]]:
+        """
+        Adiciona uma transação, despejando as de menor prioridade se preciso.
+        
+        Retorna (aceita, despejadas). Se a transação não cabe nem despejando
+        apenas transações de prioridade menor, nada é despejado.
+        """
+        if tx.id in self._entries:
+            return False, []
+        
+        size = len(json.dumps(tx.to_dict()))
+        if size > self.max_bytes:
+            return False, []
+        
+        priority = self.priority(tx)
+        popped = []  # itens retirados do heap, devolvidos se a transação não couber
+        evicted: list[_Entry] = []
+        count_after = len(self._entries) + 1
+        bytes_after = self.nbytes + size
+        while count_after > self.max_count or bytes_after > self.max_bytes:
+            lowest = self._peek()
+            if lowest is None or self.priority(lowest.tx) >= priority:
+                for item in popped:
+                    heapq.heappush(self._heap, item)
+                return False, []
+            popped.append(heapq.heappop(self._heap))
+            evicted.append(lowest)
+            count_after -= 1
+            bytes_after -= lowest.size
+        
+        for entry in evicted:
+            self._remove_entry(entry.tx.id)
+        self._insert(_Entry(tx, time.monotonic(), size, 0))
+        return True, [entry.tx for entry in evicted]
+    
+    def get(self, tx_id: str) -> Transaction | None:
+        entry = self._entries.get(tx_id)
+        return entry.tx if entry is not None else None
+    
+    def remove(self, tx_id: str) -> Transaction | None:
+        """Remove a transação (ex: confirmada em um bloco); retorna-a se estava presente."""
+        entry = self._remove_entry(tx_id)
+        return entry.tx if entry is not None else None
+    
+    def expire(self, now: float | None = None) -> list[Transaction]:
+        """Remove e retorna as transações com mais de ttl segundos na mempool."""
+        if now is None:
+            now = time.monotonic()
+        expired = []
+        # Ordem de chegada: as mais antigas estão no início
+        for tx_id, entry in self._entries.items():
+            if now - entry.arrived <= self.ttl:
+                break
+            expired.append(tx_id)
+        return [self._remove_entry(tx_id).tx for tx_id in expired]
+    
+    def select_for_block(self, max_txs: int) -> list[Transaction]:
+        """As max_txs transações de maior prioridade, em ordem de prioridade."""
+        entries = heapq.nlargest(max_txs, self._entries.values(), key=lambda e: self.priority(e.tx))
+        return [entry.tx for entry in entries]
+    
+    def clear(self):
+        self._entries.clear()
+        self._heap.clear()
+        self.nbytes = 0
+    
+    def _insert(self, entry: _Entry):
+        entry.seq = next(self._seq)
+        self._entries[entry.tx.id] = entry
+        self.nbytes += entry.size
+        heapq.heappush(self._heap, (self.priority(entry.tx), entry.seq, entry.tx.id))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._compact()
+    
+    def _remove_entry(self, tx_id: str) -> _Entry | None:
+        entry = self._entries.pop(tx_id, None)
+        if entry is not None:
+            self.nbytes -= entry.size
+        return entry
+    
+    def _peek(self) -> _Entry | None:
+        """Entrada válida de menor prioridade (descarta as removidas do topo)."""
+        while self._heap:
+            _, seq, tx_id = self._heap[0]
+            entry = self._entries.get(tx_id)
+            if entry is not None and entry.seq == seq:
+                return entry
+            heapq.heappop(self._heap)
+        return None
+    
+    def _compact(self):
+        """Reconstrói o heap só com as entradas válidas."""
+        self._heap = [
+            (self.priority(entry.tx), entry.seq, tx_id)
+            for tx_id, entry in self._entries.items()
+        ]
+        heapq.heapify(self._heap)
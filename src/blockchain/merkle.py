@@ -0,0 +1,86 @@
+import hashlib
+import json
+from typing import Any
+
+
+# Prefixos que separam folhas de nós internos (uma folha nunca pode se
+# passar por um nó interno, e vice-versa)
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def hash_transaction(tx_dict: dict[str, Any]) -> str:
+    """
+    Folha da árvore: SHA-256 do JSON canônico da transação (to_dict()).
+
+    O id da transação é um UUID e não identifica o conteúdo, então a folha
+    é o hash da transação inteira.
+    """
+    data = json.dumps(tx_dict, sort_keys=True).encode()
+    return hashlib.sha256(LEAF_PREFIX + data).hexdigest()
+
+
+def _hash_pair(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _next_level(level: list[bytes]) -> list[bytes]:
+    paired = [_hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        paired.append(level[-1])
+    return paired
+
+
+def merkle_root(leaves: list[str]) -> str:
+    """
+    Raiz da árvore de Merkle das folhas (hex) dadas, em ordem.
+
+    Em um nível de tamanho ímpar o último nó sobe sem par (não é
+    duplicado, para que listas diferentes não tenham a mesma raiz).
+    Sem folhas, a raiz é o SHA-256 de vazio.
+    """
+    if not leaves:
+        return hashlib.sha256(b"").hexdigest()
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+
+def merkle_proof(leaves: list[str], index: int) -> list[dict[str, str]]:
+    """
+    Prova de inclusão da folha na posição index: os irmãos no caminho até
+    a raiz, da folha para cima, como {"hash": hex, "side": "left"|"right"}.
+
+    Um nó que sobe sem par não gera passo, então a prova tem no máximo
+    ceil(log2(len(leaves))) passos.
+    """
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"Folha {index} fora da árvore ({len(leaves)} folhas)")
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    proof = []
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            side = "left" if sibling < index else "right"
+            proof.append({"hash": level[sibling].hex(), "side": side})
+        level = _next_level(level)
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: list[dict[str, str]], root: str) -> bool:
+    """Confere se a folha (hex) leva à raiz pelos passos da prova (ver merkle_proof)."""
+    try:
+        node = bytes.fromhex(leaf)
+        for step in proof:
+            sibling = bytes.fromhex(step["hash"])
+            if step["side"] == "left":
+                node = _hash_pair(sibling, node)
+            elif step["side"] == "right":
+                node = _hash_pair(node, sibling)
+            else:
+                return False
+    except (KeyError, TypeError, ValueError):
+        return False
+    return node.hex() == root
@@ -0,0 +1,253 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+
+# Limites (em segundos) dos buckets padrão dos histogramas
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_NULL_TIMER = nullcontext()
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels_key(labels: dict[str, str] | None) -> Labels:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    """Contagem por bucket cumulativo, soma e total de observações."""
+    
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self) -> list[int]:
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Metrics:
+    """
+    Registro leve de métricas: contadores, gauges e histogramas com labels.
+    
+    Desabilitado (enabled=False) todos os métodos retornam imediatamente e
+    timer() devolve um contexto nulo compartilhado, então a instrumentação
+    nos caminhos quentes custa só a chamada. Valores que já existem em outro
+    lugar (ex: tamanho da mempool, hashrate) são registrados como funções
+    (gauge_fn) e lidos apenas na coleta, sem custo nos caminhos quentes.
+    
+    snapshot() devolve as métricas como dicionário (mensagem GET_METRICS) e
+    to_prometheus() no formato texto do Prometheus (MetricsServer).
+    """
+    
+    def __init__(self, enabled: bool = True, prefix: str = "blockchain_"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._gauges: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, _Histogram]] = {}
+        self._gauge_fns: dict[str, Callable[[], float]] = {}
+        self._help: dict[str, str] = {}
+    
+    def describe(self, name: str, text: str):
+        """Texto de ajuda (# HELP) da métrica."""
+        self._help[name] = text
+    
+    def inc(self, name: str, value: float = 1.0, labels: dict[str, str] | None = None):
+        """Incrementa um contador."""
+        if not self.enabled:
+            return
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+    
+    def set(self, name: str, value: float, labels: dict[str, str] | None = None):
+        """Define o valor de um gauge."""
+        if not self.enabled:
+            return
+        key = _labels_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+    
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: dict[str, str] | None = None,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        """Registra uma observação em um histograma."""
+        if not self.enabled:
+            return
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+    
+    def timer(self, name: str, labels: dict[str, str] | None = None):
+        """Contexto que observa a duração (s) do bloco em um histograma."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timed(name, labels)
+    
+    @contextmanager
+    def _timed(self, name: str, labels: dict[str, str] | None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+    
+    def gauge_fn(self, name: str, fn: Callable[[], float]):
+        """Registra um gauge calculado na coleta."""
+        self._gauge_fns[name] = fn
+    
+    def _collect_gauges(self) -> dict[str, dict[Labels, float]]:
+        with self._lock:
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+        for name, fn in self._gauge_fns.items():
+            try:
+                gauges[name] = {(): float(fn())}
+            except Exception:
+                continue
+        return gauges
+    
+    def snapshot(self) -> dict[str, Any]:
+        """Métricas atuais como dicionário serializável em JSON."""
+        if not self.enabled:
+            return {"enabled": False}
+        
+        def series(values: dict[Labels, Any], convert) -> list[dict[str, Any]]:
+            return [{"labels": dict(key), **convert(value)} for key, value in values.items()]
+        
+        gauges = self._collect_gauges()
+        with self._lock:
+            return {
+                "enabled": True,
+                "counters": {
+                    name: series(values, lambda v: {"value": v})
+                    for name, values in self._counters.items()
+                },
+                "gauges": {
+                    name: series(values, lambda v: {"value": v})
+                    for name, values in gauges.items()
+                },
+                "histograms": {
+                    name: series(values, lambda h: {
+                        "count": h.count,
+                        "sum": h.sum,
+                        "buckets": dict(zip([*map(str, h.buckets), "+Inf"], h.cumulative())),
+                    })
+                    for name, values in self._histograms.items()
+                },
+            }
+    
+    def to_prometheus(self) -> str:
+        """Métricas atuais no formato texto do Prometheus."""
+        gauges = self._collect_gauges()
+        lines = []
+        
+        def header(name: str, kind: str) -> str:
+            full = self.prefix + name
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+        
+        with self._lock:
+            for name, values in self._counters.items():
+                full = header(name, "counter")
+                for labels, value in values.items():
+                    lines.append(f"{full}{_format_labels(labels)} {value}")
+            for name, values in gauges.items():
+                full = header(name, "gauge")
+                for labels, value in values.items():
+                    lines.append(f"{full}{_format_labels(labels)} {value}")
+            for name, values in self._histograms.items():
+                full = header(name, "histogram")
+                for labels, histogram in values.items():
+                    bounds = [*map(str, histogram.buckets), "+Inf"]
+                    for bound, count in zip(bounds, histogram.cumulative()):
+                        le = f'le="{bound}"'
+                        lines.append(f"{full}_bucket{_format_labels(labels, le)} {count}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro desabilitado usado quando nenhum é fornecido
+NULL_METRICS = Metrics(enabled=False)
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP local (GET /metrics) com as métricas no formato Prometheus.
+    
+    Roda em uma thread própria; escuta em 127.0.0.1 por padrão, já que as
+    métricas não são autenticadas.
+    """
+    
+    def __init__(self, metrics: Metrics, port: int, host: str = "127.0.0.1"):
+        self.metrics = metrics
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] not in ("/metrics", "/"):
+                    handler.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+            
+            def log_message(handler, format, *args):
+                pass  # sem log por requisição
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread: threading.Thread | None = None
+    
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="metrics-http",
+            daemon=True,
+        )
+        self._thread.start()
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -1,44 +1,162 @@
 import time
+import threading
+import multiprocessing
+from collections import deque
 from typing import Callable
 
-from .block import Block
+from .block import Block, MiningTemplate
 from .blockchain import Blockchain
+from .metrics import Metrics, NULL_METRICS
 from .transaction import Transaction
 
 
+# Geração de cancelamento compartilhada com os workers (definida no initializer).
+_cancel_generation = None
+
+# Intervalo (em nonces) entre verificações de cancelamento dentro do worker.
+CANCEL_CHECK_INTERVAL = 1000
+
+
+def _init_worker(generation):
+    """Initializer dos processos do pool: guarda o contador de cancelamento."""
+    global _cancel_generation
+    _cancel_generation = generation
+
+
+def _search_range(
+    prefix: bytes,
+    suffix: bytes,
+    start: int,
+    count: int,
+    difficulty: str,
+    generation: int,
+) -> tuple[int, str] | None:
+    """
+    Procura, em ordem crescente, um nonce válido no intervalo [start, start + count).
+    
+    Retorna (nonce, hash) do primeiro nonce válido, ou None se o intervalo
+    foi esgotado ou a busca foi cancelada (geração mudou).
+    O template é reconstruído no worker (o midstate SHA-256 não é serializável).
+    """
+    template = MiningTemplate(prefix, suffix)
+    for nonce in range(start, start + count):
+        if nonce % CANCEL_CHECK_INTERVAL == 0 and _cancel_generation.value != generation:
+            return None
+        block_hash = template.hash_nonce(nonce)
+        if block_hash.startswith(difficulty):
+            return nonce, block_hash
+    return None
+
+
 class Miner:
     """
     Implementa o algoritmo de Proof of Work.
     
     O minerador deve encontrar um nonce tal que o hash do bloco
     comece com a dificuldade especificada (ex: "000").
+    
+    Com workers > 1 o espaço de nonces é dividido em intervalos distribuídos
+    entre um pool de processos. Os intervalos são consumidos em ordem, então
+    o nonce encontrado é sempre o menor válido — o mesmo bloco que a busca
+    sequencial produziria.
+    
+    Com merkle_blocks=True os blocos são montados no formato Merkle (ver
+    Block.merkle_root): o hash cobre só o cabeçalho, então cada tentativa
+    é mais barata e os blocos podem ser propagados compactos. Nós de outras
+    equipes só validam o formato legado (padrão).
     """
     
-    def __init__(self, blockchain: Blockchain, miner_address: str):
+    CHUNK_SIZE = 20000  # Nonces por tarefa enviada ao pool
+    PROGRESS_INTERVAL = 10000  # Nonces entre progresso/refresh na busca sequencial
+    MAX_BLOCK_TXS = 500  # Transações da mempool por bloco (além da coinbase)
+    
+    def __init__(
+        self,
+        blockchain: Blockchain,
+        miner_address: str,
+        workers: int = 1,
+        metrics: Metrics = NULL_METRICS,
+        merkle_blocks: bool = False,
+    ):
         self.blockchain = blockchain
         self.miner_address = miner_address
+        self.workers = max(1, workers)
+        self.merkle_blocks = merkle_blocks
+        self.metrics = metrics
         self.mining = False
+        self.hashes = 0  # total de hashes calculados (medição de hashrate)
+        
+        self._pool = None
+        self._generation = None
     
     def mine_block(
         self,
         transactions: list[Transaction] = None,
         on_progress: Callable[[int], None] = None,
+        refresh: Callable[[], bool] = None,
     ) -> Block | None:
         """
         Minera um novo bloco com as transações pendentes.
         
         Args:
-            transactions: Lista de transações (usa pendentes se None)
+            transactions: Lista de transações (usa as de maior prioridade da
+                mempool se None, no máximo MAX_BLOCK_TXS)
             on_progress: Callback para reportar progresso (nonce atual)
+            refresh: Consultado periodicamente; se retornar True a busca é
+                abandonada (ex: a ponta ou a mempool mudaram)
         
         Returns:
             Bloco minerado ou None se interrompido
         """
-        if transactions is None:
-            transactions = self.blockchain.pending_transactions.copy()
-        
+        block = self.build_candidate(transactions)
         self.mining = True
         
+        try:
+            with self.metrics.timer("mining_seconds"):
+                if self.workers > 1:
+                    found = self._mine_parallel(block, on_progress, refresh)
+                else:
+                    found = self._mine_sequential(block, on_progress, refresh)
+        finally:
+            # Encontrado, interrompido ou abandonado pelo refresh: a busca acabou
+            self.mining = False
+        self.metrics.inc("mining_rounds_total", labels={"result": "found" if found else "interrupted"})
+        return found
+    
+    def _mine_sequential(
+        self,
+        block: Block,
+        on_progress: Callable[[int], None] = None,
+        refresh: Callable[[], bool] = None,
+    ) -> Block | None:
+        """Busca sequencial do nonce, a partir de block.nonce."""
+        # Proof of Work: encontra nonce válido.
+        # O template evita reserializar o bloco inteiro a cada tentativa.
+        template = block.mining_template()
+        while self.mining:
+            block.hash = template.hash_nonce(block.nonce)
+            
+            if block.is_valid_hash(Blockchain.DIFFICULTY):
+                self.hashes += block.nonce % self.PROGRESS_INTERVAL + 1
+                return block
+            
+            block.nonce += 1
+            
+            # Reporta progresso e verifica refresh a cada PROGRESS_INTERVAL tentativas
+            if block.nonce % self.PROGRESS_INTERVAL == 0:
+                self.hashes += self.PROGRESS_INTERVAL
+                if on_progress:
+                    on_progress(block.nonce)
+                if refresh and refresh():
+                    return None
+        
+        return None
+    
+    def build_candidate(self, transactions: list[Transaction] = None) -> Block:
+        """Monta o bloco candidato sobre a ponta atual (coinbase + transações)."""
+        if transactions is None:
+            transactions = self.blockchain.select_for_block(self.MAX_BLOCK_TXS)
+        
         # Timestamp compartilhado entre o bloco e a coinbase
         block_timestamp = time.time()
         
@@ -51,31 +169,201 @@ class Miner:
         )
         transactions.insert(0, reward_tx)
         
-        # Cria bloco candidato
+        # Cria bloco candidato sobre a ponta (altura e hash lidos juntos)
+        height, tip_hash = self.blockchain.tip()
         block = Block(
-            index=len(self.blockchain.chain),
-            previous_hash=self.blockchain.last_block.hash,
+            index=height,
+            previous_hash=tip_hash,
             transactions=transactions,
             nonce=0,
             timestamp=block_timestamp,
         )
-        
-        # Proof of Work: encontra nonce válido
-        while self.mining:
+        if self.merkle_blocks:
+            block.merkle_root = block.compute_merkle_root()
             block.hash = block.calculate_hash()
-            
-            if block.is_valid_hash(Blockchain.DIFFICULTY):
-                self.mining = False
-                return block
-            
-            block.nonce += 1
-            
-            # Reporta progresso a cada 10000 tentativas
-            if on_progress and block.nonce % 10000 == 0:
-                on_progress(block.nonce)
+        return block
+    
+    def _mine_parallel(
+        self,
+        block: Block,
+        on_progress: Callable[[int], None] = None,
+        refresh: Callable[[], bool] = None,
+    ) -> Block | None:
+        """
+        Proof of Work distribuído entre o pool de processos.
+        
+        Mantém uma janela limitada de intervalos em andamento e consome os
+        resultados na ordem dos intervalos, garantindo o menor nonce válido.
+        """
+        pool = self._get_pool()
+        template = block.mining_template()
+        generation = self._generation.value
+        pending = deque()
+        next_start = 0
+        
+        try:
+            while self.mining:
+                # Mantém os workers ocupados sem enfileirar tarefas sem limite
+                while len(pending) < self.workers * 2:
+                    pending.append(pool.apply_async(
+                        _search_range,
+                        (
+                            template.prefix,
+                            template.suffix,
+                            next_start,
+                            self.CHUNK_SIZE,
+                            Blockchain.DIFFICULTY,
+                            generation,
+                        ),
+                    ))
+                    next_start += self.CHUNK_SIZE
+                
+                if refresh and refresh():
+                    return None
+                
+                try:
+                    result = pending[0].get(timeout=0.1)
+                except multiprocessing.TimeoutError:
+                    continue
+                pending.popleft()
+                
+                if result is not None:
+                    block.nonce, block.hash = result
+                    self.hashes += block.nonce % self.CHUNK_SIZE + 1
+                    return block
+                
+                self.hashes += self.CHUNK_SIZE
+                if on_progress:
+                    on_progress(next_start - len(pending) * self.CHUNK_SIZE)
+        finally:
+            # Cancela os intervalos restantes (workers verificam a geração)
+            self._cancel_workers()
         
         return None
     
+    def _get_pool(self):
+        """Cria o pool de processos sob demanda (mantido entre mineradas)."""
+        if self._pool is None:
+            # spawn evita fork de um processo com threads de rede ativas
+            ctx = multiprocessing.get_context("spawn")
+            self._generation = ctx.Value("i", 0)
+            self._pool = ctx.Pool(
+                processes=self.workers,
+                initializer=_init_worker,
+                initargs=(self._generation,),
+            )
+        return self._pool
+    
+    def _cancel_workers(self):
+        """Sinaliza aos workers que a busca atual deve ser abandonada."""
+        if self._generation is not None:
+            with self._generation.get_lock():
+                self._generation.value += 1
+    
     def stop_mining(self):
         """Interrompe a mineração em andamento."""
         self.mining = False
+        self._cancel_workers()
+    
+    def shutdown(self):
+        """Interrompe a mineração e encerra o pool de processos."""
+        self.stop_mining()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._generation = None
+
+
+class MiningService:
+    """
+    Mineração contínua em uma thread de fundo.
+    
+    Monta um bloco candidato sobre a ponta e a mempool atuais e minera até
+    encontrar um nonce (a busca consulta o refresh periodicamente). Se a
+    ponta muda, o candidato é remontado na hora; mudanças na mempool só o
+    remontam depois de TEMPLATE_REFRESH_SECONDS com o mesmo candidato, para
+    que um fluxo contínuo de transações não reinicie a busca sem parar.
+    O pool de processos do Miner continua aquecido entre candidatos. Blocos
+    encontrados são entregues a on_block.
+    
+    O hashrate é medido pelo contador Miner.hashes, amostrado a cada
+    progresso da busca dentro de uma janela de HASHRATE_WINDOW segundos.
+    """
+    
+    HASHRATE_WINDOW = 5.0  # segundos
+    TEMPLATE_REFRESH_SECONDS = 5.0  # tempo mínimo de um candidato antes de incluir transações novas
+    
+    def __init__(self, miner: Miner, on_block: Callable[[Block], None]):
+        self.miner = miner
+        self.on_block = on_block
+        self.templates = 0  # candidatos montados desde o início
+        self.blocks_found = 0
+        
+        self._running = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._samples: deque[tuple[float, int]] = deque()
+    
+    @property
+    def running(self) -> bool:
+        return self._running.is_set()
+    
+    def start(self):
+        """Inicia a mineração contínua (sem efeito se já estiver rodando)."""
+        if self.running:
+            return
+        self._running.set()
+        self._samples.clear()
+        self._thread = threading.Thread(target=self._run, name="mining-service", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Interrompe a mineração contínua e aguarda a thread terminar."""
+        self._running.clear()
+        self.miner.stop_mining()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def hashrate(self) -> float:
+        """Hashes por segundo na janela recente (0 se não há amostras)."""
+        samples = list(self._samples)
+        if len(samples) < 2 or not self.running:
+            return 0.0
+        (start, first), (end, last) = samples[0], samples[-1]
+        return (last - first) / (end - start) if end > start else 0.0
+    
+    def _template_key(self) -> tuple[str, int]:
+        """Identifica o candidato atual: ponta da cadeia e versão da mempool."""
+        blockchain = self.miner.blockchain
+        return blockchain.last_block.hash, blockchain.mempool_version
+    
+    def _sample(self, _nonce: int = 0):
+        """Registra uma amostra do contador de hashes e descarta as antigas."""
+        now = time.monotonic()
+        self._samples.append((now, self.miner.hashes))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.HASHRATE_WINDOW:
+            self._samples.popleft()
+    
+    def _run(self):
+        while self.running:
+            tip, mempool_version = self._template_key()
+            started = time.monotonic()
+            self.templates += 1
+            
+            def refresh() -> bool:
+                if not self.running:
+                    return True
+                current_tip, current_version = self._template_key()
+                if current_tip != tip:
+                    return True
+                return (
+                    current_version != mempool_version
+                    and time.monotonic() - started >= self.TEMPLATE_REFRESH_SECONDS
+                )
+            
+            block = self.miner.mine_block(on_progress=self._sample, refresh=refresh)
+            self._sample()
+            if block is not None and self.running:
+                self.blocks_found += 1
+                self.on_block(block)
@@ -1,13 +1,48 @@
+import codecs
 import socket
 import threading
+import zlib
 import logging
-from typing import Callable
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
 
-from .blockchain import Blockchain
-from .block import Block
+from .blockchain import Blockchain, BlockStatus, ChainSuffixBuilder
+from .concurrency import PeerSet
+from .block import Block, hash_block_data, verify_inclusion
 from .transaction import Transaction
-from .miner import Miner
-from .protocol import Protocol, Message, MessageType
+from .miner import Miner, MiningService
+from .protocol import (
+    Protocol,
+    Message,
+    MessageType,
+    RawJSON,
+    recv_frame,
+    recv_length,
+    frame_encoding,
+    choose_encoding,
+    ENCODING_JSON,
+    SUPPORTED_ENCODINGS,
+    ZLIB_MAGIC,
+    MAX_FRAME_SIZE,
+)
+from .session import PeerSession
+from .inbound import InboundPool, RateLimiter, message_priority
+from .mempool import Mempool
+from .metrics import Metrics, MetricsServer, NULL_METRICS
+from .relay import (
+    Batcher,
+    InFlightRequests,
+    SeenCache,
+    INV_BLOCK,
+    INV_TX,
+    INV_TYPES,
+    SHORT_ID_LENGTH,
+    compact_block_message,
+    inventory_item,
+)
+from .store import BlockStore
+from .stream import ChainStreamDecoder
 
 hostname = socket.gethostname()
 ip_address = socket.gethostbyname(hostname)
@@ -22,27 +57,198 @@ class Node:
     - Manter cópia local da blockchain
     - Minerar novos blocos
     - Propagar transações e blocos
+    
+    Com persistent=True o nó mantém uma sessão TCP reutilizável por peer
+    (ver PeerSession) e envia broadcasts em pipeline por um pool limitado
+    de threads. Peers que fecham a conexão após cada resposta continuam
+    sendo atendidos com uma conexão por mensagem.
+    
+    Com compact=True (padrão) o nó oferece no PING uma codificação compacta
+    (JSON comprimido) e a usa apenas com peers que a aceitaram; os demais
+    continuam recebendo JSON puro.
+    
+    Com data_dir os blocos são persistidos em disco (BlockStore) e a cadeia
+    é recarregada dele ao reiniciar, sem baixar tudo de novo dos peers.
+    
+    start_auto_mining() liga a mineração contínua (MiningService): o nó
+    minera bloco após bloco em segundo plano, sem uma chamada a mine() por
+    bloco.
+    
+    Com metrics=True (ou metrics_port) o nó registra métricas dos caminhos
+    quentes (latência por tipo de mensagem, broadcast, envio, sync, blocos
+    e transações, hashrate) em um registro Metrics, consultável pela
+    mensagem GET_METRICS e, com metrics_port, por HTTP (GET /metrics, formato
+    Prometheus). Desabilitadas, a instrumentação é praticamente gratuita.
+    
+    Transações e blocos novos são propagados por inventário: peers que
+    anunciaram suporte no PING recebem só o id/hash (INV) e pedem com
+    GETDATA o que ainda não têm; os demais recebem a mensagem completa.
+    Um LRU das transações aceitas e dos blocos já vistos (SeenCache) impede
+    que ecos sejam reprocessados ou repassados, e um item anunciado por
+    vários peers é pedido a um só (InFlightRequests). Transações a propagar
+    são agrupadas por até tx_batch_window segundos (ou TX_BATCH_SIZE
+    transações): um único INV por peer, ou NEW_TRANSACTIONS para peers que
+    aceitam lotes.
+    
+    Com merkle_blocks=True o nó minera blocos no formato Merkle, que são
+    enviados como COMPACT_BLOCK (cabeçalho + ids curtos) a peers que os
+    aceitam: o receptor remonta o bloco com a própria mempool e pede só as
+    transações que faltam. Blocos dos dois formatos são sempre aceitos.
+    
+    Clientes leves consultam uma transação (GET_TX, com a prova de
+    inclusão no bloco) ou um saldo (GET_BALANCE) sem baixar a cadeia; ver
+    query_transaction() e query_balance().
+    
+    As mensagens recebidas são tratadas por um pool limitado de threads
+    (InboundPool, inbound_workers) com filas por prioridade: blocos e
+    pedidos de cadeia passam à frente de transações. Com as filas cheias,
+    mais de max_connections conexões abertas ou um nó remoto acima de
+    rate_limit mensagens/s, a mensagem é descartada com uma resposta BUSY;
+    blocos e transações recusados assim são reenviados uma vez após o
+    retry_after indicado.
+    
+    Frames maiores que max_frame_size são recusados. Cadeias completas
+    (RESPONSE_CHAIN) pedidas pelo nó são decodificadas em streaming e
+    validadas bloco a bloco, guardando apenas o sufixo que diverge.
     """
     
     BUFFER_SIZE = 65536  # 64KB
+    SEND_TIMEOUT = 10  # segundos
+    SESSION_IDLE_TIMEOUT = 60  # segundos sem frames antes de fechar a sessão
+    SEND_WORKERS = 8  # threads do pool de envio (modo persistente)
+    HEADERS_WINDOW = 32  # cabeçalhos pedidos na busca do ancestral comum
+    SYNC_BATCH = 100  # blocos por REQUEST_BLOCKS
+    MAX_HEADERS = 2000  # limite de cabeçalhos por RESPONSE_HEADERS
+    MAX_BLOCKS = 500  # limite de blocos por RESPONSE_BLOCKS
+    SYNC_DEADLINE = 15  # prazo global (s) das consultas paralelas de sync
+    SYNC_WORKERS = 16  # consultas simultâneas durante o sync
+    MAX_INV = 1000  # itens atendidos por INV/GETDATA
+    GETDATA_TIMEOUT = 5.0  # segundos até pedir a outro peer um item já pedido
+    MAX_TX_BATCH = 1000  # transações aceitas por NEW_TRANSACTIONS
+    TX_BATCH_SIZE = 100  # transações por lote propagado
+    TX_BATCH_WINDOW = 0.05  # segundos de espera para completar um lote
+    INBOUND_WORKERS = 16  # threads que tratam as mensagens recebidas
+    INBOUND_QUEUE = 256  # mensagens na fila de cada prioridade
+    MAX_CONNECTIONS = 128  # conexões de entrada simultâneas
+    RATE_LIMIT = 500.0  # mensagens/s por host
+    BUSY_RETRY_AFTER = 1.0  # segundos sugeridos no BUSY
+    MAX_BUSY_RETRY_AFTER = 5.0  # espera máxima antes de reenviar um relay recusado com BUSY
+    PEERS_PER_HOST = 8  # nós por IP com limite próprio (o IP inteiro tem PEERS_PER_HOST × rate_limit)
+    # Mensagens de relay reenviadas uma vez após um BUSY (as demais são descartadas)
+    RELAY_TYPES = frozenset({
+        MessageType.NEW_TRANSACTION,
+        MessageType.NEW_TRANSACTIONS,
+        MessageType.NEW_BLOCK,
+        MessageType.COMPACT_BLOCK,
+        MessageType.INV,
+    })
     
-    def __init__(self, host: ip_address ,port: int = 5000):
+    def __init__(
+        self,
+        host: ip_address,
+        port: int = 5000,
+        mining_workers: int = 1,
+        persistent: bool = False,
+        compact: bool = True,
+        max_frame_size: int = MAX_FRAME_SIZE,
+        data_dir: str | None = None,
+        validation_workers: int = 1,
+        mempool_size: int = Mempool.MAX_COUNT,
+        metrics: bool = False,
+        metrics_port: int | None = None,
+        inbound_workers: int = INBOUND_WORKERS,
+        max_connections: int = MAX_CONNECTIONS,
+        rate_limit: float | None = RATE_LIMIT,
+        tx_batch_window: float = TX_BATCH_WINDOW,
+        merkle_blocks: bool = False,
+    ):
         self.host = str(ip_address)
         self.port = port
         self.address = f"{host}:{port}"
+        self.max_frame_size = max_frame_size
+        
+        self.metrics = Metrics() if metrics or metrics_port is not None else NULL_METRICS
+        self.metrics_port = metrics_port
+        self._metrics_server: MetricsServer | None = None
         
-        self.blockchain = Blockchain()
-        self.miner = Miner(self.blockchain, self.address)
+        self.blockchain = Blockchain(
+            BlockStore(data_dir) if data_dir else None,
+            validation_workers=validation_workers,
+            mempool=Mempool(max_count=mempool_size),
+            metrics=self.metrics,
+        )
+        self.miner = Miner(
+            self.blockchain,
+            self.address,
+            workers=mining_workers,
+            metrics=self.metrics,
+            merkle_blocks=merkle_blocks,
+        )
+        # Mineração contínua (opt-in, ver start_auto_mining)
+        self.mining_service = MiningService(self.miner, self._on_block_mined)
         
-        self.peers: set[str] = set()  # Conjunto de peers conhecidos
+        self.peers = PeerSet()  # Peers conhecidos (cópia na escrita, iteração sem lock)
+        self.seen = SeenCache()  # ids de transações aceitas e hashes de blocos já vistos
+        self._requested = InFlightRequests(self.GETDATA_TIMEOUT)  # itens pedidos por GETDATA
+        self._inv_peers = PeerSet()  # peers que aceitam relay por inventário
+        self._batch_peers = PeerSet()  # peers que aceitam NEW_TRANSACTIONS
+        self._compact_peers = PeerSet()  # peers que aceitam COMPACT_BLOCK
+        # Transações aceitas a propagar: (transação, peer de origem)
+        self._tx_batcher = Batcher(self._relay_transactions, tx_batch_window, self.TX_BATCH_SIZE)
         self.server_socket: socket.socket | None = None
         self.running = False
         
         self.logger = logging.getLogger(f"Node:{port}")
         
+        # Tratamento limitado das mensagens recebidas (rate_limit None/0 desliga o limite por host)
+        self.inbound = InboundPool(inbound_workers, self.INBOUND_QUEUE, name=f"inbound-{port}")
+        self.max_connections = max_connections
+        self._connection_slots = threading.BoundedSemaphore(max_connections)
+        # Limite por nó (IP + porta anunciada) e, como a porta não é
+        # autenticada, um limite agregado por IP
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.host_rate_limiter = RateLimiter(rate_limit * self.PEERS_PER_HOST) if rate_limit else None
+        
+        # Codificações compactas oferecidas e as negociadas por peer
+        self.encodings: list[str] = list(SUPPORTED_ENCODINGS) if compact else []
+        self._peer_encodings: dict[str, str] = {}
+        
+        # Sessões persistentes (opt-in)
+        self.persistent = persistent
+        self._sessions: dict[str, PeerSession] = {}
+        self._sessions_lock = threading.Lock()
+        self._legacy_peers: set[str] = set()  # peers que fecham após cada resposta
+        self._send_executor: ThreadPoolExecutor | None = None
+        if persistent:
+            self._send_executor = ThreadPoolExecutor(
+                max_workers=self.SEND_WORKERS,
+                thread_name_prefix=f"send-{port}",
+            )
+        
         # Callbacks para eventos
         self.on_new_block: Callable[[Block], None] | None = None
         self.on_new_transaction: Callable[[Transaction], None] | None = None
+        
+        if self.metrics.enabled:
+            self._register_gauges()
+    
+    def _register_gauges(self):
+        """Métricas lidas do estado do nó apenas na coleta."""
+        self.metrics.gauge_fn("chain_height", lambda: len(self.blockchain.chain))
+        self.metrics.gauge_fn("mempool_transactions", lambda: len(self.blockchain.pending_transactions))
+        self.metrics.gauge_fn("mempool_bytes", lambda: self.blockchain.mempool_bytes)
+        self.metrics.gauge_fn("peers", lambda: len(self.peers))
+        self.metrics.gauge_fn("inbound_queued", self.inbound.pending)
+        self.metrics.gauge_fn("miner_hashes", lambda: self.miner.hashes)
+        self.metrics.gauge_fn("miner_hashrate", self.mining_service.hashrate)
+        self.metrics.describe("message_seconds", "Tempo de processamento por tipo de mensagem")
+        self.metrics.describe("send_seconds", "Tempo de envio e resposta por tipo de mensagem")
+        self.metrics.describe("broadcast_seconds", "Tempo para despachar um broadcast a todos os peers")
+        self.metrics.describe("sync_seconds", "Duração das sincronizações de cadeia")
+        self.metrics.describe("relay_duplicates_total", "Transações e blocos recebidos de novo (ecos do relay)")
+        self.metrics.describe("compact_blocks_total", "Blocos compactos recebidos, por forma de reconstrução")
+        self.metrics.describe("inbound_shed_total", "Mensagens recebidas descartadas com BUSY, por motivo")
+        self.metrics.describe("peer_busy_retries_total", "Relays recusados com BUSY por um peer e reenviados")
     
     def start(self):
         """Inicia o servidor do nó."""
@@ -59,20 +265,49 @@ class Node:
         accept_thread = threading.Thread(target=self._accept_connections)
         accept_thread.daemon = True
         accept_thread.start()
+        
+        self._start_metrics_server()
     
     def stop(self):
         """Para o servidor do nó."""
         self.running = False
-        self.miner.stop_mining()
+        self._stop_metrics_server()
+        self.mining_service.stop()
+        self.miner.shutdown()
+        self._tx_batcher.close()
         if self.server_socket:
             self.server_socket.close()
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+        if self._send_executor:
+            self._send_executor.shutdown(wait=False, cancel_futures=True)
+        self.inbound.shutdown()
+        self.blockchain.close()
         self.logger.info("Nó encerrado")
     
+    def _start_metrics_server(self):
+        """Sobe o endpoint HTTP de métricas, se metrics_port foi dado."""
+        if self.metrics_port is None:
+            return
+        self._metrics_server = MetricsServer(self.metrics, self.metrics_port)
+        self._metrics_server.start()
+        self.logger.info(f"Métricas em http://127.0.0.1:{self._metrics_server.port}/metrics")
+    
+    def _stop_metrics_server(self):
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+            self._metrics_server = None
+    
     def _accept_connections(self):
         """Loop para aceitar novas conexões."""
         while self.running:
             try:
                 client_socket, address = self.server_socket.accept()
+                if not self._connection_slots.acquire(blocking=False):
+                    self._reject_connection(client_socket)
+                    continue
                 client_thread = threading.Thread(
                     target=self._handle_client,
                     args=(client_socket, address)
@@ -83,91 +318,224 @@ class Node:
                 if self.running:
                     self.logger.error(f"Erro ao aceitar conexão: {e}")
     
+    def _reject_connection(self, client_socket: socket.socket):
+        """Responde BUSY e fecha uma conexão acima de max_connections."""
+        self.metrics.inc("inbound_shed_total", labels={"reason": "connections"})
+        try:
+            client_socket.settimeout(0)
+            client_socket.sendall(self._busy("connections").to_bytes())
+            # Descarta o pedido já recebido para o close não virar RST
+            # (que faria o cliente perder o BUSY)
+            client_socket.recv(self.BUFFER_SIZE)
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+    
+    def _busy(self, reason: str) -> Message:
+        return Protocol.busy(reason, self.BUSY_RETRY_AFTER)
+    
+    @staticmethod
+    def _rate_key(message: Message, host: str) -> str:
+        """
+        Balde do limite de mensagens: o endereço anunciado pelo remetente se
+        ele estiver no IP da conexão (vários nós no mesmo host não dividem
+        o limite), senão o próprio IP.
+        """
+        sender_host, _, sender_port = message.sender.rpartition(":")
+        if sender_port and (sender_host == host or (host == "127.0.0.1" and sender_host == "localhost")):
+            return f"{host}:{sender_port}"
+        return host
+    
+    def _admit(self, message: Message, host: str) -> Future | Message:
+        """
+        Enfileira o tratamento de uma mensagem recebida de host.
+        
+        Retorna o Future com a resposta de _process_message ou, se a
+        mensagem foi descartada (host acima do limite ou fila cheia), a
+        resposta BUSY a enviar.
+        """
+        if self.rate_limiter and not (
+            self.rate_limiter.allow(self._rate_key(message, host))
+            and self.host_rate_limiter.allow(host)
+        ):
+            self.metrics.inc("inbound_shed_total", labels={"reason": "rate"})
+            return self._busy("rate")
+        future = self.inbound.submit(message_priority(message.type), self._process_message, message)
+        if future is None:
+            self.metrics.inc("inbound_shed_total", labels={"reason": "queue"})
+            return self._busy("queue")
+        return future
+    
     def _handle_client(self, client_socket: socket.socket, address: tuple):
-        """Processa mensagens de um cliente."""
+        """
+        Processa mensagens de um cliente.
+        
+        Por padrão atende uma única mensagem e fecha a conexão. Se o cliente
+        abrir com PING {"keep_alive": true}, a conexão vira uma sessão
+        persistente: cada frame recebido gera exatamente um frame de resposta
+        (ACK quando não há resposta) até o cliente fechar ou ficar ocioso.
+        
+        As threads de conexão são limitadas a max_connections e só esperam
+        o worker do InboundPool, que não faz pedidos de saída (ver
+        _handle_message).
+        """
+        keep_alive = False
         try:
-            # Lê tamanho da mensagem (4 bytes)
-            length_data = client_socket.recv(4)
-            if not length_data:
-                return
-            
-            length = int.from_bytes(length_data, 'big')
-            
-            # Lê mensagem
-            data = b""
-            while len(data) < length:
-                chunk = client_socket.recv(min(self.BUFFER_SIZE, length - len(data)))
-                if not chunk:
-                    break
-                data += chunk
-            
-            if data:
-                message = Message.from_bytes(data)
-                response = self._process_message(message)
+            while True:
+                data = recv_frame(client_socket, self.BUFFER_SIZE, self.max_frame_size)
+                if not data:
+                    return
+                
+                message = Message.from_bytes(data, self.max_frame_size)
+                response = self._admit(message, address[0])
+                if isinstance(response, Future):
+                    response = response.result()
+                handshake = (
+                    not keep_alive
+                    and message.type == MessageType.PING
+                    and message.payload.get("keep_alive")
+                    and not (response and response.type == MessageType.BUSY)
+                )
+                
+                if handshake:
+                    keep_alive = True
+                    client_socket.settimeout(self.SESSION_IDLE_TIMEOUT)
+                    response = response or Protocol.pong()
+                    response.payload["keep_alive"] = True
+                elif keep_alive and response is None:
+                    response = Protocol.ack()
                 
                 if response:
-                    client_socket.sendall(response.to_bytes())
+                    client_socket.sendall(response.to_bytes(self._reply_encoding(message, data)))
+                
+                if not keep_alive:
+                    return
         
+        except socket.timeout:
+            self.logger.debug(f"Sessão ociosa encerrada: {address}")
         except Exception as e:
             self.logger.error(f"Erro ao processar cliente {address}: {e}")
         finally:
             client_socket.close()
+            self._connection_slots.release()
     
     def _process_message(self, message: Message) -> Message | None:
         """Processa uma mensagem recebida e retorna resposta se necessário."""
         self.logger.info(f"Mensagem recebida: {message.type.value} de {message.sender}")
         
+        if not self.metrics.enabled:
+            return self._handle_message(message)
+        labels = {"type": message.type.value}
+        self.metrics.inc("messages_received_total", labels=labels)
+        with self.metrics.timer("message_seconds", labels):
+            return self._handle_message(message)
+    
+    def _handle_message(self, message: Message) -> Message | None:
+        """
+        Trata a mensagem conforme o tipo (ver _process_message).
+        
+        Roda nos workers do InboundPool e não faz pedidos de saída: os que
+        decorrem de uma mensagem (GET_BLOCK_TXS de um bloco compacto, sync
+        com o remetente de um órfão, PING a peers descobertos) vão para
+        _run_in_background. Assim dois nós com os pools cheios não ficam
+        esperando um pelo outro.
+        """
         match message.type:
             case MessageType.NEW_TRANSACTION:
                 tx_data = message.payload["transaction"]
                 transaction = Transaction.from_dict(tx_data)
+                self._requested.done(transaction.id)
+                if transaction.id in self.seen:
+                    # Eco do relay: já aceita antes
+                    self.metrics.inc("relay_duplicates_total", labels={"kind": INV_TX})
+                    return None
+                # Só transações aceitas são marcadas como vistas: uma recusada
+                # (ex: saldo insuficiente) pode ser aceita depois
                 if self.blockchain.add_transaction(transaction):
+                    self.seen.add(transaction.id)
                     self.logger.info(f"Nova transação adicionada: {transaction.id[:8]}...")
-                    # Propaga para outros peers
-                    self._broadcast(message, exclude=message.sender)
+                    # Propaga para outros peers (no próximo lote)
+                    self._tx_batcher.add((transaction, message.sender))
+                    if self.on_new_transaction:
+                        self.on_new_transaction(transaction)
+            
+            case MessageType.NEW_TRANSACTIONS:
+                if message.sender and message.sender != self.address:
+                    self._batch_peers.add(message.sender)
+                transactions = [
+                    Transaction.from_dict(tx_data)
+                    for tx_data in message.payload["transactions"][:self.MAX_TX_BATCH]
+                ]
+                for transaction in transactions:
+                    self._requested.done(transaction.id)
+                fresh = [tx for tx in transactions if tx.id not in self.seen]
+                if len(fresh) < len(transactions):
+                    self.metrics.inc(
+                        "relay_duplicates_total",
+                        len(transactions) - len(fresh),
+                        labels={"kind": INV_TX},
+                    )
+                accepted = self.blockchain.add_transactions(fresh)
+                if accepted:
+                    self.logger.info(f"Lote de {len(accepted)} transação(ões) adicionado")
+                for transaction in accepted:
+                    self.seen.add(transaction.id)
+                    self._tx_batcher.add((transaction, message.sender))
                     if self.on_new_transaction:
                         self.on_new_transaction(transaction)
             
             case MessageType.NEW_BLOCK:
                 block_data = message.payload["block"]
                 block = Block.from_dict(block_data)
-                if self.blockchain.add_block(block):
-                    self.logger.info(f"Novo bloco adicionado: #{block.index}")
-                    # Para mineração atual (outro nó encontrou primeiro)
-                    self.miner.stop_mining()
-                    # Propaga para outros peers
-                    self._broadcast(message, exclude=message.sender)
-                    if self.on_new_block:
-                        self.on_new_block(block)
-                else:
-                    # Bloco rejeitado: pode estar em fork ou atrás da chain.
-                    # Solicita a chain completa do remetente para resolver.
-                    self.logger.warning(
-                        f"Bloco #{block.index} de {message.sender} rejeitado "
-                        f"(nossa chain tem {len(self.blockchain.chain)} blocos). "
-                        f"Solicitando chain completa para sync..."
-                    )
-                    if message.sender:
-                        try:
-                            response = self._send_message(message.sender, Protocol.request_chain())
-                            if response and response.type == MessageType.RESPONSE_CHAIN:
-                                chain_data = response.payload["blockchain"]
-                                new_chain = [Block.from_dict(b) for b in chain_data["chain"]]
-                                if self.blockchain.replace_chain(new_chain):
-                                    self.logger.info(
-                                        f"Chain sincronizada de {message.sender}: "
-                                        f"{len(new_chain)} blocos"
-                                    )
-                                    self.miner.stop_mining()
-                                    # Adiciona o remetente como peer se ainda não estava
-                                    self.peers.add(message.sender)
-                                else:
-                                    self.logger.warning(
-                                        f"Chain de {message.sender} também rejeitada "
-                                        f"(mais curta ou inválida)"
-                                    )
-                        except Exception as e:
-                            self.logger.error(f"Erro ao sincronizar com {message.sender}: {e}")
+                self._requested.done(block.hash)
+                if block.hash in self.seen:
+                    self.metrics.inc("relay_duplicates_total", labels={"kind": INV_BLOCK})
+                    return None
+                # Proof of Work e hash do corpo antes de marcar: o hash vem do
+                # payload, e um corpo forjado sob ele barraria o bloco real
+                if not block.is_valid_hash(self.blockchain.DIFFICULTY) or not block.verify_hash():
+                    self.logger.warning(f"Bloco #{block.index} inválido de {message.sender}")
+                    return None
+                if not self.seen.add(block.hash):
+                    self.metrics.inc("relay_duplicates_total", labels={"kind": INV_BLOCK})
+                    return None
+                self._on_block(block, message.sender, message)
+            
+            case MessageType.COMPACT_BLOCK:
+                if message.sender and message.sender != self.address:
+                    self._compact_peers.add(message.sender)
+                header = message.payload["header"]
+                self._requested.done(header["hash"])
+                if header["hash"] in self.seen:
+                    self.metrics.inc("relay_duplicates_total", labels={"kind": INV_BLOCK})
+                    return None
+                # Proof of Work do cabeçalho antes de gastar qualquer busca
+                if (
+                    not header.get("merkle_root")
+                    or not header["hash"].startswith(self.blockchain.DIFFICULTY)
+                    or header["hash"] != hash_block_data(header)
+                ):
+                    self.logger.warning(f"Bloco compacto inválido de {message.sender}")
+                    return None
+                # Marcado antes de remontar para não repetir a busca quando o
+                # mesmo bloco chega de vários peers ao mesmo tempo
+                if not self.seen.add(header["hash"]):
+                    self.metrics.inc("relay_duplicates_total", labels={"kind": INV_BLOCK})
+                    return None
+                # A remontagem pode pedir transações ao remetente: fora do worker
+                self._run_in_background(self._accept_compact_block, message.payload, message.sender)
+            
+            case MessageType.GET_BLOCK_TXS:
+                block = self.blockchain.find_block(message.payload["hash"])
+                if block is None:
+                    return None
+                transactions = [
+                    block.transactions[index].to_dict()
+                    for index in message.payload["indexes"]
+                    if 0 <= index < len(block.transactions)
+                ]
+                return Protocol.block_txs(block.hash, transactions)
             
             case MessageType.REQUEST_CHAIN:
                 # Registra o remetente como peer (conexão bidirecional).
@@ -176,7 +544,54 @@ class Node:
                     if message.sender not in self.peers:
                         self.peers.add(message.sender)
                         self.logger.info(f"Peer registrado via REQUEST_CHAIN: {message.sender}")
-                return Protocol.response_chain(self.blockchain.to_dict())
+                # Montada a partir do JSON em cache de cada bloco e da mempool
+                return Protocol.response_chain(RawJSON(self.blockchain.to_json()))
+            
+            case MessageType.REQUEST_HEADERS:
+                # Mesmo registro de peer do REQUEST_CHAIN (handshake incremental)
+                if message.sender and message.sender != self.address:
+                    if message.sender not in self.peers:
+                        self.peers.add(message.sender)
+                        self.logger.info(f"Peer registrado via REQUEST_HEADERS: {message.sender}")
+                count = min(int(message.payload["count"]), self.MAX_HEADERS)
+                headers = self.blockchain.get_headers(int(message.payload["from_index"]), count)
+                return Protocol.response_headers(len(self.blockchain.chain), headers)
+            
+            case MessageType.REQUEST_BLOCKS:
+                count = min(int(message.payload["count"]), self.MAX_BLOCKS)
+                blocks = self.blockchain.get_blocks_json(int(message.payload["from_index"]), count)
+                return Protocol.response_blocks(
+                    len(self.blockchain.chain),
+                    RawJSON("[" + ", ".join(blocks) + "]"),
+                )
+            
+            case MessageType.GET_METRICS:
+                return Protocol.metrics(self.metrics.snapshot())
+            
+            case MessageType.GET_TX:
+                return self._transaction_query(str(message.payload["id"]))
+            
+            case MessageType.GET_BALANCE:
+                return Protocol.balance(self.blockchain.get_account(str(message.payload["address"])))
+            
+            case MessageType.INV:
+                # Quem anuncia por inventário também aceita ser anunciado
+                if message.sender and message.sender != self.address:
+                    self._inv_peers.add(message.sender)
+                # Itens já pedidos a outro anunciante (e no prazo) não são pedidos de novo
+                wanted = [
+                    item for item in message.payload["items"][:self.MAX_INV]
+                    if not self._has_inventory(item) and self._requested.claim(item["id"])
+                ]
+                if wanted:
+                    # O anunciante envia os itens em seguida (ver _announce)
+                    return Protocol.getdata(wanted)
+            
+            case MessageType.GETDATA:
+                # GETDATA avulso (fora da resposta a um INV): envia os itens
+                # ao remetente em novas mensagens
+                if message.sender and message.sender != self.address:
+                    self._push_inventory(message.sender, message.payload["items"][:self.MAX_INV])
             
             case MessageType.REQUEST_MEMPOOL:
                 txs = [tx.to_dict() for tx in self.blockchain.pending_transactions]
@@ -203,7 +618,28 @@ class Node:
                         if message.sender and message.sender != self.address:
                             self.peers.add(message.sender)
                             self.logger.info(f"Peer registrado via PING: {message.sender}")
-                        return Protocol.pong()
+                        inv = bool(message.payload.get("inv"))
+                        if inv and message.sender:
+                            self._inv_peers.add(message.sender)
+                        batch = bool(message.payload.get("batch"))
+                        if batch and message.sender:
+                            self._batch_peers.add(message.sender)
+                        compact_blocks = bool(message.payload.get("compact_blocks"))
+                        if compact_blocks and message.sender:
+                            self._compact_peers.add(message.sender)
+                        encoding = None
+                        offered = message.payload.get("encodings")
+                        if offered:
+                            # Negociação de codificação compacta
+                            encoding = choose_encoding(offered) if self.encodings else ENCODING_JSON
+                            if message.sender:
+                                self._peer_encodings[message.sender] = encoding
+                        return Protocol.pong(
+                            encoding=encoding,
+                            inv=inv,
+                            batch=batch,
+                            compact_blocks=compact_blocks,
+                        )
                     
                     elif message.type == MessageType.DISCOVER_PEERS:
                         return Protocol.peers_list(list(self.peers))
@@ -214,20 +650,180 @@ class Node:
                         if discovered_peers:
                             self.peers.update(discovered_peers)
                             self.logger.info(f"Peers descobertos via broadcast: {len(discovered_peers)}")
-                            for new_peer in discovered_peers:
-                                try:
-                                    self._send_message(new_peer, Protocol.ping())
-                                except Exception:
-                                    pass
+                            self._run_in_background(self._ping_peers, discovered_peers)
                 except Exception as e:
                     self.logger.debug(f"Mensagem não padrão ignorada ou falhou: {e}")
         
         return None
     
+    def _transaction_query(self, tx_id: str) -> Message:
+        """
+        Resposta TX a um GET_TX: a transação e, se confirmada, o cabeçalho
+        do bloco e a prova de inclusão (blocos legados levam a lista das
+        transações do bloco no lugar da prova).
+        """
+        located = self.blockchain.locate_transaction(tx_id)
+        height = len(self.blockchain.chain)
+        if located is None:
+            pending = self.blockchain.get_pending_transaction(tx_id)
+            if pending is None:
+                return Protocol.tx(tx_id, "unknown", height)
+            return Protocol.tx(tx_id, "pending", height, transaction=pending.to_dict())
+        
+        block, position = located
+        fields = {
+            "transaction": block.transactions[position].to_dict(),
+            "block_index": block.index,
+            "header": block.compact_header(),
+        }
+        if block.merkle_root:
+            fields["proof"] = block.merkle_proof(position)
+        else:
+            fields["transactions"] = [tx.to_dict() for tx in block.transactions]
+        return Protocol.tx(tx_id, "confirmed", height, **fields)
+    
+    def _reconstruct_block(self, payload: dict, sender: str) -> Block | None:
+        """
+        Remonta um bloco compacto: transações enviadas inteiras, depois a
+        mempool (pelos ids curtos) e, para as que faltarem, GET_BLOCK_TXS ao
+        remetente. Se a raiz de Merkle não conferir (id curto repetido ou
+        transação adulterada na mempool), pede todas as transações.
+        Retorna None se o bloco não pôde ser remontado.
+        """
+        header = payload["header"]
+        short_ids = payload["short_ids"]
+        transactions: list[Transaction | None] = [None] * len(short_ids)
+        for item in payload.get("prefilled", []):
+            index = item["index"]
+            if not 0 <= index < len(transactions):
+                return None
+            transactions[index] = Transaction.from_dict(item["transaction"])
+        
+        wanted = {short_ids[i] for i, tx in enumerate(transactions) if tx is None}
+        pending = self.blockchain.match_pending_transactions(wanted, SHORT_ID_LENGTH)
+        for index, tx in enumerate(transactions):
+            if tx is None:
+                transactions[index] = pending.get(short_ids[index])
+        
+        missing = [index for index, tx in enumerate(transactions) if tx is None]
+        result = "fetched" if missing else "mempool"
+        if missing:
+            fetched = self._fetch_block_transactions(sender, header["hash"], missing)
+            if fetched is None:
+                self.metrics.inc("compact_blocks_total", labels={"result": "failed"})
+                return None
+            for index, tx in zip(missing, fetched):
+                transactions[index] = tx
+        
+        block = Block(
+            index=header["index"],
+            previous_hash=header["previous_hash"],
+            transactions=transactions,
+            nonce=header["nonce"],
+            timestamp=header["timestamp"],
+            hash=header["hash"],
+            merkle_root=header["merkle_root"],
+        )
+        if block.compute_merkle_root() != block.merkle_root:
+            result = "refetched"
+            fetched = self._fetch_block_transactions(sender, block.hash, list(range(len(short_ids))))
+            if fetched is None:
+                self.metrics.inc("compact_blocks_total", labels={"result": "failed"})
+                return None
+            block.transactions = fetched
+            if block.compute_merkle_root() != block.merkle_root:
+                self.metrics.inc("compact_blocks_total", labels={"result": "failed"})
+                return None
+        self.metrics.inc("compact_blocks_total", labels={"result": result})
+        return block
+    
+    def _fetch_block_transactions(self, peer_address: str, block_hash: str, indexes: list[int]) -> list[Transaction] | None:
+        """Pede ao peer as transações nas posições dadas do bloco (GET_BLOCK_TXS)."""
+        if not peer_address:
+            return None
+        response = self._send_message(peer_address, Protocol.get_block_txs(block_hash, indexes))
+        if not response or response.type != MessageType.BLOCK_TXS:
+            return None
+        transactions = [Transaction.from_dict(tx_data) for tx_data in response.payload["transactions"]]
+        return transactions if len(transactions) == len(indexes) else None
+    
+    def _accept_compact_block(self, payload: dict, sender: str):
+        """Remonta (ver _reconstruct_block) e processa um COMPACT_BLOCK já marcado como visto."""
+        header = payload["header"]
+        block = None
+        try:
+            block = self._reconstruct_block(payload, sender)
+        except Exception as e:
+            self.logger.error(f"Erro ao remontar bloco compacto de {sender}: {e}")
+        finally:
+            if block is None:
+                # Libera o hash: o bloco ainda pode chegar por INV ou NEW_BLOCK
+                self.seen.discard(header["hash"])
+        if block is None:
+            self.logger.warning(
+                f"Não foi possível remontar o bloco compacto #{header['index']} de {sender}"
+            )
+            return
+        self._on_block(block, sender)
+    
+    def _on_block(self, block: Block, sender: str, message: Message | None = None):
+        """
+        Processa um bloco novo recebido de sender (NEW_BLOCK ou COMPACT_BLOCK
+        reconstruído): aplica, propaga ou sincroniza com o remetente.
+        """
+        status = self.blockchain.receive_block(block)
+        self.metrics.inc("blocks_received_total", labels={"status": status.value})
+        if status in (BlockStatus.EXTENDED, BlockStatus.REORG):
+            if status == BlockStatus.REORG:
+                self.logger.info(
+                    f"Reorganização: ramo de {sender} com ponta "
+                    f"#{self.blockchain.last_block.index} virou a cadeia principal"
+                )
+            self.logger.info(f"Novo bloco adicionado: #{block.index}")
+            # Para mineração atual (outro nó encontrou primeiro)
+            self.miner.stop_mining()
+            # Propaga para outros peers
+            self._relay_block(block, message, exclude=sender)
+            if self.on_new_block:
+                self.on_new_block(block)
+        elif status == BlockStatus.SIDE:
+            self.logger.info(f"Bloco #{block.index} guardado em ramo lateral")
+        elif status != BlockStatus.DUPLICATE:
+            # Órfão ou rejeitado: estamos atrás ou em um fork antigo.
+            # Sincroniza com o remetente (incremental quando suportado).
+            self.logger.warning(
+                f"Bloco #{block.index} de {sender} não aceito ({status.value}; "
+                f"nossa chain tem {len(self.blockchain.chain)} blocos). "
+                f"Sincronizando com o remetente..."
+            )
+            if sender:
+                self._run_in_background(self._sync_with_sender, sender)
+    
+    def _sync_with_sender(self, sender: str):
+        """Sincroniza com o remetente de um bloco órfão ou rejeitado (em segundo plano)."""
+        try:
+            if self._sync_from_peer(sender):
+                self.logger.info(
+                    f"Chain sincronizada de {sender}: "
+                    f"{len(self.blockchain.chain)} blocos"
+                )
+                self.miner.stop_mining()
+                # Adiciona o remetente como peer se ainda não estava
+                self.peers.add(sender)
+            else:
+                self.logger.warning(
+                    f"Chain de {sender} também rejeitada "
+                    f"(mais curta ou inválida)"
+                )
+        except Exception as e:
+            self.logger.error(f"Erro ao sincronizar com {sender}: {e}")
+    
     def connect_to_peer(self, peer_address: str) -> bool:
         """Conecta a um peer e adiciona à lista.
 
-        Usa REQUEST_CHAIN como handshake (mensagem obrigatória pelo padrão).
+        Tenta primeiro a sincronização incremental (REQUEST_HEADERS); se o
+        peer não suportar, usa REQUEST_CHAIN como handshake (mensagem
+        obrigatória pelo padrão).
         
         Suporta dois estilos de resposta:
         - Mesmo socket (nosso estilo): RESPONSE_CHAIN volta na mesma conexão TCP.
@@ -238,13 +834,23 @@ class Node:
         if peer_address == self.address:
             return False
         
+        try:
+            if self._sync_incremental(peer_address) is not None:
+                self.peers.add(peer_address)
+                self.logger.info(f"Conectado ao peer (sync incremental): {peer_address}")
+                self._ping_peer(peer_address)
+                self._discover_peers_from(peer_address)
+                return True
+        except Exception as e:
+            self.logger.debug(f"Sync incremental com {peer_address} falhou: {e}")
+        
         try:
             host, port = peer_address.split(":")
             
             # Testa alcançabilidade, envia REQUEST_CHAIN e tenta capturar
             # RESPONSE_CHAIN na mesma socket (nosso estilo).
             connected = False
-            response = None
+            builder = None
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
                 sock.settimeout(10)
                 sock.connect((host, int(port)))  # lança exceção se inacessível
@@ -255,17 +861,7 @@ class Node:
                 sock.sendall(msg.to_bytes())
                 
                 try:
-                    length_data = sock.recv(4)
-                    if length_data:
-                        length = int.from_bytes(length_data, 'big')
-                        data = b""
-                        while len(data) < length:
-                            chunk = sock.recv(min(self.BUFFER_SIZE, length - len(data)))
-                            if not chunk:
-                                break
-                            data += chunk
-                        if data:
-                            response = Message.from_bytes(data)
+                    builder = self._read_chain_stream(sock)
                 except Exception:
                     # Sem resposta na mesma socket: peer usa estilo callback
                     # (abre nova conexão de volta). O servidor vai receber o
@@ -282,12 +878,10 @@ class Node:
             self.peers.add(peer_address)
             self.logger.info(f"Conectado ao peer: {peer_address}")
             
-            if response and response.type == MessageType.RESPONSE_CHAIN:
-                chain_data = response.payload["blockchain"]
-                new_chain = [Block.from_dict(b) for b in chain_data["chain"]]
-                if self.blockchain.replace_chain(new_chain):
+            if builder is not None:
+                if self._apply_fetched(builder):
                     self.logger.info(
-                        f"Blockchain atualizada no handshake: {len(new_chain)} blocos"
+                        f"Blockchain atualizada no handshake: {builder.height} blocos"
                     )
             else:
                 self.logger.info(
@@ -295,23 +889,8 @@ class Node:
                     f"aguardando RESPONSE_CHAIN inbound..."
                 )
             
-            # Tenta descobrir peers adicionais (opcional, não-obrigatório)
-            try:
-                peers_response = self._send_message(peer_address, Protocol.discover_peers())
-                if peers_response and peers_response.type == MessageType.PEERS_LIST:
-                    new_peers = set(peers_response.payload["peers"]) - {self.address}
-                    discovered_peers = new_peers - self.peers
-                    if discovered_peers:
-                        self.peers.update(discovered_peers)
-                        self.logger.info(f"Peers descobertos: {len(discovered_peers)}")
-                        for new_peer in discovered_peers:
-                            try:
-                                self._send_message(new_peer, Protocol.ping())
-                            except Exception as e:
-                                self.logger.debug(f"Não foi possível notificar {new_peer}: {e}")
-            except Exception as e:
-                self.logger.debug(f"DISCOVER_PEERS não suportado por {peer_address} (opcional): {e}")
-            
+            self._ping_peer(peer_address)
+            self._discover_peers_from(peer_address)
             return True
         
         except Exception as e:
@@ -319,57 +898,494 @@ class Node:
         
         return False
     
-    def sync_blockchain(self):
-        """Sincroniza blockchain com os peers (baixa a cadeia mais longa)."""
-        for peer in list(self.peers):
+    def _ping_peer(self, peer_address: str) -> bool:
+        """
+        Envia PING oferecendo as codificações compactas, o relay por
+        inventário, os lotes de transações e os blocos compactos e registra
+        o que o peer aceitou.
+        
+        Peers que não conhecem a negociação respondem PONG sem esses campos
+        e continuam recebendo JSON puro e mensagens completas.
+        Retorna True se houve PONG.
+        """
+        response = self._send_message(
+            peer_address,
+            Protocol.ping(encodings=self.encodings or None, inv=True, batch=True, compact_blocks=True),
+        )
+        if not response or response.type != MessageType.PONG:
+            return False
+        flags = (
+            ("inv", self._inv_peers),
+            ("batch", self._batch_peers),
+            ("compact_blocks", self._compact_peers),
+        )
+        for flag, peers in flags:
+            if response.payload.get(flag):
+                peers.add(peer_address)
+            else:
+                peers.discard(peer_address)
+        encoding = response.payload.get("encoding", ENCODING_JSON)
+        if encoding in self.encodings:
+            self._peer_encodings[peer_address] = encoding
+        else:
+            self._peer_encodings.pop(peer_address, None)
+        return True
+    
+    def _encoding_for(self, peer_address: str) -> str:
+        """Codificação negociada com o peer (JSON puro se nenhuma)."""
+        return self._peer_encodings.get(peer_address, ENCODING_JSON)
+    
+    def _reply_encoding(self, message: Message, data: bytes | bytearray) -> str:
+        """
+        Codificação da resposta a uma mensagem recebida: a negociada com o
+        remetente ou, sem negociação, a do próprio frame.
+        
+        Pedidos como REQUEST_CHAIN são pequenos demais para ir comprimidos,
+        então a codificação do frame não diz se o peer aceita respostas
+        comprimidas; a negociação diz.
+        """
+        encoding = self._peer_encodings.get(message.sender)
+        return encoding if encoding is not None else frame_encoding(data)
+    
+    def _discover_peers_from(self, peer_address: str):
+        """Tenta descobrir peers adicionais (opcional, não-obrigatório)."""
+        try:
+            peers_response = self._send_message(peer_address, Protocol.discover_peers())
+            if peers_response and peers_response.type == MessageType.PEERS_LIST:
+                new_peers = set(peers_response.payload["peers"]) - {self.address}
+                discovered_peers = new_peers - self.peers
+                if discovered_peers:
+                    self.peers.update(discovered_peers)
+                    self.logger.info(f"Peers descobertos: {len(discovered_peers)}")
+                    self._ping_peers(discovered_peers)
+        except Exception as e:
+            self.logger.debug(f"DISCOVER_PEERS não suportado por {peer_address} (opcional): {e}")
+    
+    def _ping_peers(self, peers: set[str]):
+        """Apresenta-se (PING) a peers recém-descobertos."""
+        for peer in peers:
+            try:
+                self._ping_peer(peer)
+            except Exception as e:
+                self.logger.debug(f"Não foi possível notificar {peer}: {e}")
+    
+    def sync_blockchain(self, deadline: float | None = None) -> dict:
+        """
+        Sincroniza blockchain com os peers (baixa a cadeia mais longa).
+        
+        Consulta todos os peers em paralelo, com um prazo global, e aplica a
+        cadeia válida mais longa entre as respostas (tentando a próxima mais
+        longa se a melhor for rejeitada).
+        
+        Retorna um dicionário com "updated", "best_peer", "height",
+        "duration_ms" e, em "peers", status/latência/altura de cada peer.
+        """
+        started = time.perf_counter()
+        report = self._query_peers(self._probe_chain, deadline or self.SYNC_DEADLINE)
+        
+        candidates = sorted(
+            ((entry["result"]["height"], peer) for peer, entry in report.items() if entry["result"]),
+            reverse=True,
+        )
+        best_peer = None
+        for height, peer in candidates:
+            if height <= len(self.blockchain.chain):
+                break
+            probe = report[peer]["result"]
             try:
-                response = self._send_message(peer, Protocol.request_chain())
-                if response and response.type == MessageType.RESPONSE_CHAIN:
-                    chain_data = response.payload["blockchain"]
-                    new_chain = [Block.from_dict(b) for b in chain_data["chain"]]
-                    if self.blockchain.replace_chain(new_chain):
-                        self.logger.info(f"Blockchain sincronizada de {peer}")
-                        break
+                if probe["suffix"]:
+                    updated = self.blockchain.apply_suffix(probe["suffix"])
+                elif probe["suffix"] is not None:
+                    # A sondagem só contou os blocos novos: baixa de novo só
+                    # deste peer, agora estendendo a ponta
+                    builder = self._fetch_chain(peer)
+                    updated = builder is not None and self._apply_fetched(builder)
+                else:
+                    updated = bool(self._sync_incremental(peer))
             except Exception as e:
                 self.logger.error(f"Erro ao sincronizar com {peer}: {e}")
+                updated = False
+            
+            if updated:
+                best_peer = peer
+                self.logger.info(f"Blockchain sincronizada de {peer}")
+                break
+            report[peer]["status"] = "rejected"
+        
+        elapsed = time.perf_counter() - started
+        self.metrics.observe("sync_seconds", elapsed, {"kind": "all_peers"})
+        return {
+            "updated": best_peer is not None,
+            "best_peer": best_peer,
+            "height": len(self.blockchain.chain),
+            "duration_ms": round(elapsed * 1000, 1),
+            "peers": {
+                peer: {
+                    "status": entry["status"],
+                    "latency_ms": entry["latency_ms"],
+                    "height": entry["result"]["height"] if entry["result"] else None,
+                }
+                for peer, entry in report.items()
+            },
+        }
+    
+    def _probe_chain(self, peer_address: str) -> dict | None:
+        """
+        Descobre a altura da cadeia de um peer.
+        
+        Peers com suporte a REQUEST_HEADERS respondem só a altura (os blocos
+        são baixados depois, incrementalmente, apenas do peer escolhido).
+        Os demais enviam a cadeia completa via REQUEST_CHAIN, recebida em
+        streaming: só o sufixo que diverge da nossa cadeia é guardado, e os
+        blocos que estenderiam a ponta são só contados. A sondagem nunca
+        altera a cadeia local (nem depois do prazo, se ainda estiver em
+        andamento): só o candidato escolhido é aplicado, em sync_blockchain.
+        """
+        tip = len(self.blockchain.chain) - 1
+        response = self._send_message(peer_address, Protocol.request_headers(tip, 1))
+        if response and response.type == MessageType.RESPONSE_HEADERS:
+            return {"height": response.payload["height"], "suffix": None}
+        
+        builder = self._fetch_chain(peer_address, probe=True)
+        if builder is not None:
+            return {"height": builder.height, "suffix": builder.suffix}
+        return None
+    
+    def _query_peers(self, request: Callable[[str], Any], deadline: float) -> dict[str, dict]:
+        """
+        Executa request(peer) para todos os peers em paralelo.
+        
+        Aguarda no máximo `deadline` segundos no total: peers que não
+        responderem a tempo são marcados como "timeout" e não atrasam o
+        resultado. Retorna {peer: {"status", "latency_ms", "result"}}.
+        """
+        peers = list(self.peers)
+        if not peers:
+            return {}
+        
+        def timed(peer: str) -> tuple[Any, str, float]:
+            started = time.perf_counter()
+            try:
+                result = request(peer)
+                status = "ok" if result is not None else "unreachable"
+            except Exception as e:
+                self.logger.error(f"Erro ao consultar {peer}: {e}")
+                result, status = None, "error"
+            return result, status, round((time.perf_counter() - started) * 1000, 1)
+        
+        executor = ThreadPoolExecutor(max_workers=min(len(peers), self.SYNC_WORKERS))
+        futures = {executor.submit(timed, peer): peer for peer in peers}
+        done, _ = wait(futures, timeout=deadline)
+        # Não espera as consultas atrasadas (terminam em segundo plano)
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        report = {}
+        for future, peer in futures.items():
+            if future in done:
+                result, status, latency = future.result()
+                report[peer] = {"status": status, "latency_ms": latency, "result": result}
+            else:
+                report[peer] = {"status": "timeout", "latency_ms": deadline * 1000, "result": None}
+        return report
+    
+    def _sync_from_peer(self, peer_address: str) -> bool:
+        """
+        Sincroniza a cadeia com um peer.
+        
+        Usa a sincronização incremental (cabeçalhos + blocos faltantes) e,
+        se o peer não suportar, baixa a cadeia completa via REQUEST_CHAIN.
+        Retorna True se a cadeia local foi atualizada.
+        """
+        with self.metrics.timer("sync_seconds", {"kind": "peer"}):
+            updated = self._sync_incremental(peer_address)
+            if updated is not None:
+                return updated
+            
+            builder = self._fetch_chain(peer_address)
+            if builder is not None:
+                return self._apply_fetched(builder)
+            return False
+    
+    def _apply_fetched(self, builder: ChainSuffixBuilder) -> bool:
+        """Aplica o fork guardado de uma cadeia baixada; True se a cadeia local mudou."""
+        updated = bool(builder.suffix) and self.blockchain.apply_suffix(builder.suffix)
+        return updated or builder.appended > 0
+    
+    def _fetch_chain(self, peer_address: str, probe: bool = False) -> ChainSuffixBuilder | None:
+        """
+        Pede REQUEST_CHAIN em uma conexão nova e lê a resposta em streaming
+        (com probe, sem alterar a cadeia local; ver _read_chain_stream).
+        """
+        try:
+            host, port = peer_address.split(":")
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.SEND_TIMEOUT)
+                sock.connect((host, int(port)))
+                
+                message = Protocol.request_chain()
+                message.sender = self.address
+                sock.sendall(message.to_bytes(self._encoding_for(peer_address)))
+                return self._read_chain_stream(sock, probe)
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao baixar cadeia de {peer_address}: {e}")
+        
+        return None
+    
+    def _read_chain_stream(self, sock: socket.socket, probe: bool = False) -> ChainSuffixBuilder | None:
+        """
+        Lê um frame RESPONSE_CHAIN do socket sem montar a cadeia em memória.
+        
+        O corpo é lido em pedaços de BUFFER_SIZE, descomprimido se vier em
+        zlib, e cada bloco é validado (encadeamento e Proof of Work) assim
+        que chega, abortando na primeira inconsistência. Blocos que estendem
+        a ponta local já entram na cadeia (builder.appended); só um fork fica
+        em builder.suffix. Com probe, esses blocos só são contados e
+        descartados (Blockchain.suffix_builder). Retorna None se a resposta
+        não é um RESPONSE_CHAIN válido.
+        """
+        length = recv_length(sock, self.max_frame_size)
+        if not length:
+            return None
+        
+        builder = self.blockchain.suffix_builder(extend_tip=True, probe=probe)
+        decoder = ChainStreamDecoder()
+        text = codecs.getincrementaldecoder("utf-8")()
+        inflater = None
+        inflated = 0
+        
+        def consume(chunk) -> bool:
+            nonlocal inflated
+            if inflater is not None:
+                # Limita cada pedaço para não expandir além do máximo de uma vez
+                chunk = inflater.decompress(chunk, self.max_frame_size - inflated + 1)
+                inflated += len(chunk)
+                if inflated > self.max_frame_size:
+                    raise ValueError(f"Frame descomprimido excede o máximo de {self.max_frame_size}")
+            for block_data in decoder.feed(text.decode(chunk)):
+                if not builder.add(Block.from_dict(block_data)):
+                    self.logger.warning("Cadeia recebida inválida; download interrompido")
+                    return False
+            return True
+        
+        # Os primeiros bytes indicam se o corpo veio comprimido
+        head = b""
+        while len(head) < min(len(ZLIB_MAGIC), length):
+            chunk = sock.recv(min(len(ZLIB_MAGIC), length) - len(head))
+            if not chunk:
+                return None
+            head += chunk
+        if head == ZLIB_MAGIC:
+            inflater = zlib.decompressobj()
+        elif not consume(head):
+            return None
+        
+        buffer = bytearray(self.BUFFER_SIZE)
+        view = memoryview(buffer)
+        received = len(head)
+        while received < length:
+            n = sock.recv_into(view, min(len(buffer), length - received))
+            if not n:
+                return None
+            received += n
+            if not consume(view[:n]):
+                return None
+        
+        document = decoder.close()
+        if document.get("type") != MessageType.RESPONSE_CHAIN.value:
+            return None
+        if not decoder.streamed:
+            for block_data in document["payload"]["blockchain"]["chain"]:
+                if not builder.add(Block.from_dict(block_data)):
+                    return None
+        return builder
+    
+    def _sync_incremental(self, peer_address: str) -> bool | None:
+        """
+        Sincronização headers-first com um peer.
+        
+        1. Pede cabeçalhos próximos da nossa ponta, dobrando a janela para
+           trás até achar o ancestral comum (o gênesis é comum a todos).
+        2. Baixa apenas os blocos após o ancestral, em lotes de SYNC_BATCH,
+           até a altura anunciada nessa resposta (alturas informadas depois
+           não estendem o download: um peer não o prende indefinidamente).
+        3. Aplica os lotes conforme chegam, validando só os blocos novos:
+           só o trecho de um fork que ainda não supera a nossa cadeia fica
+           em memória.
+        
+        Retorna True se a cadeia foi atualizada, False se não havia nada a
+        baixar (ou o sufixo foi rejeitado) e None se o peer não suporta
+        REQUEST_HEADERS/REQUEST_BLOCKS.
+        """
+        our_height = len(self.blockchain.chain)
+        window = self.HEADERS_WINDOW
+        fork = None
+        
+        while fork is None:
+            start = max(0, our_height - window)
+            response = self._send_message(
+                peer_address, Protocol.request_headers(start, our_height - start)
+            )
+            if not response or response.type != MessageType.RESPONSE_HEADERS:
+                return None
+            
+            target = response.payload["height"]
+            if target <= our_height:
+                return False
+            
+            # Ancestral comum: cabeçalho mais alto que coincide com o nosso
+            # (nossos hashes lidos sob o lock, em uma leitura só)
+            ours = {
+                header["index"]: header["hash"]
+                for header in self.blockchain.get_headers(start, our_height - start)
+            }
+            for header in reversed(response.payload["headers"]):
+                if ours.get(header["index"]) == header["hash"]:
+                    fork = header["index"]
+                    break
+            
+            if fork is None:
+                if start == 0:
+                    # Nem o gênesis coincide: cadeias incompatíveis
+                    return False
+                window *= 2
+        
+        # Baixa os blocos faltantes em lotes, aplicando assim que possível
+        pending: list[Block] = []
+        applied = 0
+        next_index = fork + 1
+        while next_index < target:
+            response = self._send_message(
+                peer_address,
+                Protocol.request_blocks(next_index, min(self.SYNC_BATCH, target - next_index)),
+            )
+            if not response or response.type != MessageType.RESPONSE_BLOCKS:
+                break
+            batch = [Block.from_dict(b) for b in response.payload["blocks"][:target - next_index]]
+            if not batch:
+                break
+            pending.extend(batch)
+            next_index += len(batch)
+            
+            # Um fork só pode ser aplicado quando supera a nossa cadeia
+            if pending[0].index + len(pending) > len(self.blockchain.chain):
+                if not self.blockchain.apply_suffix(pending):
+                    break
+                applied += len(pending)
+                pending = []
+        
+        if applied:
+            self.logger.info(
+                f"Sync incremental com {peer_address}: {applied} bloco(s) "
+                f"a partir do #{fork + 1}"
+            )
+        return applied > 0
 
-    def sync_mempool(self) -> dict:
-        """Sincroniza transações pendentes com os peers."""
+    def sync_mempool(self, deadline: float | None = None) -> dict:
+        """Sincroniza transações pendentes com os peers (consultas em paralelo)."""
+        report = self._query_peers(
+            lambda peer: self._send_message(peer, Protocol.request_mempool()),
+            deadline or self.SYNC_DEADLINE,
+        )
+        
         added = 0
         unreachable = []
-        for peer in list(self.peers):
-            try:
-                response = self._send_message(peer, Protocol.request_mempool())
-                if response and response.type == MessageType.RESPONSE_MEMPOOL:
-                    for tx_data in response.payload["transactions"]:
-                        tx = Transaction.from_dict(tx_data)
-                        # trusted=True: confia que o peer já validou o saldo
-                        if self.blockchain.add_transaction(tx, trusted=True):
-                            added += 1
-                else:
+        for peer, entry in report.items():
+            response = entry["result"]
+            if response and response.type == MessageType.RESPONSE_MEMPOOL:
+                try:
+                    transactions = [Transaction.from_dict(tx_data) for tx_data in response.payload["transactions"]]
+                    # trusted=True: confia que o peer já validou o saldo
+                    added += len(self.blockchain.add_transactions(transactions, trusted=True))
+                except Exception as e:
+                    self.logger.error(f"Erro ao sincronizar mempool com {peer}: {e}")
+                    entry["status"] = "error"
                     unreachable.append(peer)
-            except Exception as e:
-                self.logger.error(f"Erro ao sincronizar mempool com {peer}: {e}")
+            else:
                 unreachable.append(peer)
         self.logger.info(f"Mempool sincronizada: {added} nova(s) transação(ões) adicionada(s)")
-        return {"added": added, "unreachable": unreachable}
-        return added
+        return {
+            "added": added,
+            "unreachable": unreachable,
+            "peers": {
+                peer: {"status": entry["status"], "latency_ms": entry["latency_ms"]}
+                for peer, entry in report.items()
+            },
+        }
+    
+    def query_transaction(self, peer_address: str, tx_id: str) -> dict | None:
+        """
+        Consulta uma transação em um peer (GET_TX), sem baixar a cadeia.
+        
+        Uma transação confirmada só é aceita se o cabeçalho tem o Proof of
+        Work e a prova de inclusão confere (ver verify_inclusion); o
+        resultado (payload do TX) ganha "confirmations". Retorna None se o
+        peer não respondeu ou a prova não confere.
+        """
+        response = self._send_message(peer_address, Protocol.get_tx(tx_id))
+        if not response or response.type != MessageType.TX:
+            return None
+        result = response.payload
+        if result["status"] != "confirmed":
+            return result
+        header = result["header"]
+        if (
+            result["transaction"].get("id") != tx_id
+            or header["index"] != result["block_index"]
+            or not header["hash"].startswith(self.blockchain.DIFFICULTY)
+            or not verify_inclusion(
+                result["transaction"],
+                header,
+                result.get("proof"),
+                result.get("transactions"),
+            )
+        ):
+            self.logger.warning(f"Prova de inclusão inválida para {tx_id} de {peer_address}")
+            return None
+        result["confirmations"] = result["height"] - result["block_index"]
+        return result
+    
+    def query_balance(self, peer_address: str, address: str) -> dict | None:
+        """
+        Consulta o saldo de um endereço em um peer (GET_BALANCE).
+        
+        O saldo vem dos índices do peer e não tem prova (os blocos não se
+        comprometem com o estado das contas): confie apenas em peers
+        conhecidos ou compare as respostas de vários. Retorna o payload do
+        BALANCE (Blockchain.get_account()) ou None se o peer não respondeu.
+        """
+        response = self._send_message(peer_address, Protocol.get_balance(address))
+        if not response or response.type != MessageType.BALANCE:
+            return None
+        return response.payload
     
     def broadcast_transaction(self, transaction: Transaction):
         """Propaga uma transação para todos os peers."""
-        if self.blockchain.add_transaction(transaction):
-            message = Protocol.new_transaction(transaction.to_dict())
-            self._broadcast(message)
+        self.broadcast_transactions([transaction])
+    
+    def broadcast_transactions(self, transactions: list[Transaction]) -> list[Transaction]:
+        """
+        Adiciona um lote de transações (validado em uma passada) e propaga
+        as aceitas para todos os peers. Retorna as transações aceitas.
+        """
+        accepted = self.blockchain.add_transactions(transactions)
+        for transaction in accepted:
+            self.seen.add(transaction.id)
+            self._tx_batcher.add((transaction, ""))
+        return accepted
     
     def broadcast_block(self, block: Block):
         """Propaga um bloco minerado para todos os peers."""
         if self.blockchain.add_block(block):
-            message = Protocol.new_block(block.to_dict())
-            self._broadcast(message)
+            self.seen.add(block.hash)
+            self._relay_block(block)
             self.logger.info(f"Bloco #{block.index} propagado para {len(self.peers)} peers")
     
     def mine(self) -> Block | None:
         """Inicia mineração de um novo bloco."""
+        if self.mining_service.running:
+            self.logger.warning("Mineração contínua ativa: mineração manual ignorada")
+            return None
         self.logger.info("Iniciando mineração...")
         
         def on_progress(nonce: int):
@@ -383,40 +1399,308 @@ class Node:
         
         return block
     
-    def _send_message(self, peer_address: str, message: Message) -> Message | None:
-        """Envia mensagem para um peer e retorna resposta."""
+    def start_auto_mining(self):
+        """Minera continuamente, refazendo o candidato quando a ponta ou a mempool mudam."""
+        self.logger.info("Mineração contínua iniciada")
+        self.mining_service.start()
+    
+    def stop_auto_mining(self):
+        """Interrompe a mineração contínua."""
+        self.mining_service.stop()
+        self.logger.info("Mineração contínua interrompida")
+    
+    def _on_block_mined(self, block: Block):
+        """Recebe os blocos encontrados pela mineração contínua."""
+        self.logger.info(f"Bloco minerado! #{block.index} hash={block.hash[:16]}...")
+        try:
+            self.broadcast_block(block)
+        except Exception as e:
+            self.logger.error(f"Erro ao propagar bloco #{block.index}: {e}")
+    
+    def _send_message(self, peer_address: str, message: Message, retry_busy: bool = True) -> Message | None:
+        """
+        Envia mensagem para um peer e retorna resposta (None se o peer respondeu BUSY).
+        
+        Mensagens de relay (RELAY_TYPES) recusadas com BUSY são reenviadas
+        uma vez, após o retry_after do peer (limitado a MAX_BUSY_RETRY_AFTER).
+        """
+        message.sender = self.address
+        
+        if self.metrics.enabled:
+            labels = {"type": message.type.value}
+            self.metrics.inc("messages_sent_total", labels=labels)
+            with self.metrics.timer("send_seconds", labels):
+                response = self._deliver(peer_address, message)
+        else:
+            response = self._deliver(peer_address, message)
+        
+        if response and response.type == MessageType.BUSY:
+            delay = self._busy_retry_delay(message, response) if retry_busy else None
+            if delay is not None:
+                # Relay: quem chama já está em segundo plano, então espera aqui
+                self.metrics.inc("peer_busy_retries_total", labels={"type": message.type.value})
+                time.sleep(delay)
+                return self._send_message(peer_address, message, retry_busy=False)
+            self._log_busy(peer_address, message, response)
+            return None
+        return response
+    
+    def _busy_retry_delay(self, message: Message, response: Message) -> float | None:
+        """Espera antes de reenviar uma mensagem de relay recusada com BUSY (None: não reenvia)."""
+        if message.type not in self.RELAY_TYPES:
+            return None
+        try:
+            retry_after = float(response.payload.get("retry_after", self.BUSY_RETRY_AFTER))
+        except (TypeError, ValueError):
+            retry_after = self.BUSY_RETRY_AFTER
+        return min(max(retry_after, 0.0), self.MAX_BUSY_RETRY_AFTER)
+    
+    def _log_busy(self, peer_address: str, message: Message, response: Message):
+        self.logger.warning(
+            f"{peer_address} ocupado ({response.payload.get('reason')}): "
+            f"{message.type.value} descartado"
+        )
+        self.metrics.inc("peer_busy_total", labels={"type": message.type.value})
+    
+    def _on_session_busy(self, session: PeerSession, message: Message, response: Message):
+        """Agenda o reenvio (por _send_message, sem nova tentativa) de um relay recusado na sessão."""
+        delay = self._busy_retry_delay(message, response)
+        if delay is None:
+            self._log_busy(session.peer_address, message, response)
+            return
+        self.metrics.inc("peer_busy_retries_total", labels={"type": message.type.value})
+        timer = threading.Timer(delay, self._send_message, (session.peer_address, message), {"retry_busy": False})
+        timer.daemon = True
+        timer.start()
+    
+    def _deliver(self, peer_address: str, message: Message) -> Message | None:
+        """Envia pela sessão persistente, se houver, ou em uma conexão única."""
+        if self.persistent and peer_address not in self._legacy_peers:
+            try:
+                session = self._get_session(peer_address)
+            except Exception as e:
+                self.logger.error(f"Erro ao enviar para {peer_address}: {e}")
+                return None
+            
+            if session:
+                try:
+                    response = session.request(message)
+                    return None if response.type == MessageType.ACK else response
+                except Exception as e:
+                    # Sessão caiu (ex: peer reiniciou): tenta conexão única
+                    self.logger.debug(f"Sessão com {peer_address} falhou: {e}")
+                    self._drop_session(peer_address)
+        
+        return self._send_once(peer_address, message)
+    
+    def _send_once(self, peer_address: str, message: Message) -> Message | None:
+        """Envia mensagem em uma conexão nova (fechada após a resposta)."""
         try:
             host, port = peer_address.split(":")
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(10)
+                sock.settimeout(self.SEND_TIMEOUT)
                 sock.connect((host, int(port)))
                 
                 message.sender = self.address
-                sock.sendall(message.to_bytes())
+                sock.sendall(message.to_bytes(self._encoding_for(peer_address)))
                 
                 # Aguarda resposta
-                length_data = sock.recv(4)
-                if length_data:
-                    length = int.from_bytes(length_data, 'big')
-                    data = b""
-                    while len(data) < length:
-                        chunk = sock.recv(min(self.BUFFER_SIZE, length - len(data)))
-                        if not chunk:
-                            break
-                        data += chunk
-                    if data:
-                        return Message.from_bytes(data)
+                data = recv_frame(sock, self.BUFFER_SIZE, self.max_frame_size)
+                if data:
+                    return Message.from_bytes(data, self.max_frame_size)
         
         except Exception as e:
             self.logger.error(f"Erro ao enviar para {peer_address}: {e}")
         
         return None
     
+    def _get_session(self, peer_address: str) -> PeerSession | None:
+        """
+        Retorna a sessão persistente com o peer, abrindo-a se necessário.
+        
+        Retorna None se o peer não suporta sessões (ele passa a ser tratado
+        com uma conexão por mensagem). Lança OSError se estiver inacessível.
+        """
+        with self._sessions_lock:
+            session = self._sessions.get(peer_address)
+            if session and session.connected:
+                return session
+        
+        session = PeerSession(
+            peer_address,
+            self.address,
+            self.SEND_TIMEOUT,
+            self.BUFFER_SIZE,
+            encodings=self.encodings,
+            max_frame_size=self.max_frame_size,
+        )
+        if not session.connect():
+            self._legacy_peers.add(peer_address)
+            self.logger.info(f"Peer {peer_address} não suporta sessão persistente")
+            return None
+        self._peer_encodings[peer_address] = session.encoding
+        
+        with self._sessions_lock:
+            current = self._sessions.get(peer_address)
+            if current and current.connected:
+                # Outra thread abriu a sessão primeiro
+                session.close()
+                return current
+            self._sessions[peer_address] = session
+        self.logger.info(f"Sessão persistente aberta com {peer_address}")
+        return session
+    
+    def _drop_session(self, peer_address: str):
+        """Fecha e descarta a sessão com o peer."""
+        with self._sessions_lock:
+            session = self._sessions.pop(peer_address, None)
+        if session:
+            session.close()
+    
+    def _on_session_error(self, session: PeerSession, batch: list[Message], error: Exception):
+        """Reenvia por conexão única as mensagens de uma sessão que caiu."""
+        self.logger.debug(f"Sessão com {session.peer_address} falhou: {error}")
+        self._drop_session(session.peer_address)
+        for message in batch:
+            self._send_once(session.peer_address, message)
+    
     def _broadcast(self, message: Message, exclude: str = ""):
         """Envia mensagem para todos os peers."""
         message.sender = self.address
-        for peer in list(self.peers):
-            if peer != exclude:
+        with self.metrics.timer("broadcast_seconds", {"type": message.type.value}):
+            self._fan_out(message, [peer for peer in self.peers if peer != exclude])
+    
+    def _relay_block(self, block: Block, message: Message | None = None, exclude: str = ""):
+        """
+        Propaga um bloco novo (message: o NEW_BLOCK recebido, se houver).
+        
+        Blocos Merkle vão direto como COMPACT_BLOCK a quem os aceita; peers
+        com relay por inventário recebem só o anúncio (INV) e pedem o bloco
+        se não o tiverem; os demais recebem o NEW_BLOCK completo.
+        """
+        compact, announce, full = [], [], []
+        for peer in self.peers:
+            if peer == exclude:
+                continue
+            if block.merkle_root and peer in self._compact_peers:
+                compact.append(peer)
+            elif peer in self._inv_peers:
+                announce.append(peer)
+            else:
+                full.append(peer)
+        with self.metrics.timer("broadcast_seconds", {"type": MessageType.NEW_BLOCK.value}):
+            if compact:
+                compact_message = compact_block_message(block)
+                compact_message.sender = self.address
+                self._fan_out(compact_message, compact)
+            if announce:
+                self._announce_inventory(Protocol.inv([inventory_item(INV_BLOCK, block.hash)]), announce)
+            if full:
+                message = message or Protocol.new_block(block.to_dict())
+                message.sender = self.address
+                self._fan_out(message, full)
+    
+    def _relay_transactions(self, batch: list[tuple[Transaction, str]]):
+        """
+        Propaga um lote de transações (chamado pelo Batcher).
+        
+        Cada peer recebe as transações que não vieram dele: um INV se aceita
+        relay por inventário, um NEW_TRANSACTIONS se aceita lotes, ou uma
+        NEW_TRANSACTION por transação.
+        """
+        tx_dicts = {transaction.id: transaction.to_dict() for transaction, _ in batch}
+        with self.metrics.timer("broadcast_seconds", {"type": MessageType.NEW_TRANSACTIONS.value}):
+            for peer in self.peers:
+                transactions = [transaction for transaction, source in batch if source != peer]
+                if not transactions:
+                    continue
+                if peer in self._inv_peers:
+                    items = [inventory_item(INV_TX, transaction.id) for transaction in transactions]
+                    self._announce_inventory(Protocol.inv(items), [peer])
+                elif peer in self._batch_peers:
+                    message = Protocol.new_transactions([tx_dicts[tx.id] for tx in transactions])
+                    message.sender = self.address
+                    self._fan_out(message, [peer])
+                else:
+                    for transaction in transactions:
+                        message = Protocol.new_transaction(tx_dicts[transaction.id])
+                        message.sender = self.address
+                        self._fan_out(message, [peer])
+    
+    def _has_inventory(self, item: dict) -> bool:
+        """Verifica se o item anunciado já foi visto ou está na cadeia/mempool."""
+        kind, item_id = item.get("type"), item.get("id")
+        if kind not in INV_TYPES or not isinstance(item_id, str):
+            return True  # item desconhecido: não pede
+        if item_id in self.seen:
+            return True
+        if kind == INV_TX:
+            return self.blockchain.has_transaction(item_id)
+        return self.blockchain.find_block(item_id) is not None
+    
+    def _inventory_messages(self, items: list[dict], batch: bool = False) -> list[Message]:
+        """
+        Mensagens NEW_BLOCK/NEW_TRANSACTION dos itens pedidos que ainda
+        temos; com batch, as transações vão juntas em um NEW_TRANSACTIONS.
+        """
+        messages = []
+        tx_dicts = []
+        for item in items:
+            kind, item_id = item.get("type"), item.get("id")
+            if kind == INV_TX:
+                transaction = self.blockchain.get_pending_transaction(item_id)
+                if transaction is not None:
+                    tx_dicts.append(transaction.to_dict())
+            elif kind == INV_BLOCK:
+                block = self.blockchain.find_block(item_id)
+                if block is not None:
+                    messages.append(Protocol.new_block(block.to_dict()))
+        if batch and len(tx_dicts) > 1:
+            messages.append(Protocol.new_transactions(tx_dicts))
+        else:
+            messages.extend(Protocol.new_transaction(tx_dict) for tx_dict in tx_dicts)
+        return messages
+    
+    def _announce_inventory(self, inv: Message, peers: list[str]):
+        """Envia o INV a cada peer em segundo plano (ver _announce)."""
+        inv.sender = self.address
+        for peer in peers:
+            self._run_in_background(self._announce, peer, inv)
+    
+    def _announce(self, peer_address: str, inv: Message):
+        """Envia o INV e, se o peer responder GETDATA, os itens pedidos."""
+        response = self._send_message(peer_address, inv)
+        if response and response.type == MessageType.GETDATA:
+            self._send_inventory(peer_address, response.payload["items"][:self.MAX_INV])
+    
+    def _push_inventory(self, peer_address: str, items: list[dict]):
+        """Envia os itens pedidos ao peer em segundo plano."""
+        self._run_in_background(self._send_inventory, peer_address, items)
+    
+    def _send_inventory(self, peer_address: str, items: list[dict]):
+        for message in self._inventory_messages(items, peer_address in self._batch_peers):
+            self._send_message(peer_address, message)
+    
+    def _run_in_background(self, fn: Callable, *args):
+        """Executa fn no pool de envio (modo persistente) ou em uma thread."""
+        if self._send_executor:
+            self._send_executor.submit(fn, *args)
+        else:
+            threading.Thread(target=fn, args=args, daemon=True).start()
+    
+    def _fan_out(self, message: Message, peers: list[str]):
+        """Despacha a mensagem para cada peer (sem esperar as respostas)."""
+        for peer in peers:
+            if self._send_executor:
+                # Modo persistente: pipeline na sessão existente ou tarefa
+                # no pool limitado (que abre a sessão ou usa conexão única)
+                with self._sessions_lock:
+                    session = self._sessions.get(peer)
+                if session and session.connected:
+                    session.send(message, self._send_executor, self._on_session_error, self._on_session_busy)
+                else:
+                    self._send_executor.submit(self._send_message, peer, message)
+            else:
                 threading.Thread(
                     target=self._send_message,
                     args=(peer, message)
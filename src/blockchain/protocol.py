@@ -1,9 +1,39 @@
 import json
+import socket
+import zlib
 from enum import Enum
 from dataclasses import dataclass
 from typing import Any
 
 
+# Codificações de frame. JSON puro é o padrão entre equipes; "zlib" (JSON
+# compacto comprimido) só é usado com peers que o aceitaram no handshake.
+ENCODING_JSON = "json"
+ENCODING_ZLIB = "zlib"
+SUPPORTED_ENCODINGS = [ENCODING_ZLIB]
+
+# Prefixo dos frames comprimidos (um JSON nunca começa com byte nulo)
+ZLIB_MAGIC = b"\x00Z"
+
+# Corpos menores que isso vão sempre em JSON puro (compressão não compensa)
+COMPRESS_THRESHOLD = 1024
+
+# Tamanho máximo aceito para um frame recebido
+MAX_FRAME_SIZE = 64 * 1024 * 1024  # 64MB
+
+# Buffer inicial de um frame recebido; cresce conforme os dados chegam
+FRAME_PREALLOC = 64 * 1024  # 64KB
+
+
+class RawJSON(str):
+    """
+    Valor de payload já serializado em JSON.
+    
+    Message.to_json() insere o texto como está, sem decodificar e
+    re-serializar (ex: cadeia montada a partir de fragmentos em cache).
+    """
+
+
 class MessageType(Enum):
     """
     Tipos de mensagens do protocolo.
@@ -16,6 +46,18 @@ class MessageType(Enum):
     - PONG: resposta ao ping
     - DISCOVER_PEERS: descoberta de novos nós
     - PEERS_LIST: lista de peers conhecidos
+    - ACK: confirmação de mensagens sem resposta (somente em sessões persistentes)
+    - REQUEST_HEADERS / RESPONSE_HEADERS: cabeçalhos de um intervalo da cadeia
+    - REQUEST_BLOCKS / RESPONSE_BLOCKS: blocos de um intervalo da cadeia
+    - GET_METRICS / METRICS: métricas do nó (contadores, gauges, histogramas)
+    - INV: anúncio de ids de transações e hashes de blocos disponíveis
+    - GETDATA: pedido dos itens anunciados que o nó ainda não tem
+    - NEW_TRANSACTIONS: lote de transações novas
+    - COMPACT_BLOCK: bloco Merkle como cabeçalho + ids curtos das transações
+    - GET_BLOCK_TXS / BLOCK_TXS: transações de um bloco compacto que faltaram
+    - GET_TX / TX: transação por id, com o bloco e a prova de inclusão
+    - GET_BALANCE / BALANCE: saldo de um endereço (índices do nó)
+    - BUSY: resposta de um nó sobrecarregado (mensagem descartada, tente depois)
     """
     NEW_TRANSACTION = "NEW_TRANSACTION"
     NEW_BLOCK = "NEW_BLOCK"
@@ -27,6 +69,24 @@ class MessageType(Enum):
     PONG = "PONG"
     DISCOVER_PEERS = "DISCOVER_PEERS"
     PEERS_LIST = "PEERS_LIST"
+    ACK = "ACK"
+    REQUEST_HEADERS = "REQUEST_HEADERS"
+    RESPONSE_HEADERS = "RESPONSE_HEADERS"
+    REQUEST_BLOCKS = "REQUEST_BLOCKS"
+    RESPONSE_BLOCKS = "RESPONSE_BLOCKS"
+    GET_METRICS = "GET_METRICS"
+    METRICS = "METRICS"
+    INV = "INV"
+    GETDATA = "GETDATA"
+    BUSY = "BUSY"
+    NEW_TRANSACTIONS = "NEW_TRANSACTIONS"
+    COMPACT_BLOCK = "COMPACT_BLOCK"
+    GET_BLOCK_TXS = "GET_BLOCK_TXS"
+    BLOCK_TXS = "BLOCK_TXS"
+    GET_TX = "GET_TX"
+    TX = "TX"
+    GET_BALANCE = "GET_BALANCE"
+    BALANCE = "BALANCE"
 
 
 @dataclass
@@ -36,13 +96,28 @@ class Message:
     payload: dict[str, Any]
     sender: str = ""  # host:port do remetente
     
-    def to_json(self) -> str:
-        """Serializa mensagem para JSON."""
-        return json.dumps({
-            "type": self.type.value,
-            "payload": self.payload,
-            "sender": self.sender,
-        })
+    def to_json(self, compact: bool = False) -> str:
+        """Serializa mensagem para JSON (compact remove espaços dos separadores)."""
+        separators = (",", ":") if compact else None
+        if not any(isinstance(value, RawJSON) for value in self.payload.values()):
+            return json.dumps({
+                "type": self.type.value,
+                "payload": self.payload,
+                "sender": self.sender,
+            }, separators=separators)
+        
+        # Monta o payload à mão para embutir os valores RawJSON sem reprocessá-los
+        item_sep, key_sep = separators or (", ", ": ")
+        payload = item_sep.join(
+            json.dumps(key) + key_sep
+            + (value if isinstance(value, RawJSON) else json.dumps(value, separators=separators))
+            for key, value in self.payload.items()
+        )
+        return (
+            "{" + json.dumps("type") + key_sep + json.dumps(self.type.value) + item_sep
+            + json.dumps("payload") + key_sep + "{" + payload + "}" + item_sep
+            + json.dumps("sender") + key_sep + json.dumps(self.sender) + "}"
+        )
     
     @classmethod
     def from_json(cls, data: str) -> "Message":
@@ -54,20 +129,104 @@ class Message:
             sender=parsed.get("sender", ""),
         )
     
-    def to_bytes(self) -> bytes:
-        """Converte para bytes para envio via socket."""
-        json_str = self.to_json()
+    def to_bytes(self, encoding: str = ENCODING_JSON) -> bytes:
+        """
+        Converte para bytes para envio via socket.
+        
+        Com encoding="zlib" mensagens grandes (>= COMPRESS_THRESHOLD) vão
+        como JSON compacto comprimido, prefixado por ZLIB_MAGIC.
+        """
+        if encoding == ENCODING_ZLIB:
+            body = self.to_json(compact=True).encode()
+            if len(body) >= COMPRESS_THRESHOLD:
+                body = ZLIB_MAGIC + zlib.compress(body)
+        else:
+            body = self.to_json().encode()
         # Adiciona tamanho da mensagem no início (4 bytes)
-        length = len(json_str.encode())
-        return length.to_bytes(4, 'big') + json_str.encode()
+        return len(body).to_bytes(4, 'big') + body
     
     @classmethod
-    def from_bytes(cls, data: bytes) -> "Message":
-        """Cria mensagem a partir de bytes."""
+    def from_bytes(cls, data: bytes | bytearray, max_size: int = MAX_FRAME_SIZE) -> "Message":
+        """
+        Cria mensagem a partir de bytes (JSON puro ou comprimido).
+        
+        Um corpo comprimido não pode passar de max_size bytes descomprimido
+        (use o mesmo limite de frame do nó).
+        """
+        if data[:len(ZLIB_MAGIC)] == ZLIB_MAGIC:
+            # Limita a expansão para não aceitar "bombas" de compressão
+            inflater = zlib.decompressobj()
+            data = inflater.decompress(memoryview(data)[len(ZLIB_MAGIC):], max_size)
+            if inflater.unconsumed_tail:
+                raise ValueError(f"Frame descomprimido excede o máximo de {max_size}")
         json_str = data.decode()
         return cls.from_json(json_str)
 
 
+def frame_encoding(data: bytes | bytearray) -> str:
+    """Codificação usada em um frame recebido (para responder na mesma)."""
+    return ENCODING_ZLIB if data[:len(ZLIB_MAGIC)] == ZLIB_MAGIC else ENCODING_JSON
+
+
+def choose_encoding(offered: list[str]) -> str:
+    """Escolhe a primeira codificação oferecida pelo peer que suportamos."""
+    for encoding in offered:
+        if encoding in SUPPORTED_ENCODINGS:
+            return encoding
+    return ENCODING_JSON
+
+
+def recv_length(sock: socket.socket, max_size: int = MAX_FRAME_SIZE) -> int | None:
+    """
+    Lê o prefixo de tamanho (4 bytes big-endian) de um frame.
+    
+    Retorna None se a conexão foi fechada; lança ValueError se o frame
+    anunciado excede max_size.
+    """
+    length_data = b""
+    while len(length_data) < 4:
+        chunk = sock.recv(4 - len(length_data))
+        if not chunk:
+            return None
+        length_data += chunk
+    
+    length = int.from_bytes(length_data, 'big')
+    if length > max_size:
+        raise ValueError(f"Frame de {length} bytes excede o máximo de {max_size}")
+    return length
+
+
+def recv_frame(
+    sock: socket.socket,
+    buffer_size: int = 65536,
+    max_size: int = MAX_FRAME_SIZE,
+) -> bytearray | None:
+    """
+    Lê um frame (4 bytes big-endian com o tamanho + corpo) do socket.
+    
+    O corpo é lido direto em um buffer (sem concatenações) que começa com
+    até FRAME_PREALLOC bytes e dobra só depois de cheio: o tamanho anunciado
+    não é confiável, e um peer que manda só o prefixo não reserva memória.
+    Retorna None se a conexão foi fechada antes de um frame completo.
+    """
+    length = recv_length(sock, max_size)
+    if not length:
+        return None
+    
+    data = bytearray(min(length, FRAME_PREALLOC))
+    received = 0
+    while received < length:
+        if received == len(data):
+            data.extend(bytes(min(len(data), length - len(data))))
+        with memoryview(data) as view:
+            n = sock.recv_into(view[received:], min(buffer_size, len(data) - received))
+        if not n:
+            return None
+        received += n
+    
+    return data
+
+
 class Protocol:
     """
     Factory para criação de mensagens do protocolo.
@@ -81,6 +240,14 @@ class Protocol:
             payload={"transaction": transaction_dict},
         )
     
+    @staticmethod
+    def new_transactions(transaction_dicts: list[dict]) -> Message:
+        """Cria mensagem com um lote de transações (opcional, negociado no PING)."""
+        return Message(
+            type=MessageType.NEW_TRANSACTIONS,
+            payload={"transactions": transaction_dicts},
+        )
+    
     @staticmethod
     def new_block(block_dict: dict) -> Message:
         """Cria mensagem de novo bloco minerado."""
@@ -89,6 +256,69 @@ class Protocol:
             payload={"block": block_dict},
         )
     
+    @staticmethod
+    def compact_block(header: dict, short_ids: list[str], prefilled: list[dict]) -> Message:
+        """
+        Cria bloco compacto: cabeçalho (Block.compact_header()), id curto de
+        cada transação e as transações enviadas inteiras ({"index", "transaction"}).
+        """
+        return Message(
+            type=MessageType.COMPACT_BLOCK,
+            payload={"header": header, "short_ids": short_ids, "prefilled": prefilled},
+        )
+    
+    @staticmethod
+    def get_block_txs(block_hash: str, indexes: list[int]) -> Message:
+        """Cria pedido das transações (por posição) de um bloco compacto."""
+        return Message(
+            type=MessageType.GET_BLOCK_TXS,
+            payload={"hash": block_hash, "indexes": indexes},
+        )
+    
+    @staticmethod
+    def block_txs(block_hash: str, transactions: list[dict]) -> Message:
+        """Cria resposta com as transações pedidas, na ordem das posições."""
+        return Message(
+            type=MessageType.BLOCK_TXS,
+            payload={"hash": block_hash, "transactions": transactions},
+        )
+    
+    @staticmethod
+    def get_tx(tx_id: str) -> Message:
+        """Cria consulta de uma transação pelo id."""
+        return Message(
+            type=MessageType.GET_TX,
+            payload={"id": tx_id},
+        )
+    
+    @staticmethod
+    def tx(tx_id: str, status: str, height: int, **fields) -> Message:
+        """
+        Cria resposta a GET_TX. status é "confirmed", "pending" ou "unknown";
+        fields traz a transação e, se confirmada, block_index, header e a
+        prova de inclusão (proof, ou transactions em blocos legados).
+        """
+        return Message(
+            type=MessageType.TX,
+            payload={"id": tx_id, "status": status, "height": height, **fields},
+        )
+    
+    @staticmethod
+    def get_balance(address: str) -> Message:
+        """Cria consulta do saldo de um endereço."""
+        return Message(
+            type=MessageType.GET_BALANCE,
+            payload={"address": address},
+        )
+    
+    @staticmethod
+    def balance(account: dict) -> Message:
+        """Cria resposta com o saldo de um endereço (Blockchain.get_account())."""
+        return Message(
+            type=MessageType.BALANCE,
+            payload=account,
+        )
+    
     @staticmethod
     def request_chain() -> Message:
         """Cria mensagem de solicitação da blockchain."""
@@ -98,13 +328,88 @@ class Protocol:
         )
     
     @staticmethod
-    def response_chain(blockchain_dict: dict) -> Message:
+    def response_chain(blockchain_dict: dict | RawJSON) -> Message:
         """Cria mensagem de resposta com a blockchain."""
         return Message(
             type=MessageType.RESPONSE_CHAIN,
             payload={"blockchain": blockchain_dict},
         )
     
+    @staticmethod
+    def request_headers(from_index: int, count: int) -> Message:
+        """Cria mensagem de solicitação de cabeçalhos [from_index, from_index + count)."""
+        return Message(
+            type=MessageType.REQUEST_HEADERS,
+            payload={"from_index": from_index, "count": count},
+        )
+    
+    @staticmethod
+    def response_headers(height: int, headers: list[dict]) -> Message:
+        """Cria mensagem de resposta com cabeçalhos e a altura da cadeia."""
+        return Message(
+            type=MessageType.RESPONSE_HEADERS,
+            payload={"height": height, "headers": headers},
+        )
+    
+    @staticmethod
+    def request_blocks(from_index: int, count: int) -> Message:
+        """Cria mensagem de solicitação de blocos [from_index, from_index + count)."""
+        return Message(
+            type=MessageType.REQUEST_BLOCKS,
+            payload={"from_index": from_index, "count": count},
+        )
+    
+    @staticmethod
+    def response_blocks(height: int, blocks: list[dict] | RawJSON) -> Message:
+        """Cria mensagem de resposta com blocos e a altura da cadeia."""
+        return Message(
+            type=MessageType.RESPONSE_BLOCKS,
+            payload={"height": height, "blocks": blocks},
+        )
+    
+    @staticmethod
+    def get_metrics() -> Message:
+        """Cria mensagem de solicitação das métricas do nó."""
+        return Message(
+            type=MessageType.GET_METRICS,
+            payload={},
+        )
+    
+    @staticmethod
+    def metrics(snapshot: dict) -> Message:
+        """Cria mensagem de resposta com as métricas do nó (Metrics.snapshot())."""
+        return Message(
+            type=MessageType.METRICS,
+            payload={"metrics": snapshot},
+        )
+    
+    @staticmethod
+    def inv(items: list[dict]) -> Message:
+        """Cria anúncio de inventário (itens {"type": "tx"|"block", "id": ...})."""
+        return Message(
+            type=MessageType.INV,
+            payload={"items": items},
+        )
+    
+    @staticmethod
+    def getdata(items: list[dict]) -> Message:
+        """Cria pedido dos itens de inventário que faltam (mesmo formato do INV)."""
+        return Message(
+            type=MessageType.GETDATA,
+            payload={"items": items},
+        )
+    
+    @staticmethod
+    def busy(reason: str, retry_after: float) -> Message:
+        """
+        Cria resposta de nó sobrecarregado: a mensagem não foi processada e
+        pode ser reenviada após retry_after segundos.
+        """
+        return Message(
+            type=MessageType.BUSY,
+            payload={"reason": reason, "retry_after": retry_after},
+        )
+    
     @staticmethod
     def request_mempool() -> Message:
         """Cria mensagem de solicitação da mempool."""
@@ -122,18 +427,76 @@ class Protocol:
         )
 
     @staticmethod
-    def ping() -> Message:
-        """Cria mensagem de ping."""
+    def ping(
+        keep_alive: bool = False,
+        encodings: list[str] | None = None,
+        inv: bool = False,
+        batch: bool = False,
+        compact_blocks: bool = False,
+    ) -> Message:
+        """
+        Cria mensagem de ping.
+        
+        Com keep_alive=True pede ao peer que mantenha a conexão aberta
+        (sessão persistente). encodings oferece codificações compactas,
+        inv anuncia suporte ao relay por inventário (INV/GETDATA), batch
+        aos lotes de transações (NEW_TRANSACTIONS) e compact_blocks aos
+        blocos compactos (COMPACT_BLOCK).
+        Peers sem suporte ignoram os campos e respondem PONG simples.
+        """
+        payload = {}
+        if keep_alive:
+            payload["keep_alive"] = True
+        if encodings:
+            payload["encodings"] = encodings
+        if inv:
+            payload["inv"] = True
+        if batch:
+            payload["batch"] = True
+        if compact_blocks:
+            payload["compact_blocks"] = True
         return Message(
             type=MessageType.PING,
-            payload={},
+            payload=payload,
         )
     
     @staticmethod
-    def pong() -> Message:
-        """Cria mensagem de pong."""
+    def pong(
+        keep_alive: bool = False,
+        encoding: str | None = None,
+        inv: bool = False,
+        batch: bool = False,
+        compact_blocks: bool = False,
+    ) -> Message:
+        """
+        Cria mensagem de pong.
+        
+        keep_alive confirma a sessão persistente; encoding informa a
+        codificação escolhida entre as oferecidas no PING; inv, batch e
+        compact_blocks confirmam o relay por inventário, os lotes de
+        transações e os blocos compactos.
+        """
+        payload = {}
+        if keep_alive:
+            payload["keep_alive"] = True
+        if encoding:
+            payload["encoding"] = encoding
+        if inv:
+            payload["inv"] = True
+        if batch:
+            payload["batch"] = True
+        if compact_blocks:
+            payload["compact_blocks"] = True
         return Message(
             type=MessageType.PONG,
+            payload=payload,
+        )
+    
+    @staticmethod
+    def ack() -> Message:
+        """Cria confirmação para mensagens sem resposta em sessões persistentes."""
+        return Message(
+            type=MessageType.ACK,
             payload={},
         )
     
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from .block import Block
+from .protocol import Message, Protocol
+
+
+# Tipos de item de inventário (INV / GETDATA)
+INV_TX = "tx"
+INV_BLOCK = "block"
+INV_TYPES = (INV_TX, INV_BLOCK)
+
+
+# Caracteres do id da transação usados como id curto nos blocos compactos
+SHORT_ID_LENGTH = 12
+
+
+def inventory_item(kind: str, item_id: str) -> dict[str, str]:
+    """Item de inventário: tipo (INV_TX ou INV_BLOCK) e id da transação ou hash do bloco."""
+    return {"type": kind, "id": item_id}
+
+
+def short_id(tx_id: str) -> str:
+    """Id curto de uma transação (prefixo do id) em um bloco compacto."""
+    return tx_id[:SHORT_ID_LENGTH]
+
+
+def compact_block_message(block: Block) -> Message:
+    """
+    Bloco Merkle como COMPACT_BLOCK: cabeçalho e o id curto de cada
+    transação. A coinbase, que nenhum peer tem na mempool, vai inteira.
+    """
+    prefilled = [
+        {"index": index, "transaction": tx.to_dict()}
+        for index, tx in enumerate(block.transactions)
+        if tx.origem == "coinbase"
+    ]
+    short_ids = [short_id(tx.id) for tx in block.transactions]
+    return Protocol.compact_block(block.compact_header(), short_ids, prefilled)
+
+
+class SeenCache:
+    """
+    Conjunto limitado (LRU) dos ids de transações e hashes de blocos já vistos.
+
+    Um item visto não é processado nem repassado de novo, o que corta os
+    ecos de um relay em malha. Passando de capacity itens, os menos
+    recentemente vistos são esquecidos; um item esquecido que volte é
+    tratado como novo e barrado pela própria Blockchain (duplicata).
+    """
+
+    CAPACITY = 20000
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._items: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item_id: str) -> bool:
+        """Marca o item como visto; retorna False se ele já tinha sido visto."""
+        with self._lock:
+            if item_id in self._items:
+                self._items.move_to_end(item_id)
+                return False
+            self._items[item_id] = None
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+            return True
+
+    def discard(self, item_id: str):
+        """Esquece o item (ex: bloco que não pôde ser obtido), para aceitá-lo de novo."""
+        with self._lock:
+            self._items.pop(item_id, None)
+
+
+class InFlightRequests:
+    """
+    Itens já pedidos por GETDATA e ainda não recebidos.
+    
+    Quando vários peers anunciam o mesmo item, só o primeiro anúncio gera
+    GETDATA; os demais são ignorados até o item chegar (done) ou o pedido
+    expirar (timeout segundos), quando o próximo anunciante é atendido.
+    """
+    
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._items: OrderedDict[str, float] = OrderedDict()  # id -> prazo
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def claim(self, item_id: str) -> bool:
+        """Registra o pedido do item; retorna False se ele já está pedido (e no prazo)."""
+        now = time.monotonic()
+        with self._lock:
+            # Prazos crescem na ordem de inserção: descarta os vencidos do início
+            while self._items and next(iter(self._items.values())) <= now:
+                self._items.popitem(last=False)
+            if item_id in self._items:
+                return False
+            self._items[item_id] = now + self.timeout
+            return True
+    
+    def done(self, item_id: str):
+        """O item chegou (aceito ou não): libera novos pedidos dele."""
+        with self._lock:
+            self._items.pop(item_id, None)
+
+
+class Batcher:
+    """
+    Agrupa itens para despachá-los juntos (ex: transações a propagar).
+
+    flush(itens) é chamado quando o lote chega a max_size itens ou window
+    segundos após o primeiro item do lote, o que vier antes. Com window 0
+    cada item é despachado imediatamente.
+    """
+
+    def __init__(self, flush: Callable[[list], None], window: float, max_size: int):
+        self._flush = flush
+        self.window = window
+        self.max_size = max_size
+        self._items: list[Any] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def add(self, item: Any):
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) < self.max_size and self.window > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Despacha o lote atual (se houver) imediatamente."""
+        with self._lock:
+            items, self._items = self._items, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if items:
+            self._flush(items)
+
+    def close(self):
+        """Descarta o lote pendente e cancela o timer."""
+        with self._lock:
+            self._items = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
@@ -0,0 +1,169 @@
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Executor
+
+from .protocol import Protocol, Message, MessageType, recv_frame, ENCODING_JSON, MAX_FRAME_SIZE
+
+
+class PeerSession:
+    """
+    Conexão TCP persistente com um peer.
+    
+    A sessão é negociada com um PING {"keep_alive": true}: se o peer
+    responder PONG com keep_alive, a conexão fica aberta e cada frame
+    enviado recebe exatamente um frame de resposta (ACK quando a mensagem
+    não tem resposta própria). Peers que não suportam sessões respondem
+    PONG simples e fecham a conexão, e o nó volta a abrir uma conexão
+    por mensagem. O mesmo PING oferece as codificações compactas, e a
+    escolhida pelo peer é usada em todos os frames da sessão.
+    
+    Mensagens enviadas com send() entram em uma fila e são transmitidas
+    em pipeline: vários frames são escritos antes de ler as respostas.
+    """
+    
+    PIPELINE_DEPTH = 64  # Máximo de frames em voo por rodada
+    
+    def __init__(
+        self,
+        peer_address: str,
+        sender: str,
+        timeout: float = 10,
+        buffer_size: int = 65536,
+        encodings: list[str] | None = None,
+        max_frame_size: int = MAX_FRAME_SIZE,
+    ):
+        self.peer_address = peer_address
+        self.sender = sender
+        self.timeout = timeout
+        self.buffer_size = buffer_size
+        self.encodings = encodings or []
+        self.encoding = ENCODING_JSON
+        self.max_frame_size = max_frame_size
+        
+        self.sock: socket.socket | None = None
+        self._lock = threading.Lock()
+        self._outbox: deque[Message] = deque()
+        self._draining = False
+        self._outbox_lock = threading.Lock()
+    
+    @property
+    def connected(self) -> bool:
+        return self.sock is not None
+    
+    def connect(self) -> bool:
+        """
+        Abre a conexão e negocia a sessão persistente.
+        
+        Retorna False se o peer não suporta sessões (já fecha o socket).
+        Lança OSError se o peer estiver inacessível ou ocupado (BUSY).
+        """
+        host, port = self.peer_address.split(":")
+        sock = socket.create_connection((host, int(port)), timeout=self.timeout)
+        try:
+            handshake = Protocol.ping(keep_alive=True, encodings=self.encodings or None)
+            handshake.sender = self.sender
+            sock.sendall(handshake.to_bytes())
+            data = recv_frame(sock, self.buffer_size, self.max_frame_size)
+        except OSError:
+            sock.close()
+            raise
+        
+        if not data:
+            sock.close()
+            return False
+        response = Message.from_bytes(data, self.max_frame_size)
+        if response.type == MessageType.BUSY:
+            # Peer sobrecarregado: não significa que ele não suporta sessões
+            sock.close()
+            raise ConnectionError(f"Peer {self.peer_address} ocupado ({response.payload.get('reason')})")
+        if response.type != MessageType.PONG or not response.payload.get("keep_alive"):
+            sock.close()
+            return False
+        
+        encoding = response.payload.get("encoding", ENCODING_JSON)
+        self.encoding = encoding if encoding in self.encodings else ENCODING_JSON
+        self.sock = sock
+        return True
+    
+    def request(self, message: Message) -> Message:
+        """Envia uma mensagem e aguarda a resposta na mesma conexão."""
+        return self.request_many([message])[0]
+    
+    def request_many(self, messages: list[Message]) -> list[Message]:
+        """
+        Envia várias mensagens em pipeline e lê as respostas em ordem.
+        
+        Lança ConnectionError (e fecha a sessão) se a conexão cair.
+        """
+        with self._lock:
+            if self.sock is None:
+                raise ConnectionError(f"Sessão com {self.peer_address} fechada")
+            try:
+                frames = []
+                for message in messages:
+                    message.sender = self.sender
+                    frames.append(message.to_bytes(self.encoding))
+                self.sock.sendall(b"".join(frames))
+                
+                responses = []
+                for _ in messages:
+                    data = recv_frame(self.sock, self.buffer_size, self.max_frame_size)
+                    if not data:
+                        raise ConnectionError(f"Sessão com {self.peer_address} encerrada pelo peer")
+                    responses.append(Message.from_bytes(data, self.max_frame_size))
+                return responses
+            except (OSError, ValueError):
+                self._close_locked()
+                raise
+    
+    def send(self, message: Message, executor: Executor, on_error=None, on_busy=None):
+        """
+        Enfileira uma mensagem para envio assíncrono em pipeline.
+        
+        No máximo uma tarefa de envio por sessão fica ativa no executor;
+        ela esvazia a fila em rodadas de até PIPELINE_DEPTH frames.
+        on_busy(sessão, mensagem, resposta) é chamado para cada mensagem
+        que o peer recusou com BUSY.
+        """
+        with self._outbox_lock:
+            self._outbox.append(message)
+            if self._draining:
+                return
+            self._draining = True
+        executor.submit(self._drain, on_error, on_busy)
+    
+    def _drain(self, on_error=None, on_busy=None):
+        """Esvazia a fila de envio (executa no pool de envio)."""
+        while True:
+            with self._outbox_lock:
+                if not self._outbox:
+                    self._draining = False
+                    return
+                batch = [
+                    self._outbox.popleft()
+                    for _ in range(min(self.PIPELINE_DEPTH, len(self._outbox)))
+                ]
+            try:
+                responses = self.request_many(batch)
+            except Exception as e:
+                if on_error:
+                    on_error(self, batch, e)
+                continue
+            if on_busy:
+                for message, response in zip(batch, responses):
+                    if response.type == MessageType.BUSY:
+                        on_busy(self, message, response)
+    
+    def close(self):
+        """Fecha a conexão."""
+        with self._lock:
+            self._close_locked()
+    
+    def _close_locked(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
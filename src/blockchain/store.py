@@ -0,0 +1,274 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from .block import Block
+
+
+class BlockStore:
+    """
+    Armazenamento em disco, somente-anexação, dos blocos da cadeia.
+    
+    Arquivos no diretório:
+    - blocks.dat: blocos em JSON, cada um prefixado por 4 bytes de tamanho
+    - blocks.idx: um registro de tamanho fixo por bloco (offset, tamanho)
+    - checkpoint.json: altura até a qual os blocos já foram validados e o
+      estado (saldos e índice de transações) nessa altura
+    
+    Blocos até o checkpoint são confiáveis na carga (não são re-hasheados)
+    e o estado salvo é reaproveitado; só os blocos gravados depois dele
+    precisam ser validados. Um reorg trunca os arquivos no ponto de
+    divergência. Registros incompletos (ex: queda no meio de uma escrita)
+    são descartados ao abrir.
+    
+    Os blocos são lidos de um mapeamento em memória (mmap) do blocks.dat;
+    em memória fica só um array com o offset de cada bloco.
+    """
+    
+    DATA_FILE = "blocks.dat"
+    INDEX_FILE = "blocks.idx"
+    CHECKPOINT_FILE = "checkpoint.json"
+    
+    _RECORD = struct.Struct(">QI")  # offset no blocks.dat, tamanho do corpo
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._data = open(self._path(self.DATA_FILE), "a+b")
+        self._index = open(self._path(self.INDEX_FILE), "a+b")
+        self._offsets = array("Q")  # offset de cada bloco em blocks.dat
+        self._size = 0  # fim do último registro válido em blocks.dat
+        self._map: mmap.mmap | None = None
+        self.checkpoint_height = 0
+        
+        self._recover()
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+    
+    def _recover(self):
+        """Lê o índice e descarta registros que não chegaram inteiros ao disco."""
+        self._index.seek(0)
+        raw = self._index.read()
+        data_size = os.fstat(self._data.fileno()).st_size
+        
+        for pos in range(0, len(raw) - self._RECORD.size + 1, self._RECORD.size):
+            offset, length = self._RECORD.unpack_from(raw, pos)
+            end = offset + 4 + length
+            if offset != self._size or end > data_size:
+                break
+            self._offsets.append(offset)
+            self._size = end
+        
+        self._index.truncate(len(self._offsets) * self._RECORD.size)
+        self._data.truncate(self._size)
+        
+        checkpoint = self.load_checkpoint()
+        self.checkpoint_height = checkpoint["height"] if checkpoint else 0
+    
+    def __len__(self) -> int:
+        return len(self._offsets)
+    
+    def read_bytes(self, index: int) -> bytes:
+        """Retorna o JSON serializado de um bloco."""
+        with self._lock:
+            if index < 0:
+                index += len(self._offsets)
+            start = self._offsets[index] + 4
+            end = self._offsets[index + 1] if index + 1 < len(self._offsets) else self._size
+            if self._map is None or len(self._map) < end:
+                # Remapeia para incluir os blocos anexados desde o último mapeamento
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._data.fileno(), self._size, access=mmap.ACCESS_READ)
+            return self._map[start:end]
+    
+    def read(self, index: int) -> Block:
+        """Lê e decodifica um bloco pelo índice."""
+        return Block.from_dict(json.loads(self.read_bytes(index)))
+    
+    def load(self) -> list[Block]:
+        """Lê todos os blocos armazenados, em ordem."""
+        return [self.read(i) for i in range(len(self._offsets))]
+    
+    def append(self, block: Block):
+        """Anexa um bloco (deve ser o próximo índice)."""
+        body = block.to_json().encode()
+        with self._lock:
+            if block.index != len(self._offsets):
+                raise ValueError(
+                    f"Bloco {block.index} fora de ordem (esperado {len(self._offsets)})"
+                )
+            self._data.write(len(body).to_bytes(4, 'big') + body)
+            self._data.flush()
+            self._index.write(self._RECORD.pack(self._size, len(body)))
+            self._index.flush()
+            self._offsets.append(self._size)
+            self._size += 4 + len(body)
+    
+    def truncate(self, height: int):
+        """Descarta os blocos a partir do índice height (reorg)."""
+        with self._lock:
+            if height >= len(self._offsets):
+                return
+            self._size = self._offsets[height]
+            del self._offsets[height:]
+            if self._map is not None:
+                # Acessar um mapeamento além do fim do arquivo derruba o processo
+                self._map.close()
+                self._map = None
+            self._data.truncate(self._size)
+            self._index.truncate(height * self._RECORD.size)
+            
+            if self.checkpoint_height > height:
+                # O estado salvo inclui blocos revertidos: deixa de valer
+                os.remove(self._path(self.CHECKPOINT_FILE))
+                self.checkpoint_height = 0
+    
+    def load_checkpoint(self) -> dict[str, Any] | None:
+        """Retorna o último checkpoint, ou None se não houver um válido."""
+        try:
+            with open(self._path(self.CHECKPOINT_FILE)) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not 0 < checkpoint.get("height", 0) <= len(self._offsets):
+            return None
+        return checkpoint
+    
+    def save_checkpoint(self, checkpoint: dict[str, Any]):
+        """
+        Grava um checkpoint ({"height", "tip", ...estado}).
+        
+        Os blocos são sincronizados no disco antes, e o arquivo é trocado
+        atomicamente, então um checkpoint nunca aponta para blocos perdidos.
+        """
+        with self._lock:
+            os.fsync(self._data.fileno())
+            os.fsync(self._index.fileno())
+            
+            tmp_path = self._path(self.CHECKPOINT_FILE + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(self.CHECKPOINT_FILE))
+            self.checkpoint_height = checkpoint["height"]
+    
+    def close(self):
+        """Fecha os arquivos."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._data.close()
+            self._index.close()
+
+
+class LazyChain(Sequence[Block]):
+    """
+    Cadeia de blocos com o histórico decodificado sob demanda.
+    
+    Os blocos abaixo de `cold_height` ficam apenas no BlockStore (mmap) e
+    viram objetos Block só quando acessados; um cache LRU pequeno guarda os
+    mais recentes. Os últimos blocos (hot_size) ficam sempre em memória.
+    
+    Funciona como uma lista para o resto do código: len, índices, fatias,
+    iteração, append/extend e `del chain[i:]` (reorg). Blocos novos entram
+    na parte quente e só saem dela com evict(), depois de gravados no store.
+    
+    Leituras concorrentes (sob o lado de leitura do RWLock da Blockchain)
+    alteram o cache LRU, então ele tem um lock próprio.
+    """
+    
+    def __init__(self, store: BlockStore, cold_height: int, hot_size: int = 64, cache_size: int = 256):
+        self.store = store
+        self.hot_size = hot_size
+        self.cache_size = cache_size
+        self._cold_height = cold_height
+        self._hot: list[Block] = []
+        self._cache: OrderedDict[int, Block] = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return self._cold_height + len(self._hot)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice de bloco fora da cadeia")
+        return self._get(index)
+    
+    def _get(self, index: int) -> Block:
+        if index >= self._cold_height:
+            return self._hot[index - self._cold_height]
+        
+        with self._cache_lock:
+            block = self._cache.get(index)
+            if block is not None:
+                self._cache.move_to_end(index)
+                return block
+        # Decodifica fora do lock; dois leitores podem decodificar o mesmo bloco
+        block = self.store.read(index)
+        with self._cache_lock:
+            self._cache[index] = block
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return block
+    
+    def __iter__(self) -> Iterator[Block]:
+        # Percorre o histórico sem poluir o cache (ex: exibir a cadeia inteira)
+        for index in range(self._cold_height):
+            yield self._cache.get(index) or self.store.read(index)
+        yield from list(self._hot)
+    
+    def uncached_slice(self, start: int, stop: int) -> list[Block]:
+        """Blocos [start, stop) sem passar pelo cache (como a iteração)."""
+        stop = min(stop, len(self))
+        cold = [self._cache.get(i) or self.store.read(i) for i in range(start, min(stop, self._cold_height))]
+        hot = self._hot[max(0, start - self._cold_height):max(0, stop - self._cold_height)]
+        return cold + hot
+    
+    def __delitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None or index.stop is not None:
+            raise TypeError("LazyChain só suporta remover um sufixo (del chain[i:])")
+        start = index.indices(len(self))[0]
+        if start >= self._cold_height:
+            del self._hot[start - self._cold_height:]
+            return
+        self._hot.clear()
+        self._cold_height = start
+        with self._cache_lock:
+            for cached in [i for i in self._cache if i >= start]:
+                del self._cache[cached]
+    
+    def json_slice(self, start: int, stop: int) -> list[str]:
+        """JSON dos blocos [start, stop), lido direto do store para o histórico."""
+        stop = min(stop, len(self))
+        cold = [self.store.read_bytes(i).decode() for i in range(start, min(stop, self._cold_height))]
+        hot = self._hot[max(0, start - self._cold_height):max(0, stop - self._cold_height)]
+        return cold + [block.to_json() for block in hot]
+    
+    def append(self, block: Block):
+        self._hot.append(block)
+    
+    def extend(self, blocks: list[Block]):
+        self._hot.extend(blocks)
+    
+    def evict(self, stored_height: int):
+        """Tira da memória os blocos quentes excedentes já gravados no store."""
+        excess = min(len(self._hot) - self.hot_size, stored_height - self._cold_height)
+        if excess > 0:
+            del self._hot[:excess]
+            self._cold_height += excess
@@ -0,0 +1,78 @@
+import json
+import re
+from typing import Any
+
+
+class ChainStreamDecoder:
+    """
+    Decodificador incremental do JSON de um RESPONSE_CHAIN.
+    
+    Recebe o corpo da mensagem em pedaços (feed) e devolve cada bloco do
+    array "chain" assim que ele chega completo, sem montar o documento
+    inteiro em memória. O restante da mensagem (type, sender, mempool...)
+    é acumulado com o array de blocos substituído por [] e decodificado
+    em close().
+    
+    Se o array "chain" não for encontrado (formato inesperado), o
+    documento é acumulado por inteiro e os blocos ficam em close().
+    """
+    
+    _CHAIN_START = re.compile(r'"chain"\s*:\s*\[')
+    _SEPARATORS = re.compile(r'[\s,]*')
+    
+    def __init__(self, max_item_size: int = 4 * 1024 * 1024):
+        self.max_item_size = max_item_size
+        self.streamed = False  # True se o array "chain" foi decodificado em streaming
+        
+        self._decoder = json.JSONDecoder()
+        self._outer: list[str] = []  # partes do documento fora do array
+        self._pending = ""  # texto ainda não consumido
+        self._scan_from = 0  # onde retomar a busca pelo início do array
+        self._state = "prefix"  # prefix -> items -> suffix
+    
+    def feed(self, text: str) -> list[dict[str, Any]]:
+        """Alimenta o decodificador e retorna os blocos completados."""
+        self._pending += text
+        blocks = []
+        
+        if self._state == "prefix":
+            match = self._CHAIN_START.search(self._pending, self._scan_from)
+            if not match:
+                # O padrão pode estar cortado entre dois pedaços
+                self._scan_from = max(0, len(self._pending) - 32)
+                return blocks
+            self._outer.append(self._pending[:match.end()])
+            self._pending = self._pending[match.end():]
+            self._state = "items"
+            self.streamed = True
+        
+        if self._state == "items":
+            pos = 0
+            while True:
+                pos = self._SEPARATORS.match(self._pending, pos).end()
+                if pos == len(self._pending):
+                    break
+                if self._pending[pos] == "]":
+                    self._state = "suffix"
+                    break
+                try:
+                    item, pos = self._decoder.raw_decode(self._pending, pos)
+                except json.JSONDecodeError:
+                    # Bloco incompleto: espera mais dados (limitado a max_item_size)
+                    if len(self._pending) - pos > self.max_item_size:
+                        raise ValueError("Bloco excede o tamanho máximo no stream")
+                    break
+                blocks.append(item)
+            self._pending = self._pending[pos:]
+        
+        if self._state == "suffix" and self._pending:
+            self._outer.append(self._pending)
+            self._pending = ""
+        
+        return blocks
+    
+    def close(self) -> dict[str, Any]:
+        """Finaliza o stream e retorna o documento externo (chain vazio se streamed)."""
+        if self._state == "items":
+            raise ValueError("Stream terminou no meio do array de blocos")
+        return json.loads("".join(self._outer) + self._pending)
@@ -0,0 +1,96 @@
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from .block import Block, verify_block_data
+
+
+def _first_invalid_hash(blocks: list[dict[str, Any]]) -> int | None:
+    """Posição do primeiro bloco cujo hash não confere, ou None (roda nos workers)."""
+    for position, data in enumerate(blocks):
+        if not verify_block_data(data):
+            return position
+    return None
+
+
+class ChainValidator:
+    """
+    Validação em lote de uma sequência de blocos.
+    
+    1. Passada barata e sequencial: índice, encadeamento e prefixo de PoW.
+       Qualquer falha aqui encerra a validação sem calcular nenhum hash.
+    2. Recálculo dos hashes (um json.dumps + SHA-256 por bloco) em lotes
+       distribuídos em um pool de processos. Os lotes vão como dicionários
+       (to_dict()), bem mais baratos de serializar entre processos que os
+       objetos Block, e são consumidos em ordem, com uma janela limitada em
+       andamento; a validação para no primeiro lote com falha e cancela os
+       lotes da janela que ainda não começaram.
+    
+    Sequências curtas (ou workers=1) são verificadas no próprio processo:
+    para poucas dezenas de blocos o custo de enviar os lotes ao pool
+    supera o ganho.
+    """
+    
+    BATCH_SIZE = 64  # blocos por tarefa enviada ao pool
+    PARALLEL_THRESHOLD = 256  # mínimo de blocos para usar o pool
+    
+    def __init__(self, difficulty: str, workers: int = 1):
+        self.difficulty = difficulty
+        self.workers = max(1, workers)
+        self._pool = None
+        self._pool_lock = threading.Lock()  # validações concorrentes criam um só pool
+    
+    def validate(self, previous: Block, blocks: list[Block]) -> bool:
+        """Valida blocks como continuação de previous (já considerado válido)."""
+        for block in blocks:
+            if block.index != previous.index + 1:
+                return False
+            if block.previous_hash != previous.hash:
+                return False
+            if not block.hash.startswith(self.difficulty):
+                return False
+            previous = block
+        
+        if self.workers > 1 and len(blocks) >= self.PARALLEL_THRESHOLD:
+            return self._verify_parallel(blocks)
+        return all(block.verify_hash() for block in blocks)
+    
+    def _verify_parallel(self, blocks: list[Block]) -> bool:
+        """Recalcula os hashes no pool, parando no primeiro lote inválido."""
+        pool = self._get_pool()
+        pending = deque()
+        try:
+            for start in range(0, len(blocks), self.BATCH_SIZE):
+                batch = [block.to_dict() for block in blocks[start:start + self.BATCH_SIZE]]
+                pending.append(pool.submit(_first_invalid_hash, batch))
+                # Janela limitada: uma falha cedo não deixa a cadeia inteira enfileirada
+                if len(pending) >= self.workers * 2:
+                    if pending.popleft().result() is not None:
+                        return False
+            
+            while pending:
+                if pending.popleft().result() is not None:
+                    return False
+            return True
+        finally:
+            # Cadeia rejeitada: os lotes restantes não ocupam o pool da próxima validação
+            for future in pending:
+                future.cancel()
+    
+    def _get_pool(self):
+        """Cria o pool de processos sob demanda (mantido entre validações)."""
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn evita fork de um processo com threads de rede ativas
+                ctx = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+            return self._pool
+    
+    def shutdown(self):
+        """Encerra o pool de processos."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,43 @@
+import socket
+
+import pytest
+
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner
+from src.blockchain.node import Node
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def mine():
+    """Minera count blocos sobre a ponta de blockchain (e os adiciona); retorna os blocos."""
+    def mine(blockchain: Blockchain, count: int, address: str = "miner", **kwargs):
+        miner = Miner(blockchain, address, **kwargs)
+        blocks = []
+        for _ in range(count):
+            block = miner.mine_block()
+            assert blockchain.add_block(block)
+            blocks.append(block)
+        return blocks
+    return mine
+
+
+@pytest.fixture
+def nodes():
+    """Inicia nós em portas livres (nodes(node_class=Node, **kwargs)); todos são parados no fim do teste."""
+    started = []
+
+    def start(node_class: type[Node] = Node, **kwargs) -> Node:
+        node = node_class("127.0.0.1", free_port(), **kwargs)
+        node.start()
+        started.append(node)
+        return node
+
+    yield start
+    for node in started:
+        node.stop()
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from src.blockchain.async_node import AsyncNode
+from src.blockchain.protocol import MessageType, Protocol
+from src.blockchain.transaction import Transaction
+
+
+def wait_for(predicate, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def async_nodes(nodes):
+    return lambda **kwargs: nodes(AsyncNode, **kwargs)
+
+
+def test_connect_syncs_between_async_nodes(async_nodes, mine):
+    remote, local = async_nodes(), async_nodes()
+    mine(remote.blockchain, 3, address="remote")
+    assert local.connect_to_peer(remote.address)
+    assert [block.hash for block in local.blockchain.chain] == [block.hash for block in remote.blockchain.chain]
+    assert remote.address in local.peers
+    assert wait_for(lambda: local.address in remote.peers)
+
+
+@pytest.mark.parametrize("persistent", [False, True], ids=["one-shot", "session"])
+def test_thread_node_talks_to_async_node(async_nodes, nodes, persistent):
+    remote = async_nodes()
+    local = nodes(persistent=persistent)
+    for _ in range(2):
+        response = local._send_message(remote.address, Protocol.discover_peers())
+        assert response.type == MessageType.PEERS_LIST
+    assert (remote.address in local._sessions) == persistent
+
+
+def test_transactions_and_blocks_relay_both_ways(async_nodes, nodes):
+    asynchronous, threaded = async_nodes(), nodes()
+    assert threaded.connect_to_peer(asynchronous.address)
+    assert wait_for(lambda: threaded.address in asynchronous.peers)
+
+    outbound = Transaction(origem="genesis", destino="alice", valor=1.0)
+    asynchronous.broadcast_transaction(outbound)
+    assert wait_for(lambda: threaded.blockchain.has_transaction(outbound.id))
+    inbound = Transaction(origem="genesis", destino="bob", valor=1.0)
+    threaded.broadcast_transaction(inbound)
+    assert wait_for(lambda: asynchronous.blockchain.has_transaction(inbound.id))
+
+    block = asyncio.run(asynchronous.mine_async())
+    assert block is not None
+    assert wait_for(lambda: threaded.blockchain.last_block.hash == block.hash)
+    assert threaded.blockchain.get_transaction_block(outbound.id) == block.index
+
+
+def test_blocking_send_inside_the_event_loop_is_refused(async_nodes):
+    node = async_nodes()
+
+    async def send():
+        return node._deliver(node.address, Protocol.ping())
+
+    future = asyncio.run_coroutine_threadsafe(send(), node._loop)
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+
+
+def test_stop_closes_idle_sessions(async_nodes, nodes):
+    remote, local = async_nodes(), nodes(persistent=True)
+    assert local._send_message(remote.address, Protocol.discover_peers())
+    assert len(remote._connections) == 1
+    remote.stop()
+    assert not remote._loop_thread.is_alive()
+    assert remote._connections == set()
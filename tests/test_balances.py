@@ -0,0 +1,91 @@
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner
+from src.blockchain.transaction import Transaction
+
+ADDRESSES = ["genesis", "coinbase", "alice", "bob", "carol"]
+
+
+def scan_balance(blockchain: Blockchain, address: str) -> float:
+    """Saldo percorrendo a cadeia e a mempool inteiras (a conta que o índice evita)."""
+    balance = 0.0
+    for block in blockchain.chain:
+        for tx in block.transactions:
+            if tx.destino == address:
+                balance += tx.valor
+            if tx.origem == address:
+                balance -= tx.valor
+    for tx in blockchain.pending_transactions:
+        if tx.origem == address:
+            balance -= tx.valor
+    return balance
+
+
+def assert_index_matches_scan(blockchain: Blockchain):
+    for address in ADDRESSES:
+        assert blockchain.get_balance(address) == pytest.approx(scan_balance(blockchain, address))
+
+
+def test_index_follows_blocks_and_mempool(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 2, address="alice")
+    assert blockchain.add_transaction(Transaction(origem="alice", destino="bob", valor=30.0))
+    assert blockchain.add_transaction(Transaction(origem="alice", destino="carol", valor=20.5))
+    assert_index_matches_scan(blockchain)
+    assert blockchain.get_balance("alice") == 49.5
+    # Créditos pendentes não contam até o bloco
+    assert blockchain.get_balance("bob") == 0.0
+
+    mine(blockchain, 1, address="carol")
+    assert blockchain.pending_transactions == []
+    assert_index_matches_scan(blockchain)
+    assert blockchain.get_balance("carol") == 70.5
+
+
+def test_pending_debits_block_double_spend(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    assert blockchain.add_transaction(Transaction(origem="alice", destino="bob", valor=40.0))
+    assert not blockchain.add_transaction(Transaction(origem="alice", destino="carol", valor=20.0))
+    assert blockchain.add_transaction(Transaction(origem="alice", destino="carol", valor=10.0))
+    assert blockchain.get_balance("alice") == 0.0
+
+
+def test_get_account_reads_balance_and_tip_together(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    assert blockchain.add_transaction(Transaction(origem="alice", destino="bob", valor=10.0))
+    assert blockchain.get_account("alice") == {
+        "address": "alice",
+        "confirmed": 50.0,
+        "balance": 40.0,
+        "height": 2,
+        "tip": blockchain.last_block.hash,
+    }
+
+
+def test_replace_chain_reverts_only_the_diverging_blocks(mine):
+    local = Blockchain()
+    mine(local, 1, address="alice")
+    remote = Blockchain()
+    assert remote.add_block(Block.from_dict(local.chain[1].to_dict()))
+
+    payment = Transaction(origem="alice", destino="carol", valor=25.0)
+    assert local.add_block(Miner(local, "alice").mine_block([payment]))
+    pending = Transaction(origem="alice", destino="bob", valor=5.0)
+    assert local.add_transaction(pending)
+    mine(remote, 2, address="bob")
+
+    assert local.replace_chain([Block.from_dict(block.to_dict()) for block in remote.chain])
+    assert_index_matches_scan(local)
+    assert local.get_balance("bob") == 100.0
+    assert local.get_balance("carol") == 0.0
+    # O pagamento revertido volta para a mempool, com o débito pendente
+    assert {tx.id for tx in local.pending_transactions} == {payment.id, pending.id}
+    assert local.get_balance("alice") == 20.0
+
+    before = {address: local.get_balance(address) for address in ADDRESSES}
+    local._rebuild_indexes()
+    assert {address: local.get_balance(address) for address in ADDRESSES} == before
@@ -0,0 +1,56 @@
+import json
+import random
+
+import pytest
+
+from src.blockchain import bench
+from src.blockchain.mempool import Mempool
+
+
+@pytest.fixture(scope="module")
+def chain():
+    rng = random.Random(0)
+    return bench.make_chain(6, 3, bench.make_addresses(4), rng)
+
+
+def test_synthetic_spends_pass_the_balance_check(chain):
+    senders = bench.funded_addresses(chain)
+    assert senders == bench.make_addresses(4)
+    blockchain = bench.load_chain(chain, mempool=Mempool(max_count=50))
+    assert len(blockchain.chain) == len(chain)
+    spends = bench.make_spends(50, senders, bench.make_addresses(4), random.Random(1))
+    assert blockchain.add_transactions(spends) == spends
+
+
+def test_mempool_bench_fills_the_whole_mempool(chain):
+    results = bench.bench_mempool(chain, 40, bench.make_addresses(4), random.Random(2))
+    assert results["size"] == 40
+    assert results["add_transaction"]["ops"] == 40
+
+
+def test_main_writes_a_comparable_report(tmp_path):
+    output = tmp_path / "bench.json"
+    bench.main([
+        "--blocks", "4",
+        "--txs-per-block", "2",
+        "--mempool", "20",
+        "--addresses", "3",
+        "--repeat", "5",
+        "--validation-workers", "1",
+        "--no-network",
+        "--output", str(output),
+    ])
+    report = json.loads(output.read_text())
+    assert report["meta"]["params"]["blocks"] == 4
+    assert set(report["results"]) == {"hashing", "balances", "mempool", "validation", "protocol"}
+    assert report["results"]["validation"]["blocks"] == 5
+    assert report["results"]["mempool"]["size"] == 20
+    for measured in report["results"]["hashing"].values():
+        if isinstance(measured, dict):
+            assert measured["ops"] == 5 and measured["seconds"] >= 0
+
+
+def test_network_bench_propagates_every_round(chain):
+    results = bench.bench_network(chain, 2, 2, 10.0)
+    assert results["sync_seconds"][0] is not None
+    assert None not in results["propagation_seconds"]
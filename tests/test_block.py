@@ -0,0 +1,44 @@
+import pytest
+
+from src.blockchain.block import Block, hash_block_data
+from src.blockchain.transaction import Transaction
+
+NONCES = [0, 1, 9, 10, 12345, 2**31, 10**20]
+
+
+def make_block(merkle: bool, transactions: list[Transaction]) -> Block:
+    block = Block(index=7, previous_hash="ab" * 32, transactions=transactions, timestamp=1700000000.25)
+    if merkle:
+        block.merkle_root = block.compute_merkle_root()
+    return block
+
+
+@pytest.fixture(params=[
+    [],
+    [Transaction(origem="genesis", destino="miner", valor=50.0)],
+    [
+        Transaction(origem="alice", destino="bob", valor=0.1),
+        Transaction(origem="joão", destino="ação \"aspas\"", valor=1e-7),
+    ],
+], ids=["empty", "coinbase", "escaped"])
+def transactions(request):
+    return request.param
+
+
+@pytest.mark.parametrize("merkle", [False, True], ids=["legacy", "merkle"])
+def test_template_hash_matches_calculate_hash(merkle, transactions):
+    block = make_block(merkle, transactions)
+    template = block.mining_template()
+    for nonce in NONCES:
+        block.nonce = nonce
+        assert template.hash_nonce(nonce) == block.calculate_hash()
+        assert template.hash_nonce(nonce) == hash_block_data(block.to_dict())
+
+
+def test_template_does_not_cover_transactions_in_merkle_format():
+    transactions = [Transaction(origem="alice", destino="bob", valor=1.0)]
+    legacy = make_block(False, transactions)
+    merkle = make_block(True, transactions)
+    assert b"alice" in legacy.mining_template().suffix
+    assert b"alice" not in merkle.mining_template().suffix
+    assert merkle.merkle_root.encode() in merkle.mining_template().prefix
@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner
+from src.blockchain.node import Node
+from src.blockchain.relay import compact_block_message, short_id
+from src.blockchain.transaction import Transaction
+
+PEER = "127.0.0.1:5001"
+
+
+@pytest.fixture
+def node():
+    node = Node("127.0.0.1", 5000, metrics=True)
+    yield node
+    node.stop()
+
+
+@pytest.fixture
+def block(node, mine):
+    """Bloco Merkle (coinbase e mais três transações) sobre a ponta do node."""
+    remote = Blockchain()
+    for parent in node.blockchain.chain[1:]:
+        remote.add_block(Block.from_dict(parent.to_dict()))
+    transactions = [Transaction(origem="genesis", destino=f"user-{i}", valor=1.0 + i) for i in range(3)]
+    return Miner(remote, "miner", merkle_blocks=True).mine_block(transactions)
+
+
+def results(node: Node) -> dict[str, float]:
+    series = node.metrics.snapshot()["counters"].get("compact_blocks_total", [])
+    return {item["labels"]["result"]: item["value"] for item in series}
+
+
+def copy(tx: Transaction) -> Transaction:
+    return Transaction.from_dict(tx.to_dict())
+
+
+def fetch_from(block: Block, calls: list):
+    """Substituto de _fetch_block_transactions que responde com as transações do bloco."""
+    def fetch(peer_address: str, block_hash: str, indexes: list[int]):
+        calls.append(indexes)
+        return [copy(block.transactions[index]) for index in indexes]
+    return fetch
+
+
+def test_message_prefills_only_the_coinbase(block):
+    payload = compact_block_message(block).payload
+    assert payload["short_ids"] == [short_id(tx.id) for tx in block.transactions]
+    assert [item["index"] for item in payload["prefilled"]] == [0]
+
+
+def test_rebuilt_from_mempool(node, block):
+    for tx in block.transactions[1:]:
+        assert node.blockchain.add_transaction(copy(tx))
+    rebuilt = node._reconstruct_block(compact_block_message(block).payload, PEER)
+    assert rebuilt.to_dict() == block.to_dict()
+    assert results(node) == {"mempool": 1.0}
+
+
+def test_missing_transactions_are_fetched(node, block, monkeypatch):
+    node.blockchain.add_transaction(copy(block.transactions[2]))
+    calls = []
+    monkeypatch.setattr(node, "_fetch_block_transactions", fetch_from(block, calls))
+    rebuilt = node._reconstruct_block(compact_block_message(block).payload, PEER)
+    assert rebuilt.to_dict() == block.to_dict()
+    assert calls == [[1, 3]]
+    assert results(node) == {"fetched": 1.0}
+
+
+def test_tampered_mempool_copy_is_refetched(node, block, monkeypatch):
+    # Mesmo id (logo mesmo id curto), conteúdo diferente: a raiz não confere
+    for tx in block.transactions[1:]:
+        forged = copy(tx)
+        forged.destino = "mallory"
+        node.blockchain.add_transaction(forged)
+    calls = []
+    monkeypatch.setattr(node, "_fetch_block_transactions", fetch_from(block, calls))
+    rebuilt = node._reconstruct_block(compact_block_message(block).payload, PEER)
+    assert rebuilt.to_dict() == block.to_dict()
+    assert calls == [list(range(len(block.transactions)))]
+    assert results(node) == {"refetched": 1.0}
+
+
+def test_failed_fetch_returns_none(node, block, monkeypatch):
+    monkeypatch.setattr(node, "_fetch_block_transactions", lambda *args: None)
+    assert node._reconstruct_block(compact_block_message(block).payload, PEER) is None
+    assert results(node) == {"failed": 1.0}
+
+
+def test_prefilled_index_out_of_range(node, block):
+    payload = compact_block_message(block).payload
+    payload["prefilled"][0]["index"] = len(block.transactions)
+    assert node._reconstruct_block(payload, PEER) is None
+
+
+def test_failed_reconstruction_does_not_mark_the_block_seen(node, block, monkeypatch):
+    message = compact_block_message(block)
+    message.sender = PEER
+    monkeypatch.setattr(node, "_run_in_background", lambda fn, *args: fn(*args))
+    monkeypatch.setattr(node, "_fetch_block_transactions", lambda *args: None)
+    node._process_message(message)
+    assert block.hash not in node.seen
+    assert node.blockchain.last_block.hash != block.hash
+
+    # O mesmo bloco, depois, com as transações disponíveis
+    monkeypatch.setattr(node, "_fetch_block_transactions", fetch_from(block, []))
+    node._process_message(message)
+    assert block.hash in node.seen
+    assert node.blockchain.last_block.hash == block.hash
+
+
+def test_handler_does_not_wait_for_missing_transactions(node, block, monkeypatch):
+    # Um remetente lento (ex: com o pool cheio) não prende o worker de entrada
+    released = threading.Event()
+    fetch = fetch_from(block, [])
+
+    def slow_fetch(*args):
+        released.wait(5)
+        return fetch(*args)
+
+    monkeypatch.setattr(node, "_fetch_block_transactions", slow_fetch)
+    message = compact_block_message(block)
+    message.sender = PEER
+    started = time.monotonic()
+    assert node._process_message(message) is None
+    assert time.monotonic() - started < 1
+    assert node.blockchain.last_block.hash != block.hash
+
+    released.set()
+    deadline = time.monotonic() + 5
+    while node.blockchain.last_block.hash != block.hash and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert node.blockchain.last_block.hash == block.hash
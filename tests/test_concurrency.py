@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+
+import pytest
+
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.concurrency import PeerSet, RWLock
+from src.blockchain.transaction import Transaction
+
+
+def run(target, *args) -> threading.Thread:
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    lock = RWLock()
+    both_inside = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with lock.read():
+            both_inside.wait()
+
+    threads = [run(reader) for _ in range(2)]
+    for thread in threads:
+        thread.join(5)
+    assert not both_inside.broken
+
+
+def test_lock_is_reentrant():
+    lock = RWLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                assert lock._readers == 0
+        assert lock._writer == threading.get_ident()
+    assert lock._writer is None
+    with lock.read():
+        with lock.read():
+            assert lock._readers == 1
+    assert lock._readers == 0
+
+
+def test_read_to_write_promotion_raises():
+    lock = RWLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+    # A tentativa não deixou estado para trás
+    with lock.write():
+        assert lock._readers == 0 and lock._writers_waiting == 0
+
+
+def test_waiting_writer_goes_before_new_readers():
+    lock = RWLock()
+    order = []
+    reading = threading.Event()
+    release = threading.Event()
+
+    def first_reader():
+        with lock.read():
+            reading.set()
+            release.wait(5)
+            # Leitura reentrante não espera o escritor (evita deadlock)
+            with lock.read():
+                order.append("nested read")
+
+    def writer():
+        with lock.write():
+            order.append("write")
+
+    def late_reader():
+        with lock.read():
+            order.append("late read")
+
+    threads = [run(first_reader)]
+    reading.wait(5)
+    threads.append(run(writer))
+    while not lock._writers_waiting:
+        time.sleep(0.001)
+    threads.append(run(late_reader))
+    time.sleep(0.05)
+    assert order == []
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["nested read", "write", "late read"]
+
+
+def test_peer_set_iterates_a_snapshot():
+    peers = PeerSet(["a:1", "b:2"])
+    seen = []
+    for peer in peers:
+        peers.add("c:3")
+        peers.discard("b:2")
+        seen.append(peer)
+    assert sorted(seen) == ["a:1", "b:2"]
+    assert peers.snapshot() == frozenset({"a:1", "c:3"})
+    assert peers - {"a:1"} == frozenset({"c:3"})
+    assert isinstance(peers | {"d:4"}, frozenset)
+
+
+def test_peer_set_concurrent_adds():
+    peers = PeerSet()
+    threads = [run(lambda i=i: [peers.add(f"{i}:{j}") for j in range(200)]) for i in range(8)]
+    threads.append(run(peers.update, [f"x:{j}" for j in range(50)]))
+    for thread in threads:
+        thread.join(5)
+    assert len(peers) == 8 * 200 + 50
+
+
+def test_blockchain_readers_see_consistent_state(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            try:
+                list(blockchain.iter_blocks(page_size=1))
+                # to_json lê cadeia e mempool sob o mesmo lock: uma transação
+                # nunca aparece nas duas ao mesmo tempo
+                data = json.loads(blockchain.to_json())
+            except Exception as e:
+                errors.append(e)
+                continue
+            confirmed = {tx["id"] for block in data["chain"] for tx in block["transactions"]}
+            pending = {tx["id"] for tx in data["pending_transactions"]}
+            if confirmed & pending:
+                errors.append(confirmed & pending)
+
+    readers = [run(reader) for _ in range(3)]
+    for _ in range(100):
+        assert blockchain.add_transaction(Transaction(origem="alice", destino="bob", valor=0.1))
+    mine(blockchain, 2)
+    stop.set()
+    for thread in readers:
+        thread.join(5)
+    assert errors == []
+    assert blockchain.get_balance("alice") == pytest.approx(40.0)
@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+from src.blockchain import inbound as inbound_module
+from src.blockchain import node as node_module
+from src.blockchain.inbound import PRIORITY_CHAIN, PRIORITY_CONTROL, PRIORITY_TX, InboundPool, RateLimiter
+from src.blockchain.node import Node
+from src.blockchain.protocol import Message, MessageType, Protocol
+from src.blockchain.transaction import Transaction
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(inbound_module.time, "monotonic", lambda: Clock.now)
+    return Clock
+
+
+def message_from(sender: str, message: Message | None = None) -> Message:
+    message = message or Protocol.ping()
+    message.sender = sender
+    return message
+
+
+def test_rate_limiter_allows_a_burst_then_refills(clock):
+    limiter = RateLimiter(2.0, burst=3)
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("b")
+    clock.now += 0.5
+    assert limiter.allow("a") and not limiter.allow("a")
+    clock.now += 10
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+
+
+def test_rate_limiter_forgets_the_oldest_peer(clock):
+    limiter = RateLimiter(1.0, burst=1, max_peers=2)
+    for peer in ("a", "b", "c"):
+        assert limiter.allow(peer)
+    # "a" foi descartado e recomeça com o balde cheio; "c" continua sem fichas
+    assert limiter.allow("a")
+    assert not limiter.allow("c")
+
+
+@pytest.mark.parametrize("sender, host, key", [
+    ("10.0.0.1:5001", "10.0.0.1", "10.0.0.1:5001"),
+    ("localhost:5001", "127.0.0.1", "127.0.0.1:5001"),
+    ("10.0.0.9:5001", "10.0.0.1", "10.0.0.1"),
+    ("", "10.0.0.1", "10.0.0.1"),
+])
+def test_rate_key_trusts_the_port_only_on_the_same_ip(sender, host, key):
+    assert Node._rate_key(message_from(sender), host) == key
+
+
+def test_inbound_pool_serves_by_priority_and_sheds_when_full():
+    pool = InboundPool(1, queue_size=2)
+    started, release = threading.Event(), threading.Event()
+    order = []
+    blocker = pool.submit(PRIORITY_TX, lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+
+    futures = [
+        pool.submit(PRIORITY_TX, order.append, "tx"),
+        pool.submit(PRIORITY_CONTROL, order.append, "control"),
+        pool.submit(PRIORITY_CHAIN, order.append, "chain"),
+        pool.submit(PRIORITY_TX, order.append, "tx 2"),
+    ]
+    assert pool.submit(PRIORITY_TX, order.append, "tx 3") is None
+    assert pool.pending() == 4
+    release.set()
+    for future in [blocker, *futures]:
+        future.result(5)
+    assert order == ["chain", "control", "tx", "tx 2"]
+
+    release.clear()
+    started.clear()
+    pool.submit(PRIORITY_TX, lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    queued = pool.submit(PRIORITY_CHAIN, order.append, "late")
+    pool.shutdown()
+    release.set()
+    assert queued.cancelled()
+    assert pool.submit(PRIORITY_CHAIN, order.append, "after") is None
+
+
+def test_admit_answers_busy_over_the_rate(nodes):
+    node = nodes(rate_limit=1.0, metrics=True)
+    sender = "127.0.0.1:6000"
+    responses = [node._admit(message_from(sender), "127.0.0.1") for _ in range(3)]
+    assert [response.result(5).type for response in responses[:2]] == [MessageType.PONG] * 2
+    assert responses[2].type == MessageType.BUSY
+    assert responses[2].payload == {"reason": "rate", "retry_after": Node.BUSY_RETRY_AFTER}
+    # Outro nó no mesmo IP tem balde próprio
+    assert node._admit(message_from("127.0.0.1:6001"), "127.0.0.1").result(5).type == MessageType.PONG
+    shed = node.metrics.snapshot()["counters"]["inbound_shed_total"]
+    assert shed == [{"labels": {"reason": "rate"}, "value": 1.0}]
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    """Node cujo _deliver devolve as respostas dadas em ordem; registra as esperas."""
+    node = Node("127.0.0.1", 5000)
+    sleeps = []
+    monkeypatch.setattr(node_module.time, "sleep", sleeps.append)
+
+    def script(*responses):
+        queue = list(responses)
+        delivered = []
+        monkeypatch.setattr(node, "_deliver", lambda peer, message: delivered.append(message.type) or queue.pop(0))
+        return delivered
+
+    yield node, script, sleeps
+    node.stop()
+
+
+def test_busy_relay_is_retried_once_after_retry_after(scripted):
+    node, script, sleeps = scripted
+    relay = Protocol.new_transaction(Transaction(origem="genesis", destino="bob", valor=1.0).to_dict())
+
+    delivered = script(Protocol.busy("rate", 0.25), Protocol.ack())
+    assert node._send_message("127.0.0.1:5001", relay).type == MessageType.ACK
+    assert delivered == [MessageType.NEW_TRANSACTION] * 2
+    assert sleeps == [0.25]
+
+    delivered = script(Protocol.busy("queue", 600), Protocol.busy("queue", 600))
+    assert node._send_message("127.0.0.1:5001", relay) is None
+    assert len(delivered) == 2
+    assert sleeps[-1] == Node.MAX_BUSY_RETRY_AFTER
+
+
+def test_busy_request_is_not_retried(scripted):
+    node, script, sleeps = scripted
+    delivered = script(Protocol.busy("rate", 0.25))
+    assert node._send_message("127.0.0.1:5001", Protocol.request_chain()) is None
+    assert delivered == [MessageType.REQUEST_CHAIN]
+    assert sleeps == []
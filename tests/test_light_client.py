@@ -0,0 +1,82 @@
+import pytest
+
+from src.blockchain.block import verify_inclusion
+from src.blockchain.miner import Miner
+from src.blockchain.node import Node
+from src.blockchain.protocol import MessageType, Protocol
+from src.blockchain.transaction import Transaction
+
+
+@pytest.fixture
+def node():
+    node = Node("127.0.0.1", 5000)
+    yield node
+    node.stop()
+
+
+def confirm(node: Node, merkle_blocks: bool) -> list[Transaction]:
+    """Minera um bloco (Merkle ou legado) com três pagamentos para "carol"."""
+    transactions = [Transaction(origem="genesis", destino="carol", valor=1.0 + i) for i in range(3)]
+    block = Miner(node.blockchain, "miner", merkle_blocks=merkle_blocks).mine_block(list(transactions))
+    assert node.blockchain.add_block(block)
+    return transactions
+
+
+@pytest.mark.parametrize("merkle_blocks", [True, False])
+def test_confirmed_transaction_verifies_against_its_header(node, merkle_blocks):
+    transactions = confirm(node, merkle_blocks)
+    for tx in transactions:
+        response = node._process_message(Protocol.get_tx(tx.id))
+        assert response.type == MessageType.TX
+        payload = response.payload
+        assert payload["status"] == "confirmed"
+        assert payload["block_index"] == 1
+        assert ("proof" in payload) == merkle_blocks
+        assert verify_inclusion(
+            payload["transaction"],
+            payload["header"],
+            payload.get("proof"),
+            payload.get("transactions"),
+        )
+
+
+def test_merkle_proof_rejects_a_forged_transaction_or_header(node):
+    tx = confirm(node, merkle_blocks=True)[1]
+    payload = node._process_message(Protocol.get_tx(tx.id)).payload
+    forged = dict(payload["transaction"], valor=1000.0)
+    assert not verify_inclusion(forged, payload["header"], payload["proof"])
+    # Cabeçalho com outra raiz não confere com o próprio hash
+    header = dict(payload["header"], merkle_root="00" * 32)
+    assert not verify_inclusion(payload["transaction"], header, payload["proof"])
+    assert not verify_inclusion(payload["transaction"], payload["header"])
+
+
+def test_legacy_inclusion_needs_the_block_transactions(node):
+    tx = confirm(node, merkle_blocks=False)[0]
+    payload = node._process_message(Protocol.get_tx(tx.id)).payload
+    others = [item for item in payload["transactions"] if item["id"] != tx.id]
+    assert not verify_inclusion(payload["transaction"], payload["header"], transactions=others)
+
+
+def test_pending_and_unknown_transactions(node):
+    tx = Transaction(origem="genesis", destino="carol", valor=1.0)
+    assert node.blockchain.add_transaction(tx)
+    pending = node._process_message(Protocol.get_tx(tx.id)).payload
+    assert pending["status"] == "pending"
+    assert pending["transaction"] == tx.to_dict()
+    unknown = node._process_message(Protocol.get_tx("missing")).payload
+    assert unknown == {"id": "missing", "status": "unknown", "height": 1}
+
+
+def test_balance_query(node):
+    confirm(node, merkle_blocks=True)
+    assert node.blockchain.add_transaction(Transaction(origem="carol", destino="dave", valor=2.0))
+    response = node._process_message(Protocol.get_balance("carol"))
+    assert response.type == MessageType.BALANCE
+    assert response.payload == {
+        "address": "carol",
+        "confirmed": 6.0,
+        "balance": 4.0,
+        "height": 2,
+        "tip": node.blockchain.last_block.hash,
+    }
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from src.blockchain import mempool as mempool_module
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.mempool import Mempool
+from src.blockchain.transaction import Transaction
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio monotônico controlado pelo teste (clock.now)."""
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(mempool_module.time, "monotonic", lambda: Clock.now)
+    return Clock
+
+
+def tx(valor: float, timestamp: float = 0.0, origem: str = "genesis") -> Transaction:
+    return Transaction(origem=origem, destino="bob", valor=valor, timestamp=timestamp)
+
+
+def test_full_mempool_evicts_the_lowest_priority():
+    mempool = Mempool(max_count=3)
+    low, mid, high = tx(1.0), tx(2.0), tx(3.0)
+    for item in (mid, low, high):
+        assert mempool.add(item) == (True, [])
+
+    assert mempool.add(tx(0.5)) == (False, [])
+    top = tx(5.0)
+    assert mempool.add(top) == (True, [low])
+    assert list(mempool) == [mid, high, top]
+    # Empate no valor: a mais nova sai antes
+    newer = tx(2.0, timestamp=10.0)
+    assert mempool.add(newer) == (False, [])
+    older = tx(2.0, timestamp=-10.0)
+    assert mempool.add(older) == (True, [mid])
+
+
+def test_byte_limit_evicts_as_many_as_needed():
+    small = [tx(1.0), tx(2.0)]
+    size = len(json.dumps(small[0].to_dict()))
+    mempool = Mempool(max_bytes=2 * size + 10)
+    for item in small:
+        assert mempool.add(item)[0]
+    big = Transaction(origem="genesis", destino="b" * (size + 5), valor=3.0, timestamp=0.0)
+    accepted, evicted = mempool.add(big)
+    assert accepted and evicted == small
+    assert mempool.nbytes == len(json.dumps(big.to_dict()))
+    assert mempool.add(Transaction(origem="genesis", destino="b" * 10 * size, valor=9.0)) == (False, [])
+
+
+def test_removed_entries_are_skipped_and_compacted():
+    mempool = Mempool(max_count=2)
+    first, second = tx(1.0), tx(2.0)
+    mempool.add(first)
+    mempool.add(second)
+    # Removida e devolvida: a entrada antiga do heap não vale mais
+    assert mempool.remove(first.id) is first
+    mempool.add(first)
+    assert mempool.add(tx(3.0)) == (True, [first])
+    assert mempool.remove("desconhecida") is None
+
+    for i in range(500):
+        item = tx(10.0 + i)
+        mempool.add(item)
+        mempool.remove(item.id)
+    assert len(mempool._heap) <= 2 * len(mempool) + 64
+
+
+def test_expire_removes_only_old_transactions(clock):
+    mempool = Mempool(ttl=60)
+    old = tx(1.0)
+    mempool.add(old)
+    clock.now += 30
+    recent = tx(1.0)
+    mempool.add(recent)
+    clock.now += 31
+    assert mempool.expire() == [old]
+    assert list(mempool) == [recent]
+    assert mempool.expire(now=clock.now + 60) == [recent]
+    assert len(mempool) == 0 and mempool.nbytes == 0
+
+
+def test_select_for_block_by_priority():
+    mempool = Mempool()
+    items = [tx(3.0), tx(1.0), tx(5.0, timestamp=2.0), tx(5.0, timestamp=1.0)]
+    for item in items:
+        mempool.add(item)
+    assert mempool.select_for_block(3) == [items[3], items[2], items[0]]
+    assert len(mempool) == 4
+
+
+def test_blockchain_releases_debits_of_evicted_and_expired(mine, clock):
+    blockchain = Blockchain(mempool=Mempool(max_count=2, ttl=60))
+    mine(blockchain, 1, address="alice")
+    cheap = tx(1.0, origem="alice")
+    assert blockchain.add_transaction(cheap)
+    clock.now += 30
+    assert blockchain.add_transaction(tx(10.0, origem="alice"))
+    assert blockchain.add_transaction(tx(20.0))
+    # A transação barata foi despejada: o débito dela some
+    assert blockchain.get_balance("alice") == 40.0
+
+    clock.now += 31
+    assert [item.valor for item in blockchain.select_for_block(10)] == [20.0, 10.0]
+    assert blockchain.get_balance("alice") == 40.0
+    clock.now += 30
+    assert len(blockchain.expire_transactions()) == 2
+    assert blockchain.pending_transactions == []
+    assert blockchain.get_balance("alice") == 50.0
@@ -0,0 +1,99 @@
+import hashlib
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.merkle import (
+    LEAF_PREFIX,
+    NODE_PREFIX,
+    hash_transaction,
+    merkle_proof,
+    merkle_root,
+    verify_proof,
+)
+from src.blockchain.transaction import Transaction
+
+
+def leaf(name: str) -> str:
+    return hashlib.sha256(LEAF_PREFIX + name.encode()).hexdigest()
+
+
+def pair(left: str, right: str) -> str:
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def test_root_of_small_trees():
+    a, b, c = leaf("a"), leaf("b"), leaf("c")
+    assert merkle_root([]) == hashlib.sha256(b"").hexdigest()
+    assert merkle_root([a]) == a
+    assert merkle_root([a, b]) == pair(a, b)
+    # O nó sem par sobe sem ser duplicado
+    assert merkle_root([a, b, c]) == pair(pair(a, b), c)
+    assert merkle_root([a, b, c]) != merkle_root([a, b, c, c])
+    assert merkle_root([a, b]) != merkle_root([b, a])
+
+
+def test_leaf_is_the_whole_transaction():
+    tx = Transaction(origem="alice", destino="bob", valor=1.0)
+    changed = Transaction.from_dict(dict(tx.to_dict(), valor=2.0))
+    assert changed.id == tx.id
+    assert hash_transaction(changed.to_dict()) != hash_transaction(tx.to_dict())
+
+
+def test_merkle_block_hash_commits_to_transactions(mine):
+    blockchain = Blockchain()
+    block = mine(blockchain, 1, merkle_blocks=True)[0]
+    assert block.merkle_root == block.compute_merkle_root()
+    assert block.verify_hash()
+
+    tampered = Block.from_dict(block.to_dict())
+    tampered.transactions[0].valor += 1
+    assert not tampered.verify_hash()
+    assert not blockchain.is_valid_chain(blockchain.chain[:-1] + [tampered])
+
+
+def test_merkle_and_legacy_blocks_mix_in_one_chain(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1)
+    mine(blockchain, 1, merkle_blocks=True)
+    mine(blockchain, 1)
+    assert [bool(block.merkle_root) for block in blockchain.chain] == [False, False, True, False]
+    assert blockchain.is_valid_chain()
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 13])
+def test_every_leaf_has_a_valid_proof(count):
+    leaves = [leaf(str(i)) for i in range(count)]
+    root = merkle_root(leaves)
+    for index, item in enumerate(leaves):
+        proof = merkle_proof(leaves, index)
+        assert len(proof) <= (count - 1).bit_length()
+        assert verify_proof(item, proof, root)
+
+
+def test_proof_does_not_verify_other_leaves_or_roots():
+    leaves = [leaf(str(i)) for i in range(5)]
+    root = merkle_root(leaves)
+    proof = merkle_proof(leaves, 2)
+    assert not verify_proof(leaves[3], proof, root)
+    assert not verify_proof(leaves[2], proof, merkle_root(leaves[:4]))
+    # Trocar o lado de um passo muda o caminho
+    flipped = [dict(step, side="left" if step["side"] == "right" else "right") for step in proof]
+    assert not verify_proof(leaves[2], flipped, root)
+
+
+@pytest.mark.parametrize("proof", [
+    [{"hash": "zz", "side": "left"}],
+    [{"hash": "00" * 32, "side": "up"}],
+    [{"side": "left"}],
+    [None],
+])
+def test_malformed_proofs_are_rejected(proof):
+    leaves = [leaf("a"), leaf("b")]
+    assert not verify_proof(leaves[0], proof, merkle_root(leaves))
+
+
+def test_proof_index_out_of_range():
+    with pytest.raises(IndexError):
+        merkle_proof([leaf("a")], 1)
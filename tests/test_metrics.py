@@ -0,0 +1,97 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.blockchain.metrics import NULL_METRICS, Metrics, MetricsServer
+from src.blockchain.protocol import MessageType, Protocol
+
+
+def test_counters_gauges_and_histograms():
+    metrics = Metrics()
+    metrics.inc("messages_total", labels={"type": "PING"})
+    metrics.inc("messages_total", 2, labels={"type": "PING"})
+    metrics.set("peers", 3)
+    metrics.gauge_fn("height", lambda: 7)
+    metrics.gauge_fn("broken", lambda: 1 / 0)
+    for value in (0.0002, 0.002, 20.0):
+        metrics.observe("latency_seconds", value)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["messages_total"] == [{"labels": {"type": "PING"}, "value": 3.0}]
+    assert snapshot["gauges"]["peers"] == [{"labels": {}, "value": 3}]
+    assert snapshot["gauges"]["height"] == [{"labels": {}, "value": 7.0}]
+    assert "broken" not in snapshot["gauges"]
+    histogram = snapshot["histograms"]["latency_seconds"][0]
+    assert histogram["count"] == 3 and histogram["sum"] == pytest.approx(20.0022)
+    assert histogram["buckets"]["0.0005"] == 1
+    assert histogram["buckets"]["0.005"] == 2
+    assert histogram["buckets"]["10.0"] == 2
+    assert histogram["buckets"]["+Inf"] == 3
+
+
+def test_disabled_registry_records_nothing():
+    NULL_METRICS.inc("messages_total")
+    NULL_METRICS.observe("latency_seconds", 1.0)
+    with NULL_METRICS.timer("latency_seconds"):
+        pass
+    assert NULL_METRICS.snapshot() == {"enabled": False}
+
+
+def test_prometheus_text_format():
+    metrics = Metrics()
+    metrics.describe("messages_total", "Mensagens recebidas")
+    metrics.inc("messages_total", labels={"type": "PING"})
+    with metrics.timer("latency_seconds"):
+        pass
+    text = metrics.to_prometheus()
+    assert "# HELP blockchain_messages_total Mensagens recebidas\n" in text
+    assert "# TYPE blockchain_messages_total counter\n" in text
+    assert 'blockchain_messages_total{type="PING"} 1.0\n' in text
+    assert "# TYPE blockchain_latency_seconds histogram\n" in text
+    assert 'blockchain_latency_seconds_bucket{le="+Inf"} 1\n' in text
+    assert "blockchain_latency_seconds_count 1\n" in text
+
+
+def test_http_endpoint_serves_the_registry():
+    metrics = Metrics()
+    metrics.inc("messages_total")
+    server = MetricsServer(metrics, 0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode() == metrics.to_prometheus()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/other", timeout=5)
+    finally:
+        server.stop()
+
+
+def test_node_reports_metrics_over_the_protocol(nodes, mine):
+    remote, local = nodes(metrics=True), nodes()
+    mine(remote.blockchain, 2)
+    assert local.connect_to_peer(remote.address)
+
+    response = local._send_message(remote.address, Protocol.get_metrics())
+    assert response.type == MessageType.METRICS
+    snapshot = response.payload["metrics"]
+    assert snapshot["gauges"]["chain_height"] == [{"labels": {}, "value": 3.0}]
+    received = {
+        series["labels"]["type"]: series["value"]
+        for series in snapshot["counters"]["messages_received_total"]
+    }
+    assert received[MessageType.REQUEST_HEADERS.value] >= 1
+    assert received[MessageType.GET_METRICS.value] == 1
+    assert "message_seconds" in snapshot["histograms"]
+    # Sem metrics=True o nó responde que as métricas estão desligadas
+    assert remote._send_message(local.address, Protocol.get_metrics()).payload["metrics"] == {"enabled": False}
+
+
+def test_node_metrics_port_starts_the_endpoint(nodes):
+    node = nodes(metrics_port=0)
+    url = f"http://127.0.0.1:{node._metrics_server.port}/metrics"
+    with urllib.request.urlopen(url, timeout=5) as response:
+        text = response.read().decode()
+    assert "blockchain_chain_height 1.0\n" in text
+    assert "# TYPE blockchain_mempool_transactions gauge\n" in text
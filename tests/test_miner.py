@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner, MiningService
+from src.blockchain.transaction import Transaction
+
+
+def copy(block: Block) -> Block:
+    return Block.from_dict(block.to_dict())
+
+
+def wait_for(predicate, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def parallel():
+    miner = Miner(Blockchain(), "miner", workers=2)
+    yield miner
+    miner.shutdown()
+
+
+@pytest.mark.parametrize("merkle_blocks", [False, True])
+def test_parallel_finds_the_same_nonce_as_sequential(parallel, merkle_blocks, monkeypatch):
+    # Intervalos pequenos: o nonce cai em um intervalo que não é o primeiro
+    monkeypatch.setattr(Miner, "CHUNK_SIZE", 500)
+    parallel.merkle_blocks = merkle_blocks
+    sequential = Miner(parallel.blockchain, "miner")
+    for _ in range(3):
+        candidate = parallel.build_candidate([])
+        sequential.mining = parallel.mining = True
+        expected = sequential._mine_sequential(copy(candidate))
+        found = parallel._mine_parallel(copy(candidate))
+        assert (found.nonce, found.hash) == (expected.nonce, expected.hash)
+        assert found.verify_hash() and found.is_valid_hash(Blockchain.DIFFICULTY)
+        assert parallel.blockchain.add_block(found)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_refresh_ends_the_search_and_resets_mining(workers, monkeypatch):
+    # Dificuldade inalcançável: só o refresh encerra a busca
+    monkeypatch.setattr(Blockchain, "DIFFICULTY", "0" * 64)
+    monkeypatch.setattr(Miner, "PROGRESS_INTERVAL", 100)
+    monkeypatch.setattr(Miner, "CHUNK_SIZE", 100)
+    miner = Miner(Blockchain(), "miner", workers=workers)
+    try:
+        assert miner.mine_block([], refresh=lambda: True) is None
+        assert not miner.mining
+    finally:
+        miner.shutdown()
+
+
+def test_found_block_resets_mining():
+    miner = Miner(Blockchain(), "miner")
+    block = miner.mine_block([])
+    assert block is not None and not miner.mining
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """
+    MiningService que nunca encontra bloco (dificuldade inalcançável para o
+    Miner), sobre uma cadeia que aceita blocos com a dificuldade normal.
+    Registra os candidatos montados.
+    """
+    outside = Miner(Blockchain(), "outside").mine_block([])
+    difficulty = Blockchain.DIFFICULTY
+    monkeypatch.setattr(Blockchain, "DIFFICULTY", "0" * 64)
+    monkeypatch.setattr(Miner, "PROGRESS_INTERVAL", 100)
+    blockchain = Blockchain()
+    blockchain.DIFFICULTY = difficulty
+    miner = Miner(blockchain, "service")
+    candidates = []
+    build = miner.build_candidate
+    monkeypatch.setattr(miner, "build_candidate", lambda *args: candidates.append(build(*args)) or candidates[-1])
+    service = MiningService(miner, lambda block: None)
+    yield service, candidates, outside
+    service.stop()
+
+
+def test_service_delivers_found_blocks():
+    blockchain = Blockchain()
+    service = MiningService(Miner(blockchain, "service"), blockchain.add_block)
+    service.start()
+    try:
+        assert wait_for(lambda: len(blockchain.chain) >= 4)
+    finally:
+        service.stop()
+    assert service.blocks_found == len(blockchain.chain) - 1
+    assert blockchain.is_valid_chain()
+    assert not service.running and service.hashrate() == 0.0
+
+
+def test_new_tip_restarts_the_candidate(service):
+    service, candidates, outside = service
+    service.start()
+    assert wait_for(lambda: service.hashrate() > 0)
+    assert service.miner.blockchain.add_block(outside)
+    assert wait_for(lambda: len(candidates) == 2)
+    assert service.templates == 2
+    assert candidates[-1].previous_hash == outside.hash
+    service.stop()
+    assert not service.miner.mining
+
+
+def test_mempool_changes_wait_for_the_refresh_interval(service, monkeypatch):
+    service, candidates, _ = service
+    monkeypatch.setattr(MiningService, "TEMPLATE_REFRESH_SECONDS", 0.5)
+    service.start()
+    assert wait_for(lambda: len(candidates) == 1)
+    started = time.monotonic()
+    tx = Transaction(origem="genesis", destino="alice", valor=1.0)
+    assert service.miner.blockchain.add_transaction(tx)
+
+    time.sleep(0.2)
+    assert len(candidates) == 1
+    assert wait_for(lambda: len(candidates) == 2)
+    assert time.monotonic() - started >= 0.4
+    assert tx.id in [candidate_tx.id for candidate_tx in candidates[-1].transactions]
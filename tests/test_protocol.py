@@ -0,0 +1,168 @@
+import socket
+import threading
+import zlib
+
+import pytest
+
+from src.blockchain.protocol import (
+    COMPRESS_THRESHOLD,
+    ENCODING_JSON,
+    ENCODING_ZLIB,
+    FRAME_PREALLOC,
+    ZLIB_MAGIC,
+    Message,
+    MessageType,
+    Protocol,
+    RawJSON,
+    choose_encoding,
+    frame_encoding,
+    recv_frame,
+)
+
+
+def small_message() -> Message:
+    return Message(Protocol.ping().type, {"keep_alive": True}, sender="127.0.0.1:5000")
+
+
+def large_message() -> Message:
+    transactions = [
+        {"id": f"tx-{i}", "origem": "a", "destino": "b", "valor": 1.0, "timestamp": 0.0}
+        for i in range(100)
+    ]
+    message = Protocol.new_transactions(transactions)
+    message.sender = "127.0.0.1:5001"
+    return message
+
+
+@pytest.fixture
+def pair():
+    left, right = socket.socketpair()
+    yield left, right
+    left.close()
+    right.close()
+
+
+@pytest.mark.parametrize("encoding", [ENCODING_JSON, ENCODING_ZLIB])
+@pytest.mark.parametrize("make", [small_message, large_message])
+def test_round_trip(encoding, make):
+    message = make()
+    data = message.to_bytes(encoding)
+    assert int.from_bytes(data[:4], "big") == len(data) - 4
+    assert Message.from_bytes(data[4:]) == message
+
+
+def test_zlib_compresses_only_large_bodies():
+    small = small_message().to_bytes(ENCODING_ZLIB)[4:]
+    large = large_message().to_bytes(ENCODING_ZLIB)[4:]
+    assert frame_encoding(small) == ENCODING_JSON
+    assert frame_encoding(large) == ENCODING_ZLIB
+    assert large.startswith(ZLIB_MAGIC)
+    assert len(large) < len(large_message().to_bytes(ENCODING_JSON)) - 4
+    assert len(large_message().to_json(compact=True)) >= COMPRESS_THRESHOLD
+
+
+def test_raw_json_payload_matches_plain_dict():
+    chain = {"chain": [{"index": 0}], "pending_transactions": []}
+    raw = Protocol.response_chain(RawJSON('{"chain": [{"index": 0}], "pending_transactions": []}'))
+    for encoding in (ENCODING_JSON, ENCODING_ZLIB):
+        assert Message.from_bytes(raw.to_bytes(encoding)[4:]).payload == {"blockchain": chain}
+
+
+def test_mixed_encodings_on_one_stream(pair):
+    left, right = pair
+    # Um peer pode alternar codificações entre frames da mesma conexão
+    messages = [small_message(), large_message(), large_message(), small_message()]
+    encodings = [ENCODING_ZLIB, ENCODING_JSON, ENCODING_ZLIB, ENCODING_JSON]
+    left.sendall(b"".join(m.to_bytes(e) for m, e in zip(messages, encodings)))
+    for message in messages:
+        data = recv_frame(right)
+        assert Message.from_bytes(data) == message
+
+
+def test_choose_encoding():
+    assert choose_encoding([ENCODING_ZLIB, ENCODING_JSON]) == ENCODING_ZLIB
+    assert choose_encoding(["bson"]) == ENCODING_JSON
+    assert choose_encoding([]) == ENCODING_JSON
+
+
+def test_recv_frame_larger_than_prealloc(pair):
+    left, right = pair
+    body = b'"' + b"x" * (3 * FRAME_PREALLOC) + b'"'
+    frame = len(body).to_bytes(4, "big") + body
+    # Envia em pedaços, de outra thread, para o buffer crescer durante a leitura
+    sender = threading.Thread(
+        target=lambda: [left.sendall(frame[i:i + 10000]) for i in range(0, len(frame), 10000)]
+    )
+    sender.start()
+    data = recv_frame(right, buffer_size=4096)
+    sender.join()
+    assert data == body
+
+
+def test_recv_frame_rejects_oversized_length(pair):
+    left, right = pair
+    left.sendall((1024).to_bytes(4, "big"))
+    with pytest.raises(ValueError):
+        recv_frame(right, max_size=512)
+
+
+def test_recv_frame_returns_none_on_truncated_body(pair):
+    left, right = pair
+    left.sendall((100).to_bytes(4, "big") + b"{}")
+    left.close()
+    assert recv_frame(right) is None
+
+
+def test_from_bytes_bounds_inflation():
+    message = large_message()
+    data = message.to_bytes(ENCODING_ZLIB)[4:]
+    size = len(message.to_json(compact=True))
+    assert Message.from_bytes(data, max_size=size) == message
+    with pytest.raises(ValueError):
+        Message.from_bytes(data, max_size=size - 1)
+
+
+def test_from_bytes_rejects_compression_bomb():
+    bomb = ZLIB_MAGIC + zlib.compress(b" " * (10 * 1024 * 1024))
+    with pytest.raises(ValueError):
+        Message.from_bytes(bomb, max_size=1024 * 1024)
+
+
+def ping_from(sender: str, **kwargs) -> Message:
+    message = Protocol.ping(**kwargs)
+    message.sender = sender
+    return message
+
+
+@pytest.mark.parametrize("compact, offered, chosen", [
+    (True, ["bson", ENCODING_ZLIB], ENCODING_ZLIB),
+    (True, ["bson"], ENCODING_JSON),
+    (False, [ENCODING_ZLIB], ENCODING_JSON),
+])
+def test_pong_answers_the_offered_encodings(nodes, compact, offered, chosen):
+    node = nodes(compact=compact)
+    pong = node._process_message(ping_from("127.0.0.1:5001", encodings=offered))
+    assert pong.type == MessageType.PONG
+    assert pong.payload["encoding"] == chosen
+    assert node._encoding_for("127.0.0.1:5001") == chosen
+
+
+def test_ping_without_offer_keeps_frame_encoding(nodes):
+    node = nodes()
+    pong = node._process_message(ping_from("127.0.0.1:5001"))
+    assert "encoding" not in pong.payload
+    request = ping_from("127.0.0.1:5001")
+    # Sem negociação a resposta segue a codificação do frame recebido
+    for encoding in (ENCODING_JSON, ENCODING_ZLIB):
+        data = large_message().to_bytes(encoding)[4:]
+        assert node._reply_encoding(request, data) == encoding
+
+
+@pytest.mark.parametrize("remote_compact, expected", [(True, ENCODING_ZLIB), (False, ENCODING_JSON)])
+def test_ping_peer_records_the_negotiated_encoding(nodes, remote_compact, expected):
+    local, remote = nodes(), nodes(compact=remote_compact)
+    # Uma negociação anterior é substituída pela nova resposta
+    local._peer_encodings[remote.address] = ENCODING_ZLIB
+    assert local._ping_peer(remote.address)
+    assert local._encoding_for(remote.address) == expected
+    assert remote._encoding_for(local.address) == expected
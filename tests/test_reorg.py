@@ -0,0 +1,119 @@
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain, BlockStatus
+from src.blockchain.miner import Miner
+from src.blockchain.transaction import Transaction
+
+
+def copy(block: Block) -> Block:
+    """O mesmo bloco como chegaria de um peer (objeto novo)."""
+    return Block.from_dict(block.to_dict())
+
+
+def fork(blockchain: Blockchain) -> Blockchain:
+    """Outra Blockchain com a mesma cadeia, para minerar um ramo concorrente."""
+    other = Blockchain()
+    for block in blockchain.chain[1:]:
+        assert other.add_block(copy(block))
+    return other
+
+
+@pytest.fixture
+def branches(mine):
+    """
+    Cadeia local G-A1-A2 e um ramo concorrente G-A1-B2-B3 (mais longo).
+
+    A2 paga "alice" e confirma uma transação para "carol"; o ramo B paga "bob".
+    """
+    local = Blockchain()
+    mine(local, 1, address="shared")
+    remote = fork(local)
+
+    payment = Transaction(origem="genesis", destino="carol", valor=5.0)
+    a2 = Miner(local, "alice").mine_block([payment])
+    assert local.add_block(a2)
+    b_blocks = mine(remote, 2, address="bob")
+    return local, remote, payment, b_blocks
+
+
+def test_longer_branch_reorgs(branches):
+    local, remote, payment, (b2, b3) = branches
+    a2 = local.last_block
+
+    assert local.receive_block(copy(b2)) == BlockStatus.SIDE
+    assert local.last_block.hash == a2.hash
+    assert local.receive_block(copy(b3)) == BlockStatus.REORG
+
+    assert [block.hash for block in local.chain] == [block.hash for block in remote.chain]
+    # Só os blocos divergentes foram revertidos e aplicados
+    assert local.get_balance("shared") == 50.0
+    assert local.get_balance("alice") == 0.0
+    assert local.get_balance("bob") == 100.0
+    # A transação do bloco revertido volta para a mempool
+    assert local.get_balance("carol") == 0.0
+    assert [tx.id for tx in local.pending_transactions] == [payment.id]
+    assert local.get_transaction_block(payment.id) is None
+
+
+def test_reorg_back_to_the_original_branch(mine, branches):
+    local, remote, payment, (b2, b3) = branches
+    # O ramo A continua a partir da cópia com A2
+    original = fork(local)
+    local.receive_block(copy(b2))
+    local.receive_block(copy(b3))
+
+    a3, a4 = mine(original, 2, address="alice")
+    assert local.receive_block(copy(a3)) == BlockStatus.SIDE
+    assert local.receive_block(copy(a4)) == BlockStatus.REORG
+    assert local.last_block.hash == a4.hash
+    assert local.get_balance("bob") == 0.0
+    assert local.get_balance("alice") == 150.0
+    assert local.get_balance("carol") == 5.0
+    assert local.get_transaction_block(payment.id) == 2
+    assert local.pending_transactions == []
+
+
+def test_orphans_connect_when_the_parent_arrives(branches):
+    local, remote, _, (b2, b3) = branches
+    assert local.receive_block(copy(b3)) == BlockStatus.ORPHAN
+    assert local.receive_block(copy(b2)) == BlockStatus.REORG
+    assert local.last_block.hash == b3.hash
+
+
+def test_confirmed_transactions_leave_the_mempool(mine):
+    local = Blockchain()
+    mine(local, 1)
+    remote = fork(local)
+    payment = Transaction(origem="genesis", destino="carol", valor=5.0)
+    assert local.add_transaction(payment)
+
+    block = Miner(remote, "bob").mine_block([Transaction.from_dict(payment.to_dict())])
+    assert remote.add_block(block)
+    assert local.receive_block(copy(block)) == BlockStatus.EXTENDED
+    assert local.pending_transactions == []
+    assert local.get_transaction_block(payment.id) == 2
+
+
+def test_duplicates_and_bad_blocks(branches):
+    local, _, _, (b2, b3) = branches
+    assert local.receive_block(copy(local.last_block)) == BlockStatus.DUPLICATE
+    assert local.receive_block(copy(b2)) == BlockStatus.SIDE
+    assert local.receive_block(copy(b2)) == BlockStatus.DUPLICATE
+
+    # Sem Proof of Work
+    unmined = copy(b3)
+    unmined.hash = "f" * 64
+    assert local.receive_block(unmined) == BlockStatus.REJECTED
+    # Hash com PoW que não confere com o conteúdo
+    tampered = copy(b3)
+    tampered.transactions[0].valor = 1000.0
+    assert local.receive_block(tampered) == BlockStatus.REJECTED
+    assert local.last_block.index == 2
+
+
+def test_forks_deeper_than_max_fork_depth_are_rejected(mine, branches, monkeypatch):
+    local, _, _, (b2, _) = branches
+    monkeypatch.setattr(Blockchain, "MAX_FORK_DEPTH", 1)
+    mine(local, 1, address="alice")
+    assert local.receive_block(copy(b2)) == BlockStatus.REJECTED
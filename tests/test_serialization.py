@@ -0,0 +1,71 @@
+import json
+
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner
+from src.blockchain.protocol import ENCODING_ZLIB, Message, MessageType, Protocol
+from src.blockchain.store import BlockStore
+from src.blockchain.transaction import Transaction
+
+
+def assert_json_matches_dict(blockchain: Blockchain):
+    assert json.loads(blockchain.to_json()) == blockchain.to_dict()
+
+
+def round_trip(message: Message) -> Message:
+    return Message.from_bytes(message.to_bytes(ENCODING_ZLIB)[4:])
+
+
+def test_sealed_block_serializes_once(monkeypatch):
+    blockchain = Blockchain()
+    block = Miner(blockchain, "miner").mine_block()
+    assert block._json is None
+    assert blockchain.add_block(block)
+    assert block._json == json.dumps(block.to_dict())
+
+    calls = []
+    to_dict = type(block).to_dict
+    monkeypatch.setattr(type(block), "to_dict", lambda self: calls.append(self) or to_dict(self))
+    assert block.to_json() == block._json
+    assert blockchain.get_blocks_json(0, 2)[1] is block._json
+    assert calls == []
+
+
+def test_chain_json_follows_mempool_changes(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    assert_json_matches_dict(blockchain)
+
+    payment = Transaction(origem="alice", destino="bob", valor=5.0)
+    assert blockchain.add_transaction(payment)
+    assert_json_matches_dict(blockchain)
+    mine(blockchain, 1)
+    assert blockchain.pending_transactions == []
+    assert_json_matches_dict(blockchain)
+    assert blockchain.add_transactions([Transaction(origem="bob", destino="carol", valor=1.0)])
+    assert_json_matches_dict(blockchain)
+    blockchain.pending_transactions = []
+    assert_json_matches_dict(blockchain)
+
+
+def test_chain_json_from_the_store(tmp_path, mine):
+    blockchain = Blockchain(store=BlockStore(str(tmp_path)))
+    mine(blockchain, 3)
+    blockchain.close()
+    blockchain = Blockchain(store=BlockStore(str(tmp_path)))
+    assert_json_matches_dict(blockchain)
+    assert [json.loads(data) for data in blockchain.get_blocks_json(1, 2)] == [
+        block.to_dict() for block in blockchain.get_blocks(1, 2)
+    ]
+    blockchain.close()
+
+
+def test_chain_and_block_responses_decode_to_plain_dicts(nodes, mine):
+    node = nodes()
+    mine(node.blockchain, 3)
+    node.blockchain.add_transaction(Transaction(origem="genesis", destino="alice", valor=1.0))
+
+    chain = round_trip(node._process_message(Protocol.request_chain()))
+    assert chain.payload["blockchain"] == node.blockchain.to_dict()
+    blocks = round_trip(node._process_message(Protocol.request_blocks(1, 2)))
+    assert blocks.type == MessageType.RESPONSE_BLOCKS
+    assert blocks.payload["blocks"] == [block.to_dict() for block in node.blockchain.get_blocks(1, 2)]
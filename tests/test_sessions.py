@@ -0,0 +1,91 @@
+import socket
+import threading
+
+import pytest
+
+from src.blockchain.protocol import ENCODING_ZLIB, Message, MessageType, Protocol, recv_frame
+from src.blockchain.session import PeerSession
+from src.blockchain.transaction import Transaction
+
+
+@pytest.fixture
+def legacy_peer():
+    """Peer que responde PONG simples a qualquer frame e fecha a conexão; retorna (endereço, conexões)."""
+    server = socket.create_server(("127.0.0.1", 0))
+    connections = []
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                data = recv_frame(conn)
+                connections.append(Message.from_bytes(data).type)
+                conn.sendall(Protocol.pong().to_bytes())
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"127.0.0.1:{server.getsockname()[1]}", connections
+    server.close()
+
+
+def test_session_is_negotiated_once_and_reused(nodes):
+    local, remote = nodes(persistent=True), nodes()
+    for _ in range(3):
+        response = local._send_message(remote.address, Protocol.discover_peers())
+        assert response.type == MessageType.PEERS_LIST
+
+    session = local._sessions[remote.address]
+    assert session.connected and session.encoding == ENCODING_ZLIB
+    # O PING da negociação registrou o nó local no peer
+    assert local.address in remote.peers
+    sock = session.sock
+    local._send_message(remote.address, Protocol.discover_peers())
+    assert local._sessions[remote.address].sock is sock
+
+
+def test_pipelined_requests_get_one_response_each(nodes):
+    remote = nodes()
+    session = PeerSession(remote.address, "127.0.0.1:1", encodings=[ENCODING_ZLIB])
+    assert session.connect()
+    try:
+        tx = Transaction(origem="genesis", destino="alice", valor=1.0)
+        responses = session.request_many([
+            Protocol.discover_peers(),
+            Protocol.new_transaction(tx.to_dict()),
+            Protocol.ping(),
+            Protocol.request_headers(0, 1),
+        ])
+        assert [response.type for response in responses] == [
+            MessageType.PEERS_LIST,
+            MessageType.ACK,
+            MessageType.PONG,
+            MessageType.RESPONSE_HEADERS,
+        ]
+        assert remote.blockchain.has_transaction(tx.id)
+    finally:
+        session.close()
+
+
+def test_peer_without_sessions_gets_one_connection_per_message(nodes, legacy_peer):
+    address, connections = legacy_peer
+    local = nodes(persistent=True)
+    assert local._send_message(address, Protocol.ping()).type == MessageType.PONG
+    assert local._send_message(address, Protocol.ping()).type == MessageType.PONG
+    # Handshake recusado uma vez; depois só conexões únicas, sem nova negociação
+    assert connections == [MessageType.PING] * 3
+    assert address in local._legacy_peers
+    assert address not in local._sessions
+
+
+def test_dropped_session_falls_back_and_reconnects(nodes):
+    local, remote = nodes(persistent=True), nodes()
+    assert local._send_message(remote.address, Protocol.discover_peers())
+    local._sessions[remote.address].sock.shutdown(socket.SHUT_RDWR)
+
+    # A mensagem em que a queda foi percebida ainda chega por conexão única
+    assert local._send_message(remote.address, Protocol.discover_peers()).type == MessageType.PEERS_LIST
+    assert remote.address not in local._sessions
+    assert local._send_message(remote.address, Protocol.discover_peers()).type == MessageType.PEERS_LIST
+    assert local._sessions[remote.address].connected
@@ -0,0 +1,171 @@
+import json
+import os
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner
+from src.blockchain.store import BlockStore, LazyChain
+from src.blockchain.transaction import Transaction
+
+
+@pytest.fixture
+def persisted(tmp_path, mine):
+    """Cadeia de 5 blocos gravada em tmp_path e fechada; retorna (diretório, hashes, pagamento)."""
+    blockchain = Blockchain(store=BlockStore(str(tmp_path)))
+    mine(blockchain, 2, address="alice")
+    payment = Transaction(origem="genesis", destino="carol", valor=5.0)
+    assert blockchain.add_block(Miner(blockchain, "bob").mine_block([payment]))
+    mine(blockchain, 1, address="bob")
+    hashes = [block.hash for block in blockchain.chain]
+    blockchain.close()
+    return str(tmp_path), hashes, payment
+
+
+def reopen(directory: str) -> Blockchain:
+    return Blockchain(store=BlockStore(directory))
+
+
+def next_block(blocks):
+    """Bloco seguinte a blocks, minerado em uma Blockchain em memória."""
+    blockchain = Blockchain()
+    for block in blocks[1:]:
+        assert blockchain.add_block(Block.from_dict(block.to_dict()))
+    return Miner(blockchain, "miner").mine_block()
+
+
+def test_round_trip_restores_chain_and_state(persisted):
+    directory, hashes, payment = persisted
+    blockchain = reopen(directory)
+    try:
+        assert isinstance(blockchain.chain, LazyChain)
+        assert [block.hash for block in blockchain.chain] == hashes
+        assert blockchain.last_block.hash == hashes[-1]
+        assert blockchain.get_balance("alice") == 100.0
+        assert blockchain.get_balance("bob") == 100.0
+        assert blockchain.get_balance("carol") == 5.0
+        assert blockchain.get_transaction_block(payment.id) == 3
+        # A cadeia reaberta continua recebendo blocos normalmente
+        assert blockchain.add_block(Miner(blockchain, "dave").mine_block())
+    finally:
+        blockchain.close()
+    blockchain = reopen(directory)
+    assert len(blockchain.chain) == len(hashes) + 1
+    assert blockchain.get_balance("dave") == 50.0
+    blockchain.close()
+
+
+def test_round_trip_without_checkpoint_revalidates(persisted):
+    directory, hashes, payment = persisted
+    os.remove(os.path.join(directory, BlockStore.CHECKPOINT_FILE))
+    blockchain = reopen(directory)
+    assert [block.hash for block in blockchain.chain] == hashes
+    assert blockchain.get_balance("carol") == 5.0
+    assert blockchain.get_transaction_block(payment.id) == 3
+    blockchain.close()
+
+
+def test_truncated_tail_record_is_discarded(persisted):
+    directory, hashes, payment = persisted
+    data_path = os.path.join(directory, BlockStore.DATA_FILE)
+    # Queda no meio da gravação do último bloco
+    with open(data_path, "r+b") as f:
+        f.truncate(os.path.getsize(data_path) - 10)
+    blockchain = reopen(directory)
+    try:
+        assert [block.hash for block in blockchain.chain] == hashes[:-1]
+        # O checkpoint apontava além do que sobrou: o estado é recalculado
+        assert blockchain.get_balance("bob") == 50.0
+        assert blockchain.get_balance("carol") == 5.0
+        assert blockchain.get_transaction_block(payment.id) == 3
+        # O bloco perdido pode ser gravado de novo no mesmo lugar
+        assert blockchain.add_block(Miner(blockchain, "bob").mine_block())
+    finally:
+        blockchain.close()
+    blockchain = reopen(directory)
+    assert len(blockchain.chain) == len(hashes)
+    blockchain.close()
+
+
+def test_partial_index_record_and_trailing_data_are_dropped(tmp_path, mine):
+    blockchain = Blockchain(store=BlockStore(str(tmp_path)))
+    mine(blockchain, 2)
+    blockchain.close()
+    data_size = os.path.getsize(tmp_path / BlockStore.DATA_FILE)
+    index_size = os.path.getsize(tmp_path / BlockStore.INDEX_FILE)
+    with open(tmp_path / BlockStore.DATA_FILE, "ab") as f:
+        f.write((500).to_bytes(4, "big") + b'{"index": 3')
+    with open(tmp_path / BlockStore.INDEX_FILE, "ab") as f:
+        f.write(b"\x00" * 5)
+
+    store = BlockStore(str(tmp_path))
+    assert len(store) == 3
+    assert [block.index for block in store.load()] == [0, 1, 2]
+    store.close()
+    assert os.path.getsize(tmp_path / BlockStore.DATA_FILE) == data_size
+    assert os.path.getsize(tmp_path / BlockStore.INDEX_FILE) == index_size
+
+
+def test_store_rejects_out_of_order_append(tmp_path):
+    blockchain = Blockchain(store=BlockStore(str(tmp_path)))
+    with pytest.raises(ValueError):
+        blockchain.store.append(blockchain.chain[0])
+    blockchain.close()
+
+
+@pytest.fixture
+def lazy(tmp_path, mine):
+    """LazyChain sobre um store de 6 blocos: 4 frios e 2 quentes, cache de 2 blocos."""
+    blockchain = Blockchain(store=BlockStore(str(tmp_path)))
+    mine(blockchain, 5)
+    blocks = list(blockchain.chain)
+    blockchain.close()
+    store = BlockStore(str(tmp_path))
+    chain = LazyChain(store, 4, hot_size=2, cache_size=2)
+    chain.extend([store.read(4), store.read(5)])
+    yield chain, blocks
+    store.close()
+
+
+def test_lazy_chain_reads_like_a_list(lazy):
+    chain, blocks = lazy
+    hashes = [block.hash for block in blocks]
+    assert len(chain) == 6
+    assert [block.hash for block in chain] == hashes
+    assert chain[-1].hash == hashes[-1] and chain[0].hash == hashes[0]
+    assert [block.hash for block in chain[2:5]] == hashes[2:5]
+    assert [block.hash for block in chain.uncached_slice(3, 10)] == hashes[3:]
+    assert [json.loads(data)["hash"] for data in chain.json_slice(1, 6)] == hashes[1:]
+    with pytest.raises(IndexError):
+        chain[6]
+
+
+def test_lazy_chain_cache_is_bounded(lazy):
+    chain, _ = lazy
+    first = chain[1]
+    assert chain[1] is first
+    for index in (2, 3):
+        chain[index]
+    assert len(chain._cache) == 2
+    # O bloco 1 saiu do cache: é decodificado de novo
+    assert chain[1] is not first
+    # Iterar o histórico não passa pelo cache
+    list(chain)
+    assert sorted(chain._cache) == [1, 3]
+
+
+def test_lazy_chain_evicts_stored_blocks_and_drops_suffixes(lazy):
+    chain, blocks = lazy
+    chain.store.append(next_block(blocks))
+    chain.append(chain.store.read(6))
+    chain.evict(len(chain.store))
+    assert chain._cold_height == 5 and len(chain._hot) == 2
+
+    del chain[6:]
+    assert len(chain) == 6 and chain._cold_height == 5
+    chain[3]
+    del chain[3:]
+    assert len(chain) == 3 and chain._hot == [] and 3 not in chain._cache
+    with pytest.raises(TypeError):
+        del chain[1]
@@ -0,0 +1,122 @@
+import sys
+import threading
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.protocol import Protocol, RawJSON
+from src.blockchain.stream import ChainStreamDecoder
+
+
+def feed_in_chunks(decoder: ChainStreamDecoder, text: str, size: int) -> list[dict]:
+    blocks = []
+    for start in range(0, len(text), size):
+        blocks.extend(decoder.feed(text[start:start + size]))
+    return blocks
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_decoder_yields_blocks_in_order(mine, size):
+    blockchain = Blockchain()
+    mine(blockchain, 3)
+    text = Protocol.response_chain(RawJSON(blockchain.to_json())).to_json()
+    decoder = ChainStreamDecoder()
+    blocks = feed_in_chunks(decoder, text, size)
+    assert [block["hash"] for block in blocks] == [block.hash for block in blockchain.chain]
+    outer = decoder.close()
+    assert decoder.streamed
+    assert outer["payload"]["blockchain"] == {"chain": [], "pending_transactions": []}
+
+
+def test_decoder_rejects_truncated_stream(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 2)
+    text = Protocol.response_chain(RawJSON(blockchain.to_json())).to_json()
+    decoder = ChainStreamDecoder()
+    decoder.feed(text[:len(text) // 2])
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_decoder_bounds_item_size(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1)
+    text = Protocol.response_chain(RawJSON(blockchain.to_json())).to_json()
+    decoder = ChainStreamDecoder(max_item_size=64)
+    with pytest.raises(ValueError):
+        feed_in_chunks(decoder, text, 16)
+
+
+def test_cold_sync_appends_as_blocks_arrive(mine):
+    remote = Blockchain()
+    mine(remote, 4)
+    local = Blockchain()
+    builder = local.suffix_builder(extend_tip=True)
+    for block in remote.chain:
+        assert builder.add(block)
+        # Cada bloco que estende a ponta entra na cadeia na hora
+        assert len(local.chain) == block.index + 1
+    assert builder.appended == 4
+    assert builder.suffix == []
+    assert local.last_block.hash == remote.last_block.hash
+
+
+def test_fork_is_buffered_as_suffix(mine):
+    local = Blockchain()
+    mine(local, 2, address="local")
+    remote = Blockchain()
+    mine(remote, 3, address="remote")
+    builder = local.suffix_builder(extend_tip=True)
+    assert all(builder.add(block) for block in remote.chain)
+    assert builder.appended == 0
+    assert [block.index for block in builder.suffix] == [1, 2, 3]
+    assert local.apply_suffix(builder.suffix)
+    assert local.last_block.hash == remote.last_block.hash
+
+
+def test_builder_rejects_broken_link(mine):
+    remote = Blockchain()
+    blocks = mine(remote, 2)
+    builder = Blockchain().suffix_builder()
+    assert builder.add(remote.chain[0])
+    assert not builder.add(blocks[1])
+
+
+@pytest.fixture
+def frequent_switches():
+    """Trocas de thread frequentes, para expor corridas."""
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(previous)
+
+
+@pytest.mark.parametrize("run", range(5))
+def test_concurrent_streams_extend_the_tip_once(mine, frequent_switches, run):
+    remote = Blockchain()
+    mine(remote, 20)
+    local = Blockchain()
+    builders = [local.suffix_builder(extend_tip=True) for _ in range(4)]
+    barrier = threading.Barrier(len(builders))
+    errors = []
+
+    def stream(builder):
+        barrier.wait()
+        try:
+            for block in remote.chain:
+                assert builder.add(Block.from_dict(block.to_dict()))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=stream, args=(builder,)) for builder in builders]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [block.hash for block in local.chain] == [block.hash for block in remote.chain]
+    # Cada bloco entrou por um único stream; os outros o viram como comum
+    assert sum(builder.appended for builder in builders) == 20
+    assert all(builder.suffix == [] for builder in builders)
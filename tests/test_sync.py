@@ -0,0 +1,125 @@
+import pytest
+
+from src.blockchain.node import Node
+from src.blockchain.protocol import Message, MessageType
+
+
+def without_headers(node: Node, monkeypatch):
+    """Faz node tratar todos os peers como sem REQUEST_HEADERS (só REQUEST_CHAIN)."""
+    send = node._send_message
+
+    def send_message(peer_address, message, *args, **kwargs):
+        if message.type in (MessageType.REQUEST_HEADERS, MessageType.REQUEST_BLOCKS):
+            return None
+        return send(peer_address, message, *args, **kwargs)
+
+    monkeypatch.setattr(node, "_send_message", send_message)
+
+
+def test_probes_do_not_touch_the_chain_and_the_longest_wins(nodes, mine, monkeypatch):
+    short, long = nodes(), nodes()
+    mine(short.blockchain, 2, address="short")
+    mine(long.blockchain, 4, address="long")
+    local = nodes()
+    local.peers.update([short.address, long.address])
+    without_headers(local, monkeypatch)
+
+    query = local._query_peers
+    heights = []
+
+    def query_peers(*args):
+        report = query(*args)
+        heights.append(len(local.blockchain.chain))
+        return report
+
+    monkeypatch.setattr(local, "_query_peers", query_peers)
+    result = local.sync_blockchain()
+    # Nenhuma sondagem aplicou blocos; só o melhor candidato entrou depois
+    assert heights == [1]
+    assert result["updated"] and result["best_peer"] == long.address
+    assert [block.hash for block in local.blockchain.chain] == [block.hash for block in long.blockchain.chain]
+
+
+def test_probe_counts_new_blocks_and_buffers_a_fork(nodes, mine):
+    remote = nodes()
+    mine(remote.blockchain, 3, address="remote")
+    behind = nodes()
+    forked = nodes()
+    mine(forked.blockchain, 1, address="forked")
+    for local in (behind, forked):
+        before = len(local.blockchain.chain)
+        builder = local._fetch_chain(remote.address, probe=True)
+        assert builder.height == 4
+        assert len(local.blockchain.chain) == before
+        if local is behind:
+            assert builder.appended == 3 and builder.suffix == []
+        else:
+            assert builder.appended == 0
+            assert [block.index for block in builder.suffix] == [1, 2, 3]
+
+
+def route_to(local: Node, remote: Node, monkeypatch, requests: list, lie: int = 0):
+    """
+    Entrega as mensagens de local direto a remote (sem rede), registrando
+    em requests a altura local a cada REQUEST_BLOCKS. Com lie, cada
+    RESPONSE_BLOCKS anuncia uma altura lie blocos maior que a anterior.
+    """
+    advertised = [len(remote.blockchain.chain)]
+
+    def send_message(peer_address, message, *args, **kwargs):
+        if message.type == MessageType.REQUEST_BLOCKS:
+            requests.append(len(local.blockchain.chain))
+            assert len(requests) < 100, "download sem fim"
+        response = remote._process_message(message)
+        response = Message.from_bytes(response.to_bytes()[4:])
+        if lie and response.type == MessageType.RESPONSE_BLOCKS:
+            advertised.append(advertised[-1] + lie)
+            response.payload["height"] = advertised[-1]
+        return response
+
+    monkeypatch.setattr(local, "_send_message", send_message)
+
+
+@pytest.fixture
+def pair():
+    local, remote = Node("127.0.0.1", 5000), Node("127.0.0.1", 5001)
+    yield local, remote
+    local.stop()
+    remote.stop()
+
+
+def test_incremental_sync_applies_each_batch(pair, mine, monkeypatch):
+    local, remote = pair
+    mine(remote.blockchain, 7)
+    monkeypatch.setattr(Node, "SYNC_BATCH", 2)
+    requests = []
+    route_to(local, remote, monkeypatch, requests)
+    assert local._sync_incremental(remote.address)
+    # A cadeia cresce a cada lote, não só no fim
+    assert requests == [1, 3, 5, 7]
+    assert local.blockchain.last_block.hash == remote.blockchain.last_block.hash
+
+
+def test_incremental_sync_stops_at_the_first_advertised_height(pair, mine, monkeypatch):
+    local, remote = pair
+    mine(remote.blockchain, 4)
+    monkeypatch.setattr(Node, "SYNC_BATCH", 2)
+    requests = []
+    route_to(local, remote, monkeypatch, requests, lie=10)
+    assert local._sync_incremental(remote.address)
+    assert requests == [1, 3]
+    assert len(local.blockchain.chain) == 5
+
+
+def test_incremental_sync_buffers_a_fork_until_it_is_longer(pair, mine, monkeypatch):
+    local, remote = pair
+    mine(local.blockchain, 3, address="local")
+    mine(remote.blockchain, 5, address="remote")
+    monkeypatch.setattr(Node, "SYNC_BATCH", 2)
+    requests = []
+    route_to(local, remote, monkeypatch, requests)
+    assert local._sync_incremental(remote.address)
+    # O primeiro lote do fork (2 blocos) não supera a nossa cadeia e fica
+    # guardado; com o segundo o fork é aplicado e o terceiro só estende
+    assert requests == [4, 4, 5]
+    assert [block.hash for block in local.blockchain.chain] == [block.hash for block in remote.blockchain.chain]
@@ -0,0 +1,67 @@
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner
+from src.blockchain.transaction import Transaction
+
+
+def copy(tx: Transaction) -> Transaction:
+    """A mesma transação como chegaria de um peer (objeto novo)."""
+    return Transaction.from_dict(tx.to_dict())
+
+
+def test_duplicates_are_detected_by_id(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    payment = Transaction(origem="alice", destino="bob", valor=10.0)
+    assert blockchain.add_transaction(payment)
+    assert not blockchain.add_transaction(copy(payment))
+    assert blockchain.has_transaction(payment.id)
+    assert blockchain.get_pending_transaction(payment.id) is payment
+    # O débito pendente conta uma vez só
+    assert blockchain.get_balance("alice") == 40.0
+
+
+def test_confirmed_transactions_cannot_be_replayed(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    payment = Transaction(origem="alice", destino="bob", valor=10.0)
+    assert blockchain.add_transaction(payment)
+    mine(blockchain, 1)
+
+    assert blockchain.get_transaction_block(payment.id) == 2
+    assert blockchain.get_pending_transaction(payment.id) is None
+    assert blockchain.has_transaction(payment.id)
+    block, position = blockchain.locate_transaction(payment.id)
+    assert block.index == 2 and block.transactions[position].id == payment.id
+    assert not blockchain.add_transaction(copy(payment))
+    assert blockchain.get_transaction_block("desconhecida") is None
+    assert blockchain.locate_transaction("desconhecida") is None
+
+
+def test_pending_transactions_keep_arrival_order(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    payments = [Transaction(origem="alice", destino=f"dest-{i}", valor=1.0) for i in range(5)]
+    for tx in reversed(payments):
+        assert blockchain.add_transaction(tx)
+    assert blockchain.pending_transactions == payments[::-1]
+
+    # O setter substitui a mempool e recalcula os débitos pendentes
+    blockchain.pending_transactions = payments[:2]
+    assert blockchain.pending_transactions == payments[:2]
+    assert blockchain.get_balance("alice") == 48.0
+
+
+def test_from_dict_rebuilds_the_index(mine):
+    blockchain = Blockchain()
+    mine(blockchain, 1, address="alice")
+    confirmed = Transaction(origem="alice", destino="bob", valor=10.0)
+    assert blockchain.add_block(Miner(blockchain, "alice").mine_block([confirmed]))
+    pending = Transaction(origem="alice", destino="carol", valor=5.0)
+    assert blockchain.add_transaction(pending)
+
+    restored = Blockchain.from_dict(blockchain.to_dict())
+    assert restored.get_transaction_block(confirmed.id) == 2
+    assert [tx.id for tx in restored.pending_transactions] == [pending.id]
+    assert not restored.add_transaction(copy(confirmed))
+    assert not restored.add_transaction(copy(pending))
+    assert restored.get_balance("alice") == blockchain.get_balance("alice") == 85.0
@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+
+import pytest
+
+from src.blockchain.block import Block
+from src.blockchain.blockchain import Blockchain
+from src.blockchain.miner import Miner
+from src.blockchain.validation import ChainValidator
+
+
+def copy(block: Block) -> Block:
+    return Block.from_dict(block.to_dict())
+
+
+@pytest.fixture(scope="module")
+def chain():
+    """Cadeia de 21 blocos (gênesis + 20), minerada uma vez para o módulo."""
+    blockchain = Blockchain()
+    miner = Miner(blockchain, "miner")
+    for _ in range(20):
+        assert blockchain.add_block(miner.mine_block())
+    return list(blockchain.chain)
+
+
+@pytest.fixture
+def validator(monkeypatch):
+    monkeypatch.setattr(ChainValidator, "BATCH_SIZE", 4)
+    monkeypatch.setattr(ChainValidator, "PARALLEL_THRESHOLD", 8)
+    validator = ChainValidator(Blockchain.DIFFICULTY, workers=2)
+    yield validator
+    validator.shutdown()
+
+
+def test_parallel_validation_accepts_a_valid_chain(validator, chain):
+    assert validator.validate(chain[0], [copy(block) for block in chain[1:]])
+    assert validator._pool is not None
+
+
+@pytest.mark.parametrize("position", [0, 9, 19])
+def test_parallel_validation_finds_a_bad_hash_in_any_batch(validator, chain, position):
+    blocks = [copy(block) for block in chain[1:]]
+    blocks[position].transactions[0].valor = 1000.0
+    assert not validator.validate(chain[0], blocks)
+    # Sequencial dá o mesmo resultado
+    assert not ChainValidator(Blockchain.DIFFICULTY).validate(chain[0], blocks)
+
+
+def test_short_chains_and_bad_links_skip_the_pool(validator, chain):
+    assert validator.validate(chain[0], [copy(block) for block in chain[1:5]])
+    blocks = [copy(block) for block in chain[1:]]
+    blocks[12].previous_hash = "0" * 64
+    assert not validator.validate(chain[0], blocks)
+    blocks = [copy(block) for block in chain[1:]]
+    blocks[3].hash = "f" * 64
+    assert not validator.validate(chain[0], blocks)
+    assert validator._pool is None
+
+
+class HeldPool:
+    """Pool falso: só o primeiro lote é calculado; os outros ficam na fila."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        if not self.futures:
+            future.set_result(fn(*args))
+        self.futures.append(future)
+        return future
+
+
+def test_failed_batch_cancels_the_queued_batches(validator, chain, monkeypatch):
+    pool = HeldPool()
+    monkeypatch.setattr(validator, "_get_pool", lambda: pool)
+    blocks = [copy(block) for block in chain[1:]]
+    blocks[0].transactions[0].valor = 1000.0
+    assert not validator.validate(chain[0], blocks)
+    # Janela de workers * 2 lotes: nada além dela foi enviado
+    assert len(pool.futures) == 4
+    assert all(future.cancelled() for future in pool.futures[1:])